@@ -1,17 +1,25 @@
+import asyncio
 import logging
+from SmartScoop.conversation_memory import SessionMemoryManager
+from SmartScoop.metrics import MetricsRegistry, metrics
+from SmartScoop.price_alerts import PriceAlertEngine
+from SmartScoop.price_history import PriceHistoryStore
+from SmartScoop.product import parse_price
 from SmartScoop.product_search import ProductSearchInterface
+from SmartScoop.prompts import REACT_PROMPT
 from SmartScoop.recommendation import RecommendationEngine
+from SmartScoop.search_aggregator import SearchAggregator
 from SmartScoop.seasonal_discount import SeasonalOptimizer
 from SmartScoop.user_profile import UserProfileManager
-from typing import Dict, List, Any, Optional
-from langchain_core.chat_history import InMemoryChatMessageHistory
+from typing import AsyncIterator, Dict, List, Any, Optional, Tuple
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.messages import get_buffer_string
 from pydantic import BaseModel
 from langchain.agents import AgentExecutor, create_react_agent
-from langchain.memory import ConversationBufferMemory
 from langchain.tools import Tool
-from langchain import hub
-import asyncio
 import json
+import time
+from uuid import UUID
 
 
 class ProductQuery(BaseModel):
@@ -33,6 +41,102 @@ class ProductInfo(BaseModel):
     product_info: Dict[str, Any]
 
 
+class PriceAlertRequest(BaseModel):
+    user_id: str
+    product_id: str
+    target_price: float
+
+
+class AgentMetricsHandler(AsyncCallbackHandler):
+    """LangChain callbacks that time LLM calls, tool calls and agent steps."""
+
+    def __init__(self, registry: MetricsRegistry = metrics):
+        self.registry = registry
+        self._started: Dict[UUID, Tuple[str, float]] = {}
+
+    def _start(self, run_id: UUID, stage: str):
+        self._started[run_id] = (stage, time.perf_counter())
+
+    def _end(self, run_id: UUID):
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            self.registry.observe(started[0], time.perf_counter() - started[1])
+
+    async def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs):
+        self._start(run_id, "llm")
+
+    async def on_chat_model_start(
+        self, serialized, messages, *, run_id: UUID, **kwargs
+    ):
+        self._start(run_id, "llm")
+
+    async def on_llm_end(self, response, *, run_id: UUID, **kwargs):
+        self._end(run_id)
+
+    async def on_llm_error(self, error, *, run_id: UUID, **kwargs):
+        self._end(run_id)
+        self.registry.increment("llm_errors")
+
+    async def on_tool_start(self, serialized, input_str, *, run_id: UUID, **kwargs):
+        name = (serialized or {}).get("name") or kwargs.get("name") or "unknown"
+        self._start(run_id, f"tool.{name}")
+
+    async def on_tool_end(self, output, *, run_id: UUID, **kwargs):
+        self._end(run_id)
+
+    async def on_tool_error(self, error, *, run_id: UUID, **kwargs):
+        self._end(run_id)
+        self.registry.increment("tool_errors")
+
+    async def on_agent_action(self, action, *, run_id: UUID, **kwargs):
+        self.registry.increment("agent_steps")
+
+
+class StreamBackpressure(AsyncCallbackHandler):
+    """Holds a streamed run back while its consumer lags behind.
+
+    ``astream_events`` runs the agent in a task of its own and buffers events
+    in an unbounded queue. This handler is awaited by that task for every
+    token and tool event, and waits there while more than ``max_pending`` of
+    them have not been ``consume``d, so a slow reader pauses the LLM stream
+    and the next tool call instead of piling up output.
+    """
+
+    def __init__(self, max_pending: int = 32):
+        self.max_pending = max_pending
+        self.produced = 0
+        self.consumed = 0
+        self._caught_up = asyncio.Event()
+
+    def consume(self):
+        self.consumed += 1
+        self._caught_up.set()
+
+    async def _produce(self):
+        self.produced += 1
+        while self.produced - self.consumed > self.max_pending:
+            self._caught_up.clear()
+            await self._caught_up.wait()
+
+    async def on_llm_new_token(self, token, **kwargs):
+        await self._produce()
+
+    async def on_tool_start(self, serialized, input_str, **kwargs):
+        await self._produce()
+
+    async def on_tool_end(self, output, **kwargs):
+        await self._produce()
+
+
+# astream_events kinds that StreamBackpressure counts
+_STREAMED_EVENTS = (
+    "on_llm_stream",
+    "on_chat_model_stream",
+    "on_tool_start",
+    "on_tool_end",
+)
+
+
 class ShoppingAssistantAgent:
     def __init__(
         self,
@@ -41,75 +145,97 @@ class ShoppingAssistantAgent:
         user_profile_manager: UserProfileManager,
         recommendation_engine: RecommendationEngine,
         seasonal_optimizer: SeasonalOptimizer,
+        memory: Optional[SessionMemoryManager] = None,
+        price_history: Optional[PriceHistoryStore] = None,
+        price_alerts: Optional[PriceAlertEngine] = None,
+        stream_max_pending: int = 32,
     ):
         self.llm = llm
         self.product_searches = product_searches
+        self.search_aggregator = SearchAggregator(product_searches)
         self.user_profile_manager = user_profile_manager
         self.recommendation_engine = recommendation_engine
         self.seasonal_optimizer = seasonal_optimizer
+        self.price_history = price_history
+        self.price_alerts = price_alerts
+        self.stream_max_pending = stream_max_pending
 
-        chat_history = InMemoryChatMessageHistory()
-        self.memory = ConversationBufferMemory(
-            chat_memory=chat_history,
-            memory_key="chat_history",
-            return_messages=True,
-            output_key="output",
-        )
+        self.memory = memory or SessionMemoryManager()
+        # Passed per run (not to the executor) so LLM and tool runs inherit it.
+        self.run_config = {"callbacks": [AgentMetricsHandler()]}
+
+        # Tools, agent and executor hold no per-user state, so they are built
+        # once and shared by every request.
+        self.tools = self.create_tools()
+        self.agent = self._create_agent()
+        self.agent_executor = self._create_executor()
 
     def create_tools(self) -> List[Tool]:
-        return [
+        tools = [
             Tool(
                 name="ProductSearch",
-                func=lambda query: asyncio.run(self._search_products(query)),
+                func=None,
+                coroutine=self._search_products,
                 description="Search for products across multiple platforms. Input should be a single query. make sure you provide links and organized data",
             ),
             Tool(
                 name="GetRecommendations",
-                func=lambda args: asyncio.run(
-                    self._get_recommendations(json.loads(args))
-                ),
+                func=None,
+                coroutine=self._json_tool(self._get_recommendations),
                 description='Get personalized product recommendations based on user history and preferences. args should be "userid" and "category" if given and pass as a dictionary. do not pass escape characters!',
             ),
             Tool(
                 name="SeasonalDiscount",
-                func=lambda args: asyncio.run(
-                    self._check_seasonal_discount(json.loads(args))
-                ),
+                func=None,
+                coroutine=self._json_tool(self._check_seasonal_discount),
                 description='Analyze if a product might go on sale soon and if the user should wait. Should contain "productInfo" as a dictionary.',
             ),
             Tool(
                 name="UpdatePreferences",
-                func=lambda args: asyncio.run(
-                    self._update_preferences(json.loads(args))
-                ),
+                func=None,
+                coroutine=self._json_tool(self._update_preferences),
                 description='Update user shopping preferences and style profile. should contain "userid" and "preferences" as a dictionary. and any variable used should be in camel case',
             ),
         ]
+        if self.price_alerts is not None:
+            tools.append(
+                Tool(
+                    name="PriceAlert",
+                    func=None,
+                    coroutine=self._json_tool(self._set_price_alert),
+                    description='Notify the user when a product drops to a target price. should contain "userid", "productId" (the ASIN) and "targetPrice" as a dictionary.',
+                )
+            )
+        return tools
+
+    @staticmethod
+    def _json_tool(handler):
+        # Tools run natively on the server's event loop; the agent executor
+        # awaits them, so no nested event loop or worker thread is involved.
+        async def run(args: str) -> str:
+            return await handler(json.loads(args))
+
+        return run
 
     async def _search_products(self, query_str: str) -> str:
         args = ProductQuery(query=query_str)
-        all_results = []
-        for search_engine in self.product_searches:
-            print(args.query)
-            results = await search_engine.search_products(
-                args.query, args.filters or {}
-            )
-            # print("--------------------------------------------------------")
-            # print(results)
-            # print("--------------------------------------------------------")
-            all_results.extend(results)
+        all_results = await self.search_aggregator.search(
+            args.query, args.filters or {}
+        )
         if not all_results:
             return "No products found matching your criteria."
-        formatted_results = [
-            f"- {product['title']}\n ${product['price']} \nLink: ({product['url']})\n Rating: {product['delivery']}/5 ({product['rating']})"
-            for product in all_results
-        ]
-        return "Found these products:\n" + "\n".join(formatted_results)
+        if self.price_history is not None:
+            await self.price_history.record(all_results)
+        if self.price_alerts is not None:
+            await self.price_alerts.observe(all_results)
+        return "Found these products:\n" + "\n".join(
+            product.summary() for product in all_results
+        )
 
     async def _get_recommendations(self, args: Dict[str, Any]) -> str:
         user_id = args.get("userid")
         category = args.get("category")
-        recommendations = self.recommendation_engine.get_recommendations(
+        recommendations = await self.recommendation_engine.aget_recommendations(
             user_id, category
         )
         if not recommendations:
@@ -123,58 +249,94 @@ class ShoppingAssistantAgent:
         )
 
     async def _check_seasonal_discount(self, args: ProductInfo) -> str:
-        print(args)
-        result = self.seasonal_optimizer.should_wait_for_sale(args['productInfo'])
-        if result["should_wait"]:
+        result = await self.seasonal_optimizer.ashould_wait_for_sale(
+            args.get("productInfo")
+        )
+        if result["reason"] == "historical_low":
             return (
-                # f"I recommend waiting for {result['sale_event']} on {result['estimated_sale_date']}. "
-                # f"Expected discount: {result['expected_discount']}%. "
-                # f"Current price: ${result['current_price']:.2f}, "
-                # f"Estimated sale price: ${result['estimated_sale_price']:.2f}"
-                result
+                f"${result['current_price']:.2f} is within "
+                f"{self.seasonal_optimizer.low_tolerance:.0%} of this product's "
+                f"lowest recorded price (${result['historical_low']:.2f}). "
+                "It's a good time to buy."
+            )
+        if result["reason"] == "falling_price":
+            return (
+                "This product's price has been falling recently "
+                f"(lowest recorded: ${result['historical_low']:.2f}). "
+                "I recommend waiting a little longer."
+            )
+        if result["should_wait"]:
+            message = (
+                f"I recommend waiting for {result['sale_event']} on "
+                f"{result['estimated_sale_date']:%d-%m-%Y}. "
+                f"Expected discount: {result['expected_discount']:.0f}%."
             )
+            if result["estimated_sale_price"] is not None:
+                message += (
+                    f" Current price: ${result['current_price']:.2f}, "
+                    f"Estimated sale price: ${result['estimated_sale_price']:.2f}"
+                )
+            return message
         return "No significant sales expected soon. It's a good time to buy."
 
+    async def _set_price_alert(self, args: PriceAlertRequest) -> str:
+        try:
+            await self.price_alerts.add_alert(
+                args.get("userid"), args.get("productId"), args.get("targetPrice")
+            )
+        except ValueError:
+            return "Please give a product ASIN and a positive target price."
+        return (
+            f"Price alert set: I'll let you know when {args['productId']} "
+            f"drops to ${parse_price(args['targetPrice']):.2f} or less."
+        )
+
     async def _update_preferences(self, args: PreferenceUpdate) -> str:
         # profile = await self.user_profile_manager.get_user_profile(args.userid)
-        profile = await self.user_profile_manager.get_user_profile(args["userid"])
+        profile = await self.user_profile_manager.aget_user_profile(args["userid"])
         if not profile:
-            return f"No profile found for user {args.userid}"
+            return f"No profile found for user {args['userid']}"
         # profile.preferences.update(args.preferences)
         profile.update_preferences(args["preferences"])
-        self.user_profile_manager.update_user_profile(profile)
-        return f"Successfully updated preferences for user {args.userid}"
+        await self.user_profile_manager.aupdate_user_profile(profile)
+        return f"Successfully updated preferences for user {args['userid']}"
 
     def _create_agent(self):
-        tools = self.create_tools()
-        prompt = hub.pull("hwchase17/react")
-        # print(prompt)
         return create_react_agent(
             llm=self.llm,
-            tools=tools,
-            prompt=prompt,
+            tools=self.tools,
+            prompt=REACT_PROMPT,
         )
 
+    def _create_executor(self) -> AgentExecutor:
+        # No memory is attached here: it is per-request state, loaded and saved
+        # in process_message.
+        return AgentExecutor.from_agent_and_tools(
+            agent=self.agent,
+            tools=self.tools,
+            handle_parsing_errors=True,
+            verbose=True,
+        )
+
+    async def _build_input(self, user_id: str, message: str) -> Dict[str, str]:
+        history = await self.memory.get_history(user_id)
+        return {
+            "input": f"User {user_id} requests: {message}",
+            "chat_history": get_buffer_string(history) or "(none)",
+        }
+
     async def process_message(self, user_id: str, message: str) -> str:
         try:
-            agent = self._create_agent()
-            agent_executor = AgentExecutor.from_agent_and_tools(
-                agent=agent,
-                tools=self.create_tools(),
-                handle_parsing_errors=True,
-                verbose=True,
-                memory=self.memory,
-                input_key="input",
-                output_key="output",
+            input_dict = await self._build_input(user_id, message)
+            response = await self.agent_executor.ainvoke(
+                input_dict, config=self.run_config
             )
-            input_dict = {
-                "input": f"User {user_id} requests: {message}",
-                "chat_history": self.memory.chat_memory.messages if self.memory else [],
-            }
-            response = await agent_executor.ainvoke(input_dict)
             if isinstance(response, dict) and "output" in response:
-                return response["output"]
-            return str(response)
+                output = response["output"]
+            else:
+                output = str(response)
+            await self.memory.add_turn(user_id, input_dict["input"], output)
+            return output
         except IndexError as e:
             logging.error(f"Index error in process_message: {str(e)}", exc_info=True)
             raise RuntimeError("Agent configuration error") from e
@@ -182,6 +344,64 @@ class ShoppingAssistantAgent:
             logging.error(f"Error processing message: {str(e)}", exc_info=True)
             return "I apologize, but I encountered an error processing your request. Please try rephrasing your question."
 
+    async def stream_message(
+        self, user_id: str, message: str
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield events for one message while the agent works on it.
+
+        Events are ``token`` (LLM output text), ``tool_start``, ``tool_end``
+        and finally ``final`` or ``error``. The agent runs at most
+        ``stream_max_pending`` token and tool events ahead of the consumer
+        before it is paused. Closing the generator cancels the in-flight LLM
+        call or tool, and the turn is only saved to memory once it completes.
+        """
+        output = None
+        backpressure = StreamBackpressure(self.stream_max_pending)
+        config = dict(
+            self.run_config, callbacks=self.run_config["callbacks"] + [backpressure]
+        )
+        try:
+            input_dict = await self._build_input(user_id, message)
+            async for event in self.agent_executor.astream_events(
+                input_dict, config=config, version="v2"
+            ):
+                kind = event["event"]
+                if kind in ("on_llm_stream", "on_chat_model_stream"):
+                    chunk = event["data"]["chunk"]
+                    text = getattr(chunk, "content", None) or getattr(
+                        chunk, "text", ""
+                    )
+                    if text:
+                        yield {"type": "token", "text": text}
+                elif kind == "on_tool_start":
+                    tool_event = {"type": "tool_start", "tool": event["name"]}
+                    if event["data"].get("input"):
+                        tool_event["input"] = event["data"]["input"]
+                    yield tool_event
+                elif kind == "on_tool_end":
+                    yield {
+                        "type": "tool_end",
+                        "tool": event["name"],
+                        "output": str(event["data"].get("output")),
+                    }
+                elif kind == "on_chain_end" and not event["parent_ids"]:
+                    response = event["data"].get("output")
+                    if isinstance(response, dict) and "output" in response:
+                        output = response["output"]
+                    else:
+                        output = str(response)
+                if kind in _STREAMED_EVENTS:
+                    backpressure.consume()
+            await self.memory.add_turn(user_id, input_dict["input"], output)
+        except Exception as e:
+            logging.error(f"Error streaming message: {str(e)}", exc_info=True)
+            yield {
+                "type": "error",
+                "message": "I apologize, but I encountered an error processing your request. Please try rephrasing your question.",
+            }
+            return
+        yield {"type": "final", "output": output}
+
     def _validate_user_id(self, user_id: str) -> bool:
         """Validate user ID before processing"""
         if not user_id or not isinstance(user_id, str):
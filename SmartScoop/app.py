@@ -1,39 +1,184 @@
-from typing import Any, Dict
+from typing import Any, AsyncIterator, Dict, Optional
 
 from SmartScoop.agent import ShoppingAssistantAgent
+from SmartScoop.conversation_memory import SessionMemoryManager, llm_summarizer
 from SmartScoop.database import DatabaseManager
+from SmartScoop.embedding_store import EmbeddingStore
+from SmartScoop.metrics import metrics
+from SmartScoop.price_alerts import PriceAlertEngine
+from SmartScoop.price_history import PriceHistoryStore
 from SmartScoop.product_search import AmazonProductSearch
 from SmartScoop.recommendation import RecommendationEngine
+from SmartScoop.search_cache import CachedProductSearch
 from SmartScoop.seasonal_discount import SeasonalOptimizer
+from SmartScoop.vector_index import create_index
 from SmartScoop.user_profile import UserProfileManager
-from langchain_groq import ChatGroq
+from langchain_core.language_models import BaseLanguageModel
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
 
 class ShoppingAssistantApp:
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        llm: Optional[BaseLanguageModel] = None,
+        embedding_model: Optional[Any] = None,
+    ):
+        """Build every component from ``config``.
+
+        ``llm`` and ``embedding_model`` replace ChatGroq and the default
+        SentenceTransformer, e.g. with offline stand-ins for benchmarks.
+        Nothing here loads a model; see ``warm_up``.
+        """
+        self.started = False
+        self.warm_up_error: Optional[str] = None
         self.db_manager = DatabaseManager(
             config.get("db_name", "shopping_assistant.db")
         )
-        self.user_profile_manager = UserProfileManager(self.db_manager)
-        self.seasonal_optimizer = SeasonalOptimizer()
-        self.product_searches = [AmazonProductSearch(config["AMAZON_API_KEY"])]
-        self.recommendation_engine = RecommendationEngine(self.user_profile_manager)
-
-        self.llm = ChatGroq(
-            api_key=config["GROQ_API_KEY"],
-            model_name="mixtral-8x7b-32768",
-            temperature=0.6,
-            max_tokens=1024,
+        self.user_profile_manager = UserProfileManager(
+            self.db_manager,
+            write_behind=config.get("profile_write_behind", True),
+            flush_interval=config.get("profile_flush_interval", 0.5),
+            cache_size=config.get("profile_cache_size", 10000),
+            cache_ttl=config.get("profile_cache_ttl", 300),
+            revalidate_interval=config.get("profile_revalidate_interval", 1.0),
+        )
+        self.price_history = PriceHistoryStore(
+            self.db_manager,
+            raw_retention_days=config.get("price_history_retention_days", 90),
+        )
+        self.seasonal_optimizer = SeasonalOptimizer(
+            self.db_manager, price_history=self.price_history
+        )
+        amazon_options = (
+            {"base_url": config["amazon_base_url"]}
+            if config.get("amazon_base_url")
+            else {}
         )
+        if config.get("amazon_requests_per_second"):
+            amazon_options["requests_per_second"] = config["amazon_requests_per_second"]
+        search_cache_db = (
+            self.db_manager if config.get("search_cache_persistent", True) else None
+        )
+        self.product_searches = [
+            CachedProductSearch(
+                AmazonProductSearch(config["AMAZON_API_KEY"], **amazon_options),
+                db_manager=search_cache_db,
+                maxsize=config.get("search_cache_memory_size", 2048),
+                fresh_ttl=config.get("search_cache_ttl", 300),
+            )
+        ]
+        self.price_alerts = PriceAlertEngine(
+            self.db_manager,
+            self.product_searches[0],
+            price_history=self.price_history,
+            refresh_interval=config.get("price_alert_interval", 900),
+            refresh_budget=config.get("price_alert_budget", 500),
+            refresh_lookups=config.get("price_alert_lookups", True),
+        )
+        embedding_store = (
+            EmbeddingStore(config["embedding_store_dir"])
+            if config.get("embedding_store_dir")
+            else None
+        )
+        self.recommendation_engine = RecommendationEngine(
+            self.user_profile_manager,
+            model=embedding_model,
+            embedding_store=embedding_store,
+            index=create_index(config.get("vector_index", "exact")),
+        )
+
+        if llm is None:
+            from langchain_groq import ChatGroq
+
+            llm = ChatGroq(
+                api_key=config["GROQ_API_KEY"],
+                model_name="mixtral-8x7b-32768",
+                temperature=0.6,
+                max_tokens=1024,
+            )
+        self.llm = llm
         # print(self.llm)
+        summarizer = (
+            llm_summarizer(self.llm) if config.get("chat_summarize", True) else None
+        )
+        self.memory = SessionMemoryManager(
+            token_budget=config.get("chat_memory_tokens", 2000),
+            idle_ttl=config.get("chat_session_ttl", 3600),
+            summarizer=summarizer,
+            db_manager=self.db_manager if config.get("chat_persist", True) else None,
+            revalidate_interval=config.get("chat_revalidate_interval", 1.0),
+        )
         self.agent = ShoppingAssistantAgent(
             llm=self.llm,
             product_searches=self.product_searches,
             user_profile_manager=self.user_profile_manager,
             recommendation_engine=self.recommendation_engine,
             seasonal_optimizer=self.seasonal_optimizer,
+            memory=self.memory,
+            price_history=self.price_history,
+            price_alerts=self.price_alerts,
         )
 
+    async def startup(self):
+        self.user_profile_manager.start()
+        await self.price_history.compact()
+        for search in self.product_searches:
+            await search.start()
+        await self.price_alerts.start()
+        self.started = True
+
+    async def warm_up(self):
+        """Load the embedding model in the background once serving has begun.
+
+        Requests that need recommendations before it finishes wait for the
+        same load; every other request is served right away.
+        """
+        try:
+            with metrics.span("warm_up"):
+                await self.recommendation_engine.warm_up()
+            self.warm_up_error = None
+        except Exception as e:
+            self.warm_up_error = repr(e)
+            logger.error(f"Model warm-up failed: {e}")
+
+    def health(self) -> Dict[str, Any]:
+        model = self.recommendation_engine.model
+        return {
+            "started": self.started,
+            "model_ready": self.recommendation_engine.model_ready,
+            "model": model.status() if hasattr(model, "status") else None,
+            "warm_up_error": self.warm_up_error,
+        }
+
+    async def shutdown(self):
+        self.started = False
+        await self.price_alerts.close()
+        for search in self.product_searches:
+            await search.close()
+        await self.recommendation_engine.encoder.close()
+        await self.user_profile_manager.close()
+        self.db_manager.close()
+
     async def handle_message(self, user_id: str, message: str) -> str:
-        return await self.agent.process_message(user_id, message)
+        with metrics.trace("request") as spans:
+            response = await self.agent.process_message(user_id, message)
+        logger.debug(f"Request breakdown: {_breakdown(spans)}")
+        return response
+
+    async def stream_message(self, user_id: str, message: str) -> AsyncIterator[Dict]:
+        with metrics.trace("request_stream") as spans:
+            async for event in self.agent.stream_message(user_id, message):
+                yield event
+        logger.debug(f"Request breakdown: {_breakdown(spans)}")
+
+
+def _breakdown(spans) -> Dict[str, float]:
+    """Total milliseconds per stage among one request's spans."""
+    totals: Dict[str, float] = {}
+    for stage, seconds in spans:
+        totals[stage] = totals.get(stage, 0.0) + seconds * 1000
+    return totals
@@ -0,0 +1,254 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    HumanMessage,
+    SystemMessage,
+    get_buffer_string,
+    messages_from_dict,
+    messages_to_dict,
+)
+
+from SmartScoop.database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+Summarizer = Callable[[str, List[BaseMessage]], Awaitable[str]]
+
+
+def approximate_tokens(text: str) -> int:
+    # ~4 characters per token for English text, plus per-message overhead.
+    return len(text) // 4 + 4
+
+
+def llm_summarizer(llm) -> Summarizer:
+    """Summarizer that asks ``llm`` to fold older turns into a running summary."""
+
+    async def summarize(summary: str, messages: List[BaseMessage]) -> str:
+        prompt = (
+            "Progressively summarize the shopping conversation, keeping user "
+            "preferences, budgets and products mentioned.\n\n"
+            f"Current summary:\n{summary or '(none)'}\n\n"
+            f"New lines:\n{get_buffer_string(messages)}\n\nNew summary:"
+        )
+        result = await llm.ainvoke(prompt)
+        return getattr(result, "content", result).strip()
+
+    return summarize
+
+
+class ChatSession:
+    def __init__(
+        self, user_id: str, messages=None, summary: str = "", version: int = 0
+    ):
+        self.user_id = user_id
+        self.messages: List[BaseMessage] = messages or []
+        self.summary = summary
+        # chat_sessions.version this copy matches, and when that was checked.
+        self.version = version
+        self.last_active = self.checked_at = time.monotonic()
+        self.lock = asyncio.Lock()
+
+
+class SessionMemoryManager:
+    """Per-user conversation memory with a token-budgeted sliding window.
+
+    Turns that fall out of the window are folded into a summary when a
+    summarizer is configured, and dropped otherwise. Sessions idle for
+    ``idle_ttl`` seconds, or beyond ``max_sessions``, are evicted LRU-first;
+    with a ``db_manager`` they are persisted and reloaded on the next message.
+    Sessions not checked for ``revalidate_interval`` seconds are compared
+    with the stored version, so turns handled by another worker show up.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = 2000,
+        max_sessions: int = 10000,
+        idle_ttl: float = 3600,
+        summarizer: Optional[Summarizer] = None,
+        db_manager: Optional[DatabaseManager] = None,
+        token_counter: Callable[[str], int] = approximate_tokens,
+        revalidate_interval: float = 1.0,
+    ):
+        self.token_budget = token_budget
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.summarizer = summarizer
+        self.db_manager = db_manager
+        self.token_counter = token_counter
+        self.revalidate_interval = revalidate_interval
+        self.evictions = 0
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+
+    async def get_history(self, user_id: str) -> List[BaseMessage]:
+        session = await self._get_session(user_id)
+        history = list(session.messages)
+        if session.summary:
+            summary = f"Summary of earlier conversation: {session.summary}"
+            history.insert(0, SystemMessage(content=summary))
+        return history
+
+    async def add_turn(self, user_id: str, user_input: str, output: str):
+        session = await self._get_session(user_id)
+        async with session.lock:
+            session.messages.extend(
+                [HumanMessage(content=user_input), AIMessage(content=output)]
+            )
+            await self._trim(session)
+            if self.db_manager is not None:
+                await self._store(session)
+
+    def metrics(self, user_id: str) -> Dict:
+        session = self._sessions.get(user_id)
+        if session is None:
+            return {}
+        content_bytes = sum(len(m.content) for m in session.messages)
+        return {
+            "messages": len(session.messages),
+            "prompt_tokens": self._session_tokens(session),
+            "summary_tokens": (
+                self.token_counter(session.summary) if session.summary else 0
+            ),
+            "bytes": content_bytes + len(session.summary),
+            "idle_s": time.monotonic() - session.last_active,
+        }
+
+    def stats(self) -> Dict:
+        return {
+            "sessions": len(self._sessions),
+            "evictions": self.evictions,
+            "prompt_tokens": sum(
+                self._session_tokens(session) for session in self._sessions.values()
+            ),
+        }
+
+    async def _get_session(self, user_id: str) -> ChatSession:
+        self._evict_idle()
+        session = self._sessions.get(user_id)
+        if (
+            session is not None
+            and self.db_manager is not None
+            and time.monotonic() - session.checked_at >= self.revalidate_interval
+        ):
+            session = await self._revalidate(session)
+        if session is None:
+            if self.db_manager is not None:
+                session = await self._load(user_id)
+            session = session or ChatSession(user_id)
+            # Another request for the same user may have loaded it meanwhile.
+            session = self._sessions.setdefault(user_id, session)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+        self._sessions.move_to_end(user_id)
+        session.last_active = time.monotonic()
+        return session
+
+    def _evict_idle(self):
+        cutoff = time.monotonic() - self.idle_ttl
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if oldest.last_active >= cutoff:
+                break
+            self._sessions.popitem(last=False)
+            self.evictions += 1
+
+    def _session_tokens(self, session: ChatSession) -> int:
+        tokens = sum(self.token_counter(m.content) for m in session.messages)
+        if session.summary:
+            tokens += self.token_counter(session.summary)
+        return tokens
+
+    async def _trim(self, session: ChatSession):
+        overflow = []
+        # Always keep the latest turn, even if it alone exceeds the budget.
+        while (
+            len(session.messages) > 2
+            and self._session_tokens(session) > self.token_budget
+        ):
+            overflow.extend(session.messages[:2])
+            del session.messages[:2]
+        if overflow and self.summarizer is not None:
+            try:
+                session.summary = await self.summarizer(session.summary, overflow)
+            except Exception as e:
+                logger.error(f"Summarizing history for {session.user_id} failed: {e}")
+
+    async def _revalidate(self, session: ChatSession) -> Optional[ChatSession]:
+        """``session`` if still current, else None after dropping it."""
+        try:
+            row = await self.db_manager.read(self._select_version, session.user_id)
+        except sqlite3.DatabaseError as e:
+            logger.error(f"Error checking chat session for {session.user_id}: {e}")
+            return session
+        if (row[0] if row else 0) == session.version:
+            session.checked_at = time.monotonic()
+            return session
+        if self._sessions.get(session.user_id) is session:
+            del self._sessions[session.user_id]
+        return None
+
+    async def _load(self, user_id: str) -> Optional[ChatSession]:
+        try:
+            row = await self.db_manager.read(self._select_session, user_id)
+        except sqlite3.DatabaseError as e:
+            logger.error(f"Error loading chat session for {user_id}: {e}")
+            return None
+        if row is None:
+            return None
+        messages = messages_from_dict(json.loads(row[1]))
+        return ChatSession(user_id, messages, row[0] or "", row[2] or 0)
+
+    async def _store(self, session: ChatSession):
+        try:
+            session.version = await self.db_manager.write(
+                self._upsert_session,
+                session.user_id,
+                session.summary,
+                json.dumps(messages_to_dict(session.messages)),
+            )
+            session.checked_at = time.monotonic()
+        except sqlite3.DatabaseError as e:
+            logger.error(f"Error saving chat session for {session.user_id}: {e}")
+
+    @staticmethod
+    def _select_session(conn: sqlite3.Connection, user_id: str):
+        return conn.execute(
+            "SELECT summary, messages, version FROM chat_sessions WHERE user_id = ?",
+            (user_id,),
+        ).fetchone()
+
+    @staticmethod
+    def _select_version(conn: sqlite3.Connection, user_id: str):
+        return conn.execute(
+            "SELECT version FROM chat_sessions WHERE user_id = ?", (user_id,)
+        ).fetchone()
+
+    @staticmethod
+    def _upsert_session(
+        conn: sqlite3.Connection, user_id: str, summary: str, messages: str
+    ) -> int:
+        """Upsert one session, bumping its version; returns the new version."""
+        conn.execute(
+            """
+            INSERT INTO chat_sessions (user_id, summary, messages, updated_at, version)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP, 1)
+            ON CONFLICT(user_id) DO UPDATE SET
+                summary = excluded.summary,
+                messages = excluded.messages,
+                updated_at = excluded.updated_at,
+                version = COALESCE(chat_sessions.version, 0) + 1
+            """,
+            (user_id, summary, messages),
+        )
+        return conn.execute(
+            "SELECT version FROM chat_sessions WHERE user_id = ?", (user_id,)
+        ).fetchone()[0]
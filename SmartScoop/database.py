@@ -1,15 +1,111 @@
+import asyncio
+import queue
 import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+from SmartScoop.metrics import metrics
+
+# Applied to every pooled connection. WAL lets readers run alongside the single
+# writer; synchronous=NORMAL is durable across application crashes in WAL mode.
+CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -20000",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA busy_timeout = 5000",
+)
+
+
+def _stage_name(fn: Callable[..., Any]) -> str:
+    return getattr(fn, "__name__", "call").lstrip("_")
 
 
 class DatabaseManager:
-    def __init__(self, db_name: str = "shopping_assistant.db"):
+    def __init__(self, db_name: str = "shopping_assistant.db", pool_size: int = 4):
         """Initialize the DatabaseManager with the specified database name."""
         self.db_name = db_name
+        self.pool_size = pool_size
+        # One connection per reader thread plus one for the writer.
+        self._pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(
+            pool_size + 1
+        )
+        self._readers: Optional[ThreadPoolExecutor] = None
+        self._writer: Optional[ThreadPoolExecutor] = None
         self.setup_database()
 
+    def _open_connection(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_name, check_same_thread=False, timeout=30)
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a pooled connection; it is returned to the pool afterwards."""
+        with metrics.span("db.connection"), self._borrow() as conn:
+            yield conn
+
+    @contextmanager
+    def _borrow(self) -> Iterator[sqlite3.Connection]:
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self._open_connection()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            try:
+                self._pool.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    async def read(self, fn: Callable[..., Any], *args) -> Any:
+        """Run ``fn(conn, *args)`` on a reader thread."""
+        if self._readers is None:
+            self._readers = ThreadPoolExecutor(self.pool_size, "db-read")
+        with metrics.span(f"db.read.{_stage_name(fn)}"):
+            return await asyncio.get_running_loop().run_in_executor(
+                self._readers, self._run_read, fn, args
+            )
+
+    async def write(self, fn: Callable[..., Any], *args) -> Any:
+        """Run ``fn(conn, *args)`` and commit on the single writer thread."""
+        if self._writer is None:
+            self._writer = ThreadPoolExecutor(1, "db-write")
+        with metrics.span(f"db.write.{_stage_name(fn)}"):
+            return await asyncio.get_running_loop().run_in_executor(
+                self._writer, self._run_write, fn, args
+            )
+
+    def _run_read(self, fn: Callable[..., Any], args: tuple) -> Any:
+        with self._borrow() as conn:
+            return fn(conn, *args)
+
+    def _run_write(self, fn: Callable[..., Any], args: tuple) -> Any:
+        with self._borrow() as conn:
+            result = fn(conn, *args)
+            conn.commit()
+            return result
+
+    def close(self):
+        for executor in (self._readers, self._writer):
+            if executor is not None:
+                executor.shutdown(wait=True)
+        self._readers = self._writer = None
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
     def setup_database(self):
         """Create necessary tables if they do not already exist."""
-        with sqlite3.connect(self.db_name) as conn:
+        with self.connection() as conn:
+            conn.execute("PRAGMA journal_mode = WAL")
             cursor = conn.cursor()
 
             # Create users table
@@ -20,24 +116,38 @@ class DatabaseManager:
                     preferences TEXT,
                     style_profile TEXT,
                     budget_limits TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    version INTEGER DEFAULT 0
                 )
                 """
             )
+            # Databases created before profile versioning lack the column
+            columns = [row[1] for row in cursor.execute("PRAGMA table_info(users)")]
+            if "version" not in columns:
+                cursor.execute("ALTER TABLE users ADD COLUMN version INTEGER DEFAULT 0")
 
-            # # Create price alerts table
-            # cursor.execute(
-            #     """
-            #     CREATE TABLE IF NOT EXISTS price_alerts (
-            #         alert_id TEXT PRIMARY KEY,
-            #         user_id TEXT,
-            #         product_id TEXT,
-            #         target_price REAL,
-            #         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            #         FOREIGN KEY (user_id) REFERENCES users (user_id)
-            #     )
-            #     """
-            # )
+            # Create price alerts table; armed alerts are the ones not yet
+            # triggered
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS price_alerts (
+                    alert_id TEXT PRIMARY KEY,
+                    user_id TEXT,
+                    product_id TEXT,
+                    target_price REAL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    triggered_at REAL,
+                    triggered_price REAL,
+                    FOREIGN KEY (user_id) REFERENCES users (user_id)
+                )
+                """
+            )
+            cursor.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_price_alerts_user
+                ON price_alerts (user_id)
+                """
+            )
 
             # Create seasonal discounts table
             cursor.execute(
@@ -51,4 +161,65 @@ class DatabaseManager:
                 """
             )
 
+            # Create price history tables: raw points clustered by product and
+            # time, plus a daily low/high/close rollup kept after raw points
+            # are compacted away
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS price_history (
+                    asin TEXT NOT NULL,
+                    ts INTEGER NOT NULL,
+                    price_cents INTEGER NOT NULL,
+                    original_cents INTEGER,
+                    PRIMARY KEY (asin, ts)
+                ) WITHOUT ROWID
+                """
+            )
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS price_history_daily (
+                    asin TEXT NOT NULL,
+                    day INTEGER NOT NULL,
+                    low_cents INTEGER NOT NULL,
+                    high_cents INTEGER NOT NULL,
+                    close_cents INTEGER NOT NULL,
+                    close_ts INTEGER NOT NULL,
+                    samples INTEGER NOT NULL,
+                    PRIMARY KEY (asin, day)
+                ) WITHOUT ROWID
+                """
+            )
+
+            # Create search cache table (persistent tier of CachedProductSearch)
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS search_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    results TEXT,
+                    created_at REAL
+                )
+                """
+            )
+
+            # Create chat sessions table (persisted per-user conversation memory)
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS chat_sessions (
+                    user_id TEXT PRIMARY KEY,
+                    summary TEXT,
+                    messages TEXT,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    version INTEGER DEFAULT 0
+                )
+                """
+            )
+            # Databases created before session versioning lack the column
+            columns = [
+                row[1] for row in cursor.execute("PRAGMA table_info(chat_sessions)")
+            ]
+            if "version" not in columns:
+                cursor.execute(
+                    "ALTER TABLE chat_sessions ADD COLUMN version INTEGER DEFAULT 0"
+                )
+
             conn.commit()
@@ -0,0 +1,187 @@
+import hashlib
+import json
+import logging
+import os
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking, single worker only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "index.json"
+LOCK_FILE = ".lock"
+
+
+class EmbeddingStore:
+    """On-disk product embeddings keyed by product id and description hash.
+
+    The matrix is written as a plain ``.npy`` file and opened with
+    ``mmap_mode="r"`` so every process reading the same directory shares the
+    page cache instead of holding its own copy. ``index.json`` names the
+    current matrix file and is replaced atomically, so readers always see a
+    consistent (ids, matrix) pair.
+
+    Several processes may share a directory: changes are made under an
+    exclusive ``flock`` on the directory's lock file, starting from a fresh
+    ``load``, so no process overwrites rows written by another. ``refresh``
+    picks up changes made elsewhere.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.ids: List = []
+        self.hashes: List[str] = []
+        self.matrix = np.empty((0, 0), dtype=np.float32)
+        self._matrix_file = None
+        # Identifies the index.json last loaded, and the one the last write
+        # replaced, so callers can tell their own changes from other processes'.
+        self.signature: Optional[Tuple[int, int, int]] = None
+        self.last_write_base: Optional[Tuple[int, int, int]] = None
+        self.load()
+
+    def contents(self) -> Tuple[np.ndarray, np.ndarray]:
+        return np.array(self.ids, dtype=object), self.matrix
+
+    def load(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(Re)open the latest matrix and return (ids, embeddings)."""
+        # Locked so a writer cannot delete the matrix file mid-load.
+        with self._locked():
+            return self._load()
+
+    def _load(self) -> Tuple[np.ndarray, np.ndarray]:
+        index_path = os.path.join(self.directory, INDEX_FILE)
+        signature = self._stat_index()
+        if signature is not None:
+            with open(index_path, encoding="utf-8") as f:
+                index = json.load(f)
+            self.ids = index["ids"]
+            self.hashes = index["hashes"]
+            self._matrix_file = index["matrix_file"]
+            self.matrix = np.load(
+                os.path.join(self.directory, self._matrix_file), mmap_mode="r"
+            )
+        self.signature = signature
+        return self.contents()
+
+    def refresh(self) -> bool:
+        """Reload if another process has replaced index.json; True if it had."""
+        if self._stat_index() == self.signature:
+            return False
+        self.load()
+        return True
+
+    def upsert(
+        self, products: List[Dict], encode: Callable[[List[str]], np.ndarray]
+    ) -> Tuple[List, np.ndarray]:
+        """Encode only new or changed products and persist the result.
+
+        Returns the ids and embeddings of the products that were (re)encoded.
+        """
+        with self._locked():
+            self._load()
+            return self._upsert(products, encode)
+
+    def _upsert(
+        self, products: List[Dict], encode: Callable[[List[str]], np.ndarray]
+    ) -> Tuple[List, np.ndarray]:
+        positions = {product_id: row for row, product_id in enumerate(self.ids)}
+        pending = {}
+        for product in products:
+            description = product.get("description", "")
+            digest = description_hash(description)
+            row = positions.get(product["id"])
+            if row is not None and self.hashes[row] == digest:
+                continue
+            pending[product["id"]] = (description, digest)
+        if not pending:
+            return [], np.empty((0, self.matrix.shape[1]), dtype=np.float32)
+
+        changed_ids = list(pending)
+        embeddings = encode([pending[product_id][0] for product_id in changed_ids])
+
+        ids, hashes = list(self.ids), list(self.hashes)
+        matrix = np.array(self.matrix, dtype=np.float32) if len(ids) else None
+        appended = []
+        for product_id, embedding in zip(changed_ids, embeddings):
+            row = positions.get(product_id)
+            if row is None:
+                ids.append(product_id)
+                hashes.append(pending[product_id][1])
+                appended.append(embedding)
+            else:
+                hashes[row] = pending[product_id][1]
+                matrix[row] = embedding
+        if appended:
+            appended = np.asarray(appended, dtype=np.float32)
+            matrix = appended if matrix is None else np.vstack([matrix, appended])
+
+        self._write(ids, hashes, matrix)
+        logger.info(f"Encoded {len(changed_ids)} new or changed product embeddings")
+        return changed_ids, embeddings
+
+    def remove(self, product_ids: List):
+        with self._locked():
+            self._load()
+            self._remove(product_ids)
+
+    def _remove(self, product_ids: List):
+        drop = set(product_ids)
+        keep = [row for row, product_id in enumerate(self.ids) if product_id not in drop]
+        if len(keep) == len(self.ids):
+            return
+        self._write(
+            [self.ids[row] for row in keep],
+            [self.hashes[row] for row in keep],
+            np.array(self.matrix[keep], dtype=np.float32),
+        )
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.directory, LOCK_FILE), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _stat_index(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = os.stat(os.path.join(self.directory, INDEX_FILE))
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _write(self, ids: List, hashes: List[str], matrix: np.ndarray):
+        self.last_write_base = self.signature
+        matrix_file = f"embeddings-{uuid.uuid4().hex}.npy"
+        np.save(os.path.join(self.directory, matrix_file), matrix)
+
+        index_path = os.path.join(self.directory, INDEX_FILE)
+        tmp_path = f"{index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"ids": ids, "hashes": hashes, "matrix_file": matrix_file}, f)
+        os.replace(tmp_path, index_path)
+
+        # Processes that still map the old file keep their pages until they reload.
+        old_file = self._matrix_file
+        self._load()
+        if old_file and old_file != matrix_file:
+            try:
+                os.remove(os.path.join(self.directory, old_file))
+            except OSError:
+                pass
+
+
+def description_hash(description: str) -> str:
+    return hashlib.sha1(description.encode("utf-8")).hexdigest()
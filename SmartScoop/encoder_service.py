@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from SmartScoop.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "paraphrase-MiniLM-L6-v2"
+
+
+class LazyModel:
+    """SentenceTransformer that is imported and loaded on first use.
+
+    Importing sentence_transformers pulls in torch, and loading the weights
+    takes about as long again, so neither happens until something encodes or
+    ``load`` is called (e.g. by a background warm-up). Concurrent first calls
+    wait for the one load instead of each loading the model.
+    """
+
+    def __init__(self, model_name: str = DEFAULT_MODEL):
+        self.model_name = model_name
+        self.load_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def load(self):
+        if self._model is not None:
+            return self._model
+        with self._lock:
+            if self._model is None:
+                start = time.perf_counter()
+                try:
+                    from sentence_transformers import SentenceTransformer
+
+                    model = SentenceTransformer(self.model_name)
+                except Exception as e:
+                    self.error = repr(e)
+                    raise
+                self.load_seconds = time.perf_counter() - start
+                metrics.observe("model.load", self.load_seconds)
+                logger.info(
+                    f"Loaded {self.model_name} in {self.load_seconds:.2f}s"
+                )
+                self.error = None
+                self._model = model
+        return self._model
+
+    def encode(self, texts: List[str], **kwargs) -> np.ndarray:
+        return self.load().encode(texts, **kwargs)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "model": self.model_name,
+            "loaded": self.loaded,
+            "load_seconds": self.load_seconds,
+            "error": self.error,
+        }
+
+
+class BatchEncoder:
+    """Micro-batches concurrent ``encode`` calls onto a worker thread pool.
+
+    Requests that arrive within ``max_wait`` seconds of each other (up to
+    ``max_batch_size`` texts) are merged into a single ``model.encode`` call,
+    which runs on the pool so the event loop keeps serving other users.
+    SentenceTransformer releases the GIL inside torch, so threads give real
+    parallelism here without pickling the model into another process.
+    """
+
+    def __init__(
+        self,
+        model,
+        max_batch_size: int = 64,
+        max_wait: float = 0.005,
+        max_workers: int = 1,
+    ):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_workers = max_workers
+        self.batches = 0
+        self.encoded_texts = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def encode_sync(self, texts: List[str]) -> np.ndarray:
+        with metrics.span("encode"):
+            embeddings = self.model.encode(
+                texts, convert_to_numpy=True, normalize_embeddings=True
+            )
+        return np.ascontiguousarray(embeddings, dtype=np.float32)
+
+    async def encode(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        self._ensure_started()
+        future = self._loop.create_future()
+        await self._queue.put((texts, future))
+        return await future
+
+    async def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self._loop = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "encoded_texts": self.encoded_texts,
+            "mean_batch_size": (
+                self.encoded_texts / self.batches if self.batches else 0.0
+            ),
+        }
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._worker is not None:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.max_workers)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="encoder"
+            )
+        self._worker = loop.create_task(self._collect())
+
+    async def _collect(self):
+        while True:
+            batch = [await self._queue.get()]
+            size = len(batch[0][0])
+            deadline = self._loop.time() + self.max_wait
+            while size < self.max_batch_size:
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+                size += len(item[0])
+            # Keep collecting the next batch while this one is being encoded.
+            await self._slots.acquire()
+            self._loop.create_task(self._dispatch(batch))
+
+    async def _dispatch(self, batch: List[Tuple[List[str], asyncio.Future]]):
+        try:
+            texts = [text for item_texts, _ in batch for text in item_texts]
+            try:
+                embeddings = await self._loop.run_in_executor(
+                    self._executor, self.encode_sync, texts
+                )
+            except Exception as e:
+                logger.error(f"Batch encode of {len(texts)} texts failed: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            self.batches += 1
+            self.encoded_texts += len(texts)
+            offset = 0
+            for item_texts, future in batch:
+                if not future.done():
+                    future.set_result(embeddings[offset : offset + len(item_texts)])
+                offset += len(item_texts)
+        finally:
+            self._slots.release()
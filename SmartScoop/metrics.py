@@ -0,0 +1,223 @@
+import bisect
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Upper bounds in seconds, growing by sqrt(2) from 0.5ms to about a minute.
+BUCKETS: Tuple[float, ...] = tuple(0.0005 * 2 ** (i / 2) for i in range(35))
+
+# Spans recorded while handling the current request, as (stage, seconds).
+current_trace: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar(
+    "current_trace", default=None
+)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; observing is a bisect and an increment."""
+
+    def __init__(self, buckets: Tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        i = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.sum += seconds
+
+    def quantile(self, q: float) -> float:
+        """Estimate by linear interpolation inside the bucket holding ``q``."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else lower * 2
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+
+class MetricsRegistry:
+    """Per-stage latency histograms and counters for the whole process.
+
+    Stages are dotted names such as ``llm``, ``tool.ProductSearch``,
+    ``search.amazon`` or ``db.write``. Spans opened while a request trace is
+    active are also appended to that request's breakdown.
+    """
+
+    def __init__(self, prefix: str = "smartscoop"):
+        self.prefix = prefix
+        self.stages: Dict[str, Histogram] = {}
+        self.counters: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float):
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self.stages.setdefault(stage, Histogram())
+        histogram.observe(seconds)
+        trace = current_trace.get()
+        if trace is not None:
+            trace.append((stage, seconds))
+
+    def increment(self, name: str, value: int = 1):
+        self.counters[name] += value
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        """Time the enclosed block (sync or async code) as one ``stage`` sample."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    @contextmanager
+    def trace(self, stage: str) -> Iterator[List[Tuple[str, float]]]:
+        """Record ``stage`` and collect every span opened inside it."""
+        spans: List[Tuple[str, float]] = []
+        token = current_trace.set(spans)
+        try:
+            with self.span(stage):
+                yield spans
+        finally:
+            current_trace.reset(token)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {
+            stage: {
+                "count": histogram.count,
+                "mean_ms": histogram.sum / histogram.count * 1000,
+                "p50_ms": histogram.quantile(0.5) * 1000,
+                "p95_ms": histogram.quantile(0.95) * 1000,
+                "p99_ms": histogram.quantile(0.99) * 1000,
+            }
+            for stage, histogram in sorted(self.stages.items())
+            if histogram.count
+        }
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition of every stage and counter."""
+        name = f"{self.prefix}_stage_duration_seconds"
+        quantile_name = f"{self.prefix}_stage_duration_quantile_seconds"
+        lines = [
+            f"# HELP {name} Time spent per pipeline stage.",
+            f"# TYPE {name} histogram",
+        ]
+        quantiles = [
+            f"# HELP {quantile_name} Estimated latency quantiles per stage.",
+            f"# TYPE {quantile_name} gauge",
+        ]
+        for stage, histogram in sorted(self.stages.items()):
+            label = f'stage="{stage}"'
+            cumulative = 0
+            for bound, bucket_count in zip(histogram.buckets, histogram.counts):
+                cumulative += bucket_count
+                lines.append(
+                    f'{name}_bucket{{{label},le="{bound:.6g}"}} {cumulative}'
+                )
+            lines.append(f'{name}_bucket{{{label},le="+Inf"}} {histogram.count}')
+            lines.append(f"{name}_sum{{{label}}} {histogram.sum:.6f}")
+            lines.append(f"{name}_count{{{label}}} {histogram.count}")
+            for q in (0.5, 0.95, 0.99):
+                quantiles.append(
+                    f'{quantile_name}{{{label},quantile="{q}"}} '
+                    f"{histogram.quantile(q):.6f}"
+                )
+        lines.extend(quantiles)
+        for counter, value in sorted(self.counters.items()):
+            lines.append(f"# TYPE {self.prefix}_{counter}_total counter")
+            lines.append(f"{self.prefix}_{counter}_total {value}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self.stages.clear()
+            self.counters.clear()
+
+
+metrics = MetricsRegistry()
+
+
+class SamplingProfiler:
+    """Statistical profiler that samples one thread's stack on an interval.
+
+    Samples are aggregated as collapsed stacks (``frame;frame;frame count``),
+    the input format of flamegraph tools. It runs on its own daemon thread,
+    so it can be started and stopped at runtime without restarting the app.
+    """
+
+    def __init__(self, interval: float = 0.005, max_depth: int = 64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples: Counter = Counter()
+        self._target: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(
+        self, thread_id: Optional[int] = None, interval: Optional[float] = None
+    ):
+        """Sample ``thread_id`` (default: the calling thread, i.e. the event loop)."""
+        if self.running:
+            return
+        if interval is not None:
+            self.interval = interval
+        self._target = thread_id or threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="sampling-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def collapsed(self, limit: int = 200) -> str:
+        return "\n".join(
+            f"{stack} {count}" for stack, count in self.samples.most_common(limit)
+        )
+
+    def reset(self):
+        self.samples.clear()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "interval": self.interval,
+            "samples": sum(self.samples.values()),
+        }
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+                frame = frame.f_back
+            self.samples[";".join(reversed(stack))] += 1
+
+
+profiler = SamplingProfiler()
@@ -0,0 +1,410 @@
+import asyncio
+import bisect
+import logging
+import sqlite3
+import time
+import uuid
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from SmartScoop.database import DatabaseManager
+from SmartScoop.price_history import PriceHistoryStore
+from SmartScoop.product import Product, parse_price, to_products
+from SmartScoop.product_search import ProductSearchInterface
+from SmartScoop.rate_limit import PRIORITY_BACKGROUND, request_priority
+
+logger = logging.getLogger(__name__)
+
+
+class AlertIndex:
+    """Active alerts per ASIN, sorted by target price.
+
+    A new price ``p`` fires every alert whose target is at or above ``p``;
+    with targets sorted ascending that is one bisect plus the tail of the
+    list, so matching never scans the alerts that stay armed.
+    """
+
+    def __init__(self):
+        # asin -> (ascending targets, alert ids in the same order)
+        self._targets: Dict[str, List[float]] = {}
+        self._alert_ids: Dict[str, List[str]] = {}
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, asin: str) -> bool:
+        return asin in self._targets
+
+    def asins(self) -> List[str]:
+        return list(self._targets)
+
+    def add(self, asin: str, target_price: float, alert_id: str):
+        targets = self._targets.setdefault(asin, [])
+        alert_ids = self._alert_ids.setdefault(asin, [])
+        i = bisect.bisect_right(targets, target_price)
+        targets.insert(i, target_price)
+        alert_ids.insert(i, alert_id)
+        self._size += 1
+
+    def load(self, rows: Iterable[Tuple[str, str, float]]):
+        """Bulk-load (asin, alert_id, target) rows sorted by asin and target."""
+        for asin, alert_id, target_price in rows:
+            targets = self._targets.get(asin)
+            if targets is None or (targets and target_price < targets[-1]):
+                self.add(asin, target_price, alert_id)
+                continue
+            targets.append(target_price)
+            self._alert_ids[asin].append(alert_id)
+            self._size += 1
+
+    def clear(self):
+        self._targets, self._alert_ids, self._size = {}, {}, 0
+
+    def remove(self, asin: str, alert_id: str) -> bool:
+        alert_ids = self._alert_ids.get(asin)
+        if not alert_ids or alert_id not in alert_ids:
+            return False
+        i = alert_ids.index(alert_id)
+        del alert_ids[i]
+        del self._targets[asin][i]
+        self._size -= 1
+        if not alert_ids:
+            del self._targets[asin], self._alert_ids[asin]
+        return True
+
+    def pop_matches(self, asin: str, price: float) -> List[Tuple[str, float]]:
+        """Remove and return (alert_id, target) of every alert ``price`` meets."""
+        targets = self._targets.get(asin)
+        if not targets:
+            return []
+        i = bisect.bisect_left(targets, price)
+        if i == len(targets):
+            return []
+        matched = list(zip(self._alert_ids[asin][i:], targets[i:]))
+        del targets[i:], self._alert_ids[asin][i:]
+        self._size -= len(matched)
+        if not targets:
+            del self._targets[asin], self._alert_ids[asin]
+        return matched
+
+
+class PriceAlertEngine:
+    """Background matcher for user price alerts.
+
+    Alerts live in the ``price_alerts`` table and, while armed, in an
+    ``AlertIndex``. Every ``refresh_interval`` seconds the worker looks up at
+    most ``refresh_budget`` ASINs (least recently refreshed first, at most
+    ``concurrency`` in flight) through ``get_product_details``: one lookup per
+    ASIN however many users watch it. Fired alerts are marked in one batched
+    write and passed to the registered listeners. Prices seen in ordinary
+    searches are matched through ``observe`` at no extra upstream cost.
+    """
+
+    def __init__(
+        self,
+        db_manager: DatabaseManager,
+        product_search: ProductSearchInterface,
+        price_history: Optional[PriceHistoryStore] = None,
+        refresh_interval: float = 900,
+        refresh_budget: int = 500,
+        concurrency: int = 10,
+        lookup_timeout: float = 15.0,
+        refresh_lookups: bool = True,
+    ):
+        self.db_manager = db_manager
+        self.product_search = product_search
+        self.price_history = price_history
+        self.refresh_interval = refresh_interval
+        self.refresh_budget = refresh_budget
+        self.concurrency = concurrency
+        self.lookup_timeout = lookup_timeout
+        # With several workers on one database only one should look prices
+        # up; the others still reload armed alerts and match search results.
+        self.refresh_lookups = refresh_lookups
+        self.index = AlertIndex()
+        # ASINs in refresh order; refreshed ones move to the back.
+        self._queue: deque = deque()
+        self._queued: set = set()
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._loaded = False
+        self.lookups = 0
+        self.triggered = 0
+
+    def add_listener(self, listener: Callable[[Dict[str, Any]], None]):
+        """Register a callback invoked with every triggered alert."""
+        self._listeners.append(listener)
+
+    async def start(self):
+        """Load armed alerts and start the periodic refresh on the running loop."""
+        await self.load()
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(
+                self._refresh_periodically()
+            )
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def load(self):
+        try:
+            # Built in the reader thread: with a million alerts this takes the
+            # better part of a second, and every worker reloads every cycle.
+            index = await self.db_manager.read(self._load_index)
+        except sqlite3.DatabaseError as e:
+            logger.error(f"Error loading price alerts: {e}")
+            return
+        # Keep the refresh rotation; ASINs armed since the last load (e.g. by
+        # another worker) go first.
+        kept = [asin for asin in self._queue if asin in index]
+        kept_set = set(kept)
+        fresh = [asin for asin in index.asins() if asin not in kept_set]
+        stale, self.index = self.index, index
+        self._queue = deque(fresh + kept)
+        self._queued = set(self._queue)
+        self._loaded = True
+        # Freeing a large index takes a while too, so do it off the loop.
+        await asyncio.get_running_loop().run_in_executor(None, stale.clear)
+
+    async def add_alert(self, user_id: str, product_id: str, target_price: Any) -> str:
+        """Arm an alert for ``product_id`` at or below ``target_price``."""
+        target = parse_price(target_price)
+        if not product_id or target is None or target <= 0:
+            raise ValueError(f"Invalid price alert: {product_id!r} at {target_price!r}")
+        alert_id = uuid.uuid4().hex
+        await self.db_manager.write(
+            self._insert_alert, alert_id, user_id, product_id, target
+        )
+        self.index.add(product_id, target, alert_id)
+        if product_id not in self._queued:
+            # New ASINs are checked on the next cycle.
+            self._queue.appendleft(product_id)
+            self._queued.add(product_id)
+        return alert_id
+
+    async def remove_alert(self, user_id: str, alert_id: str) -> bool:
+        product_id = await self.db_manager.write(self._delete_alert, user_id, alert_id)
+        if product_id is None:
+            return False
+        self.index.remove(product_id, alert_id)
+        return True
+
+    async def user_alerts(self, user_id: str) -> List[Dict[str, Any]]:
+        try:
+            return await self.db_manager.read(self._select_user_alerts, user_id)
+        except sqlite3.DatabaseError as e:
+            logger.error(f"Error reading price alerts for {user_id}: {e}")
+            return []
+
+    async def refresh(self) -> List[Dict[str, Any]]:
+        """Look up the next ``refresh_budget`` ASINs and fire matching alerts."""
+        if not self._loaded:
+            await self.load()
+        batch = []
+        while self._queue and len(batch) < self.refresh_budget:
+            asin = self._queue.popleft()
+            self._queued.discard(asin)
+            if asin in self.index:
+                batch.append(asin)
+        if not batch:
+            return []
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def lookup(asin: str) -> Optional[Product]:
+            async with semaphore:
+                return await self._lookup(asin)
+
+        products = await asyncio.gather(*(lookup(asin) for asin in batch))
+        for asin in batch:
+            if asin in self.index and asin not in self._queued:
+                self._queue.append(asin)
+                self._queued.add(asin)
+        found = [product for product in products if product is not None]
+        if self.price_history is not None and found:
+            await self.price_history.record(found)
+        return await self.observe(found)
+
+    async def observe(self, products: Iterable[Dict]) -> List[Dict[str, Any]]:
+        """Fire alerts met by the current price of any of ``products``."""
+        fired = []
+        for product in products:
+            asin = product.get("asin")
+            price = parse_price(product.get("price"))
+            if not asin or price is None:
+                continue
+            for alert_id, target in self.index.pop_matches(asin, price):
+                fired.append(
+                    {
+                        "alert_id": alert_id,
+                        "product_id": asin,
+                        "target_price": target,
+                        "price": price,
+                        "title": product.get("title"),
+                        "url": product.get("url"),
+                    }
+                )
+        if not fired:
+            return []
+        try:
+            users = await self.db_manager.write(
+                self._mark_triggered, fired, time.time()
+            )
+        except sqlite3.DatabaseError as e:
+            logger.error(f"Error recording triggered price alerts: {e}")
+            for alert in fired:
+                self.index.add(
+                    alert["product_id"], alert["target_price"], alert["alert_id"]
+                )
+            return []
+        fired = [alert for alert in fired if alert["alert_id"] in users]
+        self.triggered += len(fired)
+        for alert in fired:
+            alert["user_id"] = users[alert["alert_id"]]
+            for listener in self._listeners:
+                try:
+                    listener(alert)
+                except Exception as e:
+                    logger.error(f"Price alert listener failed: {e}")
+        return fired
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "armed": len(self.index),
+            "asins": len(self.index.asins()),
+            "lookups": self.lookups,
+            "triggered": self.triggered,
+        }
+
+    async def _lookup(self, asin: str) -> Optional[Product]:
+        self.lookups += 1
+        try:
+            details = await asyncio.wait_for(
+                self.product_search.get_product_details(asin), self.lookup_timeout
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"Price lookup for {asin} timed out")
+            return None
+        except Exception as e:
+            logger.error(f"Price lookup for {asin} failed: {e}")
+            return None
+        # AmazonProductSearch returns a list of products, other backends a
+        # single product.
+        if not isinstance(details, list):
+            details = [details] if details else []
+        # Only a product with the requested ASIN is trusted; any other price
+        # would be matched against (and recorded for) the wrong product.
+        return next((p for p in to_products(details) if p.asin == asin), None)
+
+    async def _refresh_periodically(self):
+        # Lookups yield rate-limit tokens to interactive searches.
+        request_priority.set(PRIORITY_BACKGROUND)
+        first = True
+        while True:
+            start = time.monotonic()
+            try:
+                # SQLite is the source of truth, so alerts armed, removed or
+                # triggered by other processes are picked up every cycle
+                # (start() has just loaded them for the first one).
+                if not first:
+                    await self.load()
+                if self.refresh_lookups:
+                    await self.refresh()
+            except Exception as e:
+                logger.error(f"Error in the price alert refresh loop: {e}")
+            first = False
+            await asyncio.sleep(
+                max(0.0, self.refresh_interval - (time.monotonic() - start))
+            )
+
+    @staticmethod
+    def _load_index(conn: sqlite3.Connection) -> AlertIndex:
+        index = AlertIndex()
+        index.load(
+            conn.execute(
+                """
+                SELECT product_id, alert_id, target_price FROM price_alerts
+                WHERE triggered_at IS NULL
+                ORDER BY product_id, target_price
+                """
+            )
+        )
+        return index
+
+    @staticmethod
+    def _insert_alert(
+        conn: sqlite3.Connection,
+        alert_id: str,
+        user_id: str,
+        product_id: str,
+        target_price: float,
+    ):
+        conn.execute(
+            """
+            INSERT INTO price_alerts (alert_id, user_id, product_id, target_price)
+            VALUES (?, ?, ?, ?)
+            """,
+            (alert_id, user_id, product_id, target_price),
+        )
+
+    @staticmethod
+    def _delete_alert(
+        conn: sqlite3.Connection, user_id: str, alert_id: str
+    ) -> Optional[str]:
+        row = conn.execute(
+            "SELECT product_id FROM price_alerts WHERE alert_id = ? AND user_id = ?",
+            (alert_id, user_id),
+        ).fetchone()
+        if row is None:
+            return None
+        conn.execute("DELETE FROM price_alerts WHERE alert_id = ?", (alert_id,))
+        return row[0]
+
+    @staticmethod
+    def _select_user_alerts(
+        conn: sqlite3.Connection, user_id: str
+    ) -> List[Dict[str, Any]]:
+        cursor = conn.execute(
+            """
+            SELECT alert_id, product_id, target_price, triggered_at, triggered_price
+            FROM price_alerts WHERE user_id = ? ORDER BY created_at
+            """,
+            (user_id,),
+        )
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor]
+
+    @staticmethod
+    def _mark_triggered(
+        conn: sqlite3.Connection, fired: List[Dict[str, Any]], ts: float
+    ) -> Dict[str, str]:
+        """Mark alerts triggered; returns alert_id -> user_id of those still armed."""
+        users = {}
+        alert_ids = [alert["alert_id"] for alert in fired]
+        # Chunked to stay under SQLite's bound-parameter limit.
+        for start in range(0, len(alert_ids), 500):
+            chunk = alert_ids[start : start + 500]
+            placeholders = ", ".join("?" for _ in chunk)
+            users.update(
+                conn.execute(
+                    f"""
+                    SELECT alert_id, user_id FROM price_alerts
+                    WHERE alert_id IN ({placeholders}) AND triggered_at IS NULL
+                    """,
+                    chunk,
+                )
+            )
+        conn.executemany(
+            """
+            UPDATE price_alerts SET triggered_at = ?, triggered_price = ?
+            WHERE alert_id = ? AND triggered_at IS NULL
+            """,
+            [(ts, alert["price"], alert["alert_id"]) for alert in fired],
+        )
+        return users
@@ -0,0 +1,216 @@
+import logging
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from SmartScoop.cache import TTLCache
+from SmartScoop.database import DatabaseManager
+from SmartScoop.product import parse_price
+
+logger = logging.getLogger(__name__)
+
+DAY = 86400
+
+
+class PriceHistoryStore:
+    """Append-only price observations per ASIN, with a daily rollup.
+
+    Raw points live in ``price_history`` (WITHOUT ROWID, clustered on
+    (asin, ts), prices in integer cents), so a range query for one product is
+    a single contiguous index scan. Every point is also folded into
+    ``price_history_daily`` (low/high/close per day); ``compact`` drops raw
+    points older than ``raw_retention_days`` and leaves the daily buckets.
+    Repeated sightings of an unchanged price within ``min_interval`` seconds
+    are not stored, since cached search results re-report the same price.
+    """
+
+    def __init__(
+        self,
+        db_manager: DatabaseManager,
+        min_interval: float = 3600,
+        raw_retention_days: int = 90,
+        stats_cache_ttl: float = 300,
+    ):
+        self.db_manager = db_manager
+        self.min_interval = min_interval
+        self.raw_retention_days = raw_retention_days
+        # asin -> (ts, cents) of the last stored point
+        self._last_seen = TTLCache(100000, min_interval)
+        self._stats_cache = TTLCache(10000, stats_cache_ttl)
+
+    async def record(self, products: Iterable[Dict], ts: Optional[float] = None):
+        """Store the current price of each product that has an ASIN and a price."""
+        ts = int(ts if ts is not None else time.time())
+        points = self._new_points(products, ts)
+        if not points:
+            return
+        try:
+            await self.db_manager.write(self._insert_points, points)
+        except sqlite3.DatabaseError as e:
+            logger.error(f"Error recording price history: {e}")
+            return
+        for asin, point_ts, cents, _ in points:
+            self._last_seen.set(asin, (point_ts, cents))
+            self._stats_cache.pop(asin)
+
+    def history(
+        self, asin: str, since: Optional[float] = None, until: Optional[float] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Raw (timestamps, prices) for one product, oldest first."""
+        with self.db_manager.connection() as conn:
+            return self._select_history(conn, asin, since, until)
+
+    async def ahistory(
+        self, asin: str, since: Optional[float] = None, until: Optional[float] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        return await self.db_manager.read(self._select_history, asin, since, until)
+
+    def daily(self, asin: str, days: int = 365) -> Dict[str, np.ndarray]:
+        with self.db_manager.connection() as conn:
+            return self._select_daily(conn, asin, days)
+
+    async def astats(self, asin: str, days: int = 365) -> Optional[Dict]:
+        """Historical low/high/last price and trend for ``asin``, or None."""
+        cached = self._stats_cache.get(asin)
+        if cached is not None and cached[0] == days:
+            return cached[1]
+        try:
+            buckets = await self.db_manager.read(self._select_daily, asin, days)
+        except sqlite3.DatabaseError as e:
+            logger.error(f"Error reading price history for {asin}: {e}")
+            return None
+        stats = self._summarize(buckets)
+        if stats is not None:
+            self._stats_cache.set(asin, (days, stats))
+        return stats
+
+    def stats(self, asin: str, days: int = 365) -> Optional[Dict]:
+        try:
+            return self._summarize(self.daily(asin, days))
+        except sqlite3.DatabaseError as e:
+            logger.error(f"Error reading price history for {asin}: {e}")
+            return None
+
+    async def compact(self, now: Optional[float] = None) -> int:
+        """Delete raw points past retention; returns the number removed."""
+        cutoff = int(now if now is not None else time.time()) - (
+            self.raw_retention_days * DAY
+        )
+        return await self.db_manager.write(self._delete_before, cutoff)
+
+    def _new_points(self, products: Iterable[Dict], ts: int) -> List[Tuple]:
+        points = {}
+        for product in products:
+            asin = product.get("asin")
+            price = parse_price(product.get("price"))
+            if not asin or price is None:
+                continue
+            cents = round(price * 100)
+            last = self._last_seen.get(asin)
+            if last is not None and last[1] == cents:
+                if ts - last[0] < self.min_interval:
+                    continue
+            original = parse_price(product.get("original_price"))
+            original_cents = round(original * 100) if original is not None else None
+            points[asin] = (asin, ts, cents, original_cents)
+        return list(points.values())
+
+    @staticmethod
+    def _insert_points(conn: sqlite3.Connection, points: List[Tuple]):
+        conn.executemany(
+            """
+            INSERT OR REPLACE INTO price_history (asin, ts, price_cents, original_cents)
+            VALUES (?, ?, ?, ?)
+            """,
+            points,
+        )
+        conn.executemany(
+            """
+            INSERT INTO price_history_daily
+                (asin, day, low_cents, high_cents, close_cents, close_ts, samples)
+            VALUES (?, ?, ?, ?, ?, ?, 1)
+            ON CONFLICT(asin, day) DO UPDATE SET
+                low_cents = MIN(low_cents, excluded.low_cents),
+                high_cents = MAX(high_cents, excluded.high_cents),
+                close_cents = CASE WHEN excluded.close_ts >= close_ts
+                    THEN excluded.close_cents ELSE close_cents END,
+                close_ts = MAX(close_ts, excluded.close_ts),
+                samples = samples + 1
+            """,
+            [
+                (asin, ts // DAY, cents, cents, cents, ts)
+                for asin, ts, cents, _ in points
+            ],
+        )
+
+    @staticmethod
+    def _select_history(
+        conn: sqlite3.Connection,
+        asin: str,
+        since: Optional[float],
+        until: Optional[float],
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        rows = conn.execute(
+            """
+            SELECT ts, price_cents FROM price_history
+            WHERE asin = ? AND ts >= ? AND ts <= ?
+            ORDER BY ts
+            """,
+            (
+                asin,
+                int(since) if since is not None else 0,
+                int(until) if until is not None else 2**62,
+            ),
+        ).fetchall()
+        data = np.array(rows, dtype=np.int64).reshape(-1, 2)
+        return data[:, 0], data[:, 1] / 100
+
+    @staticmethod
+    def _select_daily(
+        conn: sqlite3.Connection, asin: str, days: int
+    ) -> Dict[str, np.ndarray]:
+        first_day = int(time.time()) // DAY - days
+        rows = conn.execute(
+            """
+            SELECT day, low_cents, high_cents, close_cents FROM price_history_daily
+            WHERE asin = ? AND day >= ?
+            ORDER BY day
+            """,
+            (asin, first_day),
+        ).fetchall()
+        data = np.array(rows, dtype=np.int64).reshape(-1, 4)
+        return {
+            "day": data[:, 0],
+            "low": data[:, 1] / 100,
+            "high": data[:, 2] / 100,
+            "close": data[:, 3] / 100,
+        }
+
+    @staticmethod
+    def _summarize(
+        buckets: Dict[str, np.ndarray], trend_days: int = 30
+    ) -> Optional[Dict]:
+        if not len(buckets["day"]):
+            return None
+        recent = buckets["day"] >= buckets["day"][-1] - trend_days
+        days, closes = buckets["day"][recent], buckets["close"][recent]
+        trend = 0.0
+        if len(days) >= 3:
+            # Least-squares slope as a fraction of the mean price per day.
+            slope = np.polyfit(days - days[0], closes, 1)[0]
+            trend = float(slope / closes.mean())
+        return {
+            "low": float(buckets["low"].min()),
+            "high": float(buckets["high"].max()),
+            "last": float(buckets["close"][-1]),
+            "mean": float(buckets["close"].mean()),
+            "trend": trend,
+            "days": int(len(buckets["day"])),
+        }
+
+    @staticmethod
+    def _delete_before(conn: sqlite3.Connection, cutoff: int) -> int:
+        cursor = conn.execute("DELETE FROM price_history WHERE ts < ?", (cutoff,))
+        return cursor.rowcount
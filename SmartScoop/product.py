@@ -0,0 +1,164 @@
+import math
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+_NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+
+
+def parse_price(value: Any) -> Optional[float]:
+    """Numeric price from API values such as ``"$1,299.99"``, or None."""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        # Fast path for the common "$1,299.99" / "4.5" shapes.
+        number = float(str(value).lstrip(" $").replace(",", ""))
+        if math.isfinite(number):
+            return number
+    except ValueError:
+        pass
+    match = _NUMBER_PATTERN.search(str(value).replace(",", ""))
+    return float(match.group()) if match else None
+
+
+def parse_count(value: Any) -> Optional[int]:
+    """Integer count from API values such as ``"1,234"``, or None."""
+    number = parse_price(value)
+    return int(number) if number is not None else None
+
+
+class Product:
+    """Compact product record shared by every search backend.
+
+    Prices and ratings are converted to numbers once, when the record is
+    built. Item access (``product["price"]``, ``product.get("asin")``) works
+    as it did for the plain dicts backends used to return.
+    """
+
+    __slots__ = (
+        "asin",
+        "title",
+        "price",
+        "original_price",
+        "rating",
+        "num_ratings",
+        "url",
+        "image",
+        "is_prime",
+        "delivery",
+        "sales_volume",
+    )
+
+    def __init__(
+        self,
+        asin: Optional[str] = None,
+        title: Optional[str] = None,
+        price: Optional[float] = None,
+        original_price: Optional[float] = None,
+        rating: Optional[float] = None,
+        num_ratings: Optional[int] = None,
+        url: Optional[str] = None,
+        image: Optional[str] = None,
+        is_prime: Optional[bool] = None,
+        delivery: Optional[str] = None,
+        sales_volume: Optional[str] = None,
+    ):
+        self.asin = asin
+        self.title = title
+        self.price = price
+        self.original_price = original_price
+        self.rating = rating
+        self.num_ratings = num_ratings
+        self.url = url
+        self.image = image
+        self.is_prime = is_prime
+        self.delivery = delivery
+        self.sales_volume = sales_volume
+
+    @classmethod
+    def from_api(cls, raw: Dict[str, Any]) -> "Product":
+        """Build from one item of the RapidAPI Amazon ``products`` array."""
+        get = raw.get
+        return cls(
+            get("asin"),
+            get("product_title"),
+            parse_price(get("product_price")),
+            parse_price(get("product_original_price")),
+            parse_price(get("product_star_rating")),
+            parse_count(get("product_num_ratings")),
+            get("product_url"),
+            get("product_photo"),
+            get("is_prime"),
+            get("delivery"),
+            get("sales_volume"),
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Product":
+        """Build from a dict keyed by field name, e.g. a cached ``to_dict``."""
+        return cls(
+            data.get("asin"),
+            data.get("title"),
+            parse_price(data.get("price")),
+            parse_price(data.get("original_price")),
+            parse_price(data.get("rating")),
+            parse_count(data.get("num_ratings")),
+            data.get("url"),
+            data.get("image"),
+            data.get("is_prime"),
+            data.get("delivery"),
+            data.get("sales_volume"),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def keys(self) -> tuple:
+        return self.__slots__
+
+    def get(self, field: str, default: Any = None) -> Any:
+        value = getattr(self, field, None) if field in self.__slots__ else None
+        return default if value is None else value
+
+    def __getitem__(self, field: str) -> Any:
+        if field not in self.__slots__:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Product):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return (
+            f"Product(asin={self.asin!r}, title={self.title!r}, "
+            f"price={self.price!r})"
+        )
+
+    def summary(self) -> str:
+        """Short multi-line description used in agent tool output."""
+        price = (
+            f"${self.price:.2f}" if self.price is not None else "price unavailable"
+        )
+        rating = (
+            f"{self.rating:.1f}/5 ({self.num_ratings or 0} ratings)"
+            if self.rating is not None
+            else "no rating"
+        )
+        return f"- {self.title}\n {price}\nLink: ({self.url})\n Rating: {rating}"
+
+
+def iter_products(raw_products: Iterable[Dict[str, Any]]) -> Iterator[Product]:
+    """Lazily convert raw API items, so callers can stop early or stream."""
+    for raw in raw_products:
+        yield Product.from_api(raw)
+
+
+def to_products(items: Iterable[Any]) -> List[Product]:
+    """Products from records or field-name dicts, e.g. cached search results."""
+    return [
+        item if isinstance(item, Product) else Product.from_dict(item)
+        for item in items
+    ]
@@ -1,7 +1,15 @@
+import asyncio
 import logging
-from typing import Dict, List
+from typing import Dict, List, Optional
 import aiohttp  # type: ignore
 from abc import ABC, abstractmethod
+from SmartScoop.product import Product, iter_products
+from SmartScoop.rate_limit import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryPolicy,
+    rate_limiter_for,
+)
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -11,27 +19,121 @@ logging.basicConfig(level=logging.INFO)
 # ProductSearchInterface for abstracting search functionality
 class ProductSearchInterface(ABC):
     @abstractmethod
-    async def search_products(self, query: str, filters: Dict) -> List[Dict]:
+    async def search_products(self, query: str, filters: Dict) -> List[Product]:
         pass
 
     @abstractmethod
     async def get_product_details(self, product_id: str) -> Dict:
         pass
 
+    async def start(self):
+        """Open long-lived resources such as HTTP sessions."""
+
+    async def close(self):
+        """Release resources opened by start()."""
+
 
 # AmazonProductSearch class implementing the ProductSearchInterface
 class AmazonProductSearch(ProductSearchInterface):
-    def __init__(self, api_key: str):
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = "https://real-time-amazon-data.p.rapidapi.com",
+        pool_limit: int = 100,
+        per_host_limit: int = 20,
+        dns_cache_ttl: int = 300,
+        connect_timeout: float = 5.0,
+        total_timeout: float = 15.0,
+        requests_per_second: float = 5.0,
+        burst: int = 10,
+        retry_policy: Optional[RetryPolicy] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+    ):
         self.api_key = api_key
-        self.base_url = "https://real-time-amazon-data.p.rapidapi.com"
-
-    async def search_products(self, query: str, filters: Dict = None) -> List[Dict]:
-        filters = filters or {}
-        url = f"{self.base_url}/search"
-        headers = {
+        self.base_url = base_url
+        self.headers = {
             "x-rapidapi-key": self.api_key,
             "x-rapidapi-host": "real-time-amazon-data.p.rapidapi.com",
         }
+        self.pool_limit = pool_limit
+        self.per_host_limit = per_host_limit
+        self.dns_cache_ttl = dns_cache_ttl
+        self.timeout = aiohttp.ClientTimeout(
+            total=total_timeout, sock_connect=connect_timeout
+        )
+        self.rate_limiter = rate_limiter_for(api_key, requests_per_second, burst)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_lock = asyncio.Lock()
+
+    async def start(self):
+        await self._get_session()
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        # One keep-alive session per backend; created lazily so a backend used
+        # outside the FastAPI lifespan still works.
+        if self._session is None or self._session.closed:
+            async with self._session_lock:
+                if self._session is None or self._session.closed:
+                    connector = aiohttp.TCPConnector(
+                        limit=self.pool_limit,
+                        limit_per_host=self.per_host_limit,
+                        ttl_dns_cache=self.dns_cache_ttl,
+                        use_dns_cache=True,
+                    )
+                    self._session = aiohttp.ClientSession(
+                        connector=connector,
+                        timeout=self.timeout,
+                        headers=self.headers,
+                    )
+        return self._session
+
+    async def _get_json(self, url: str, params: Dict = None) -> Optional[Dict]:
+        """GET with rate limiting, retries and the circuit breaker.
+
+        Returns None when the request ultimately failed.
+        """
+        if not self.circuit_breaker.allow():
+            raise CircuitOpenError("Amazon API circuit is open")
+        session = await self._get_session()
+        for attempt in range(self.retry_policy.max_retries + 1):
+            await self.rate_limiter.acquire()
+            status, retry_after = None, None
+            try:
+                async with session.get(url, params=params) as response:
+                    if response.status == 200:
+                        result = await response.json()
+                        self.circuit_breaker.record_success()
+                        return result
+                    status = response.status
+                    retry_after = response.headers.get("Retry-After")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning(f"Amazon API request failed: {e!r}")
+            if status is not None and status not in self.retry_policy.retry_statuses:
+                # The upstream answered; the request itself was rejected.
+                self.circuit_breaker.record_success()
+                logger.error(f"Amazon API error: {status}")
+                return None
+            if attempt < self.retry_policy.max_retries:
+                delay = self.retry_policy.delay(attempt, retry_after)
+                logger.warning(
+                    f"Amazon API returned {status or 'no response'}, "
+                    f"retrying in {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+        self.circuit_breaker.record_failure()
+        logger.error(f"Amazon API error after retries: {status or 'no response'}")
+        return None
+
+    async def search_products(self, query: str, filters: Dict = None) -> List[Product]:
+        filters = filters or {}
+        url = f"{self.base_url}/search"
         params = {
             "query": query,
             "country": filters.get("country", "US"),
@@ -40,58 +142,25 @@ class AmazonProductSearch(ProductSearchInterface):
             "is_prime": filters.get("is_prime", "false"),
         }
 
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.get(url, headers=headers, params=params) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        return self._parse_products(result)
-                    else:
-                        logger.error(f"Amazon API error: {response.status}")
-                        return []
-            except Exception as e:
-                logger.error(f"Error searching Amazon products: {e}")
-                return []
+        try:
+            result = await self._get_json(url, params)
+            return self._parse_products(result) if result is not None else []
+        except Exception as e:
+            logger.error(f"Error searching Amazon products: {e}")
+            return []
 
     async def get_product_details(self, product_id: str) -> Dict:
         url = f"{self.base_url}/{product_id}"
-        headers = {
-            "x-rapidapi-key": self.api_key,
-            "x-rapidapi-host": "real-time-amazon-data.p.rapidapi.com",
-        }
 
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.get(url, headers=headers) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        return self._parse_products(result)
-                    else:
-                        logger.error(f"Amazon API error: {response.status}")
-                        return {}
-            except Exception as e:
-                logger.error(f"Error getting Amazon product details: {e}")
-                return {}
-
-    def _parse_products(self, products: List[Dict]) -> List[Dict]:
+        try:
+            result = await self._get_json(url)
+            return self._parse_products(result) if result is not None else {}
+        except Exception as e:
+            logger.error(f"Error getting Amazon product details: {e}")
+            return {}
+
+    def _parse_products(self, response: Dict) -> List[Product]:
         """
-        Extract and format product details from the API response.
+        Convert the API response into Product records in a single pass.
         """
-        # products = api_response.get("data", {}).get("products", [])
-        products = products["data"]["products"]
-        return [
-            {
-                "asin": product.get("asin"),
-                "title": product.get("product_title"),
-                "price": product.get("product_price"),
-                "original_price": product.get("product_original_price"),
-                "rating": product.get("product_star_rating"),
-                "num_ratings": product.get("product_num_ratings"),
-                "url": product.get("product_url"),
-                "image": product.get("product_photo"),
-                "is_prime": product.get("is_prime"),
-                "delivery": product.get("delivery"),
-                "sales_volume": product.get("sales_volume"),
-            }
-            for product in products
-        ]
+        return list(iter_products(response["data"]["products"]))
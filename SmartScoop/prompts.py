@@ -0,0 +1,28 @@
+from langchain_core.prompts import PromptTemplate
+
+# Bundled copy of the "hwchase17/react" hub prompt, so building the agent
+# needs no network round-trip. It also carries the user's chat history.
+REACT_TEMPLATE = """Answer the following questions as best you can. You have access to the following tools:
+
+{tools}
+
+Use the following format:
+
+Question: the input question you must answer
+Thought: you should always think about what to do
+Action: the action to take, should be one of [{tool_names}]
+Action Input: the input to the action
+Observation: the result of the action
+... (this Thought/Action/Action Input/Observation can repeat N times)
+Thought: I now know the final answer
+Final Answer: the final answer to the original input question
+
+Begin!
+
+Previous conversation:
+{chat_history}
+
+Question: {input}
+Thought:{agent_scratchpad}"""
+
+REACT_PROMPT = PromptTemplate.from_template(REACT_TEMPLATE)
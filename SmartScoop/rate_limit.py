@@ -0,0 +1,202 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import time
+from contextvars import ContextVar
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Lower values are served first when callers queue for the same bucket.
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+# Set to PRIORITY_BACKGROUND by refresh jobs; tasks inherit it from their creator.
+request_priority: ContextVar[int] = ContextVar(
+    "request_priority", default=PRIORITY_INTERACTIVE
+)
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class TokenBucket:
+    """Async token bucket that hands out tokens to waiters by priority.
+
+    Buckets are shared process-wide, so they may outlive the event loop that
+    last used them (e.g. across ``asyncio.run`` calls); waiters and the
+    wake-up timer left by a previous loop are dropped on first use from a
+    new one.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def acquire(self, priority: Optional[int] = None):
+        if priority is None:
+            priority = request_priority.get()
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._bind(loop)
+        self._refill()
+        if not self._waiters and self._tokens >= 1:
+            self._tokens -= 1
+            return
+        future = loop.create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The token was granted just as we were cancelled; give it back.
+                self._tokens += 1
+                self._dispatch()
+            raise
+
+    def configure(self, rate: float, capacity: float):
+        """Change the rate and burst size; tokens earned so far are kept."""
+        self._refill()
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = min(self._tokens, capacity)
+
+    def _bind(self, loop: asyncio.AbstractEventLoop):
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+            self._wakeup = None
+        self._waiters = [
+            waiter for waiter in self._waiters if waiter[2].get_loop() is loop
+        ]
+        heapq.heapify(self._waiters)
+        self._loop = loop
+
+    def _refill(self):
+        now = time.monotonic()
+        refilled = self._tokens + (now - self._updated) * self.rate
+        self._tokens = min(self.capacity, refilled)
+        self._updated = now
+
+    def _dispatch(self):
+        self._refill()
+        while self._waiters and self._tokens >= 1:
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            self._tokens -= 1
+            future.set_result(None)
+        if self._waiters and self._wakeup is None:
+            delay = (1 - self._tokens) / self.rate
+            self._wakeup = asyncio.get_running_loop().call_later(delay, self._on_wakeup)
+
+    def _on_wakeup(self):
+        self._wakeup = None
+        self._dispatch()
+
+
+_buckets: Dict[str, TokenBucket] = {}
+
+
+def rate_limiter_for(api_key: str, rate: float, capacity: float) -> TokenBucket:
+    """Return the process-wide bucket for an API key, creating it on first use.
+
+    Clients sharing a key share its quota, so a bucket that already exists is
+    reconfigured to the latest ``rate`` and ``capacity`` rather than keeping
+    whichever settings came first.
+    """
+    bucket = _buckets.get(api_key)
+    if bucket is None:
+        bucket = _buckets[api_key] = TokenBucket(rate, capacity)
+    elif (bucket.rate, bucket.capacity) != (rate, capacity):
+        logger.info(f"Rate limit for API key changed to {rate}/s, burst {capacity}")
+        bucket.configure(rate, capacity)
+    return bucket
+
+
+class RetryPolicy:
+    def __init__(
+        self,
+        max_retries: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 20.0,
+        retry_statuses: Tuple[int, ...] = (429, 500, 502, 503, 504),
+    ):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_statuses = retry_statuses
+
+    def delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Seconds to wait before retry ``attempt`` (0-based).
+
+        A Retry-After header wins; otherwise exponential backoff with full jitter.
+        """
+        if retry_after:
+            seconds = _parse_retry_after(retry_after)
+            if seconds is not None:
+                return min(seconds, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+
+def _parse_retry_after(value: str) -> Optional[float]:
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """Fails fast after repeated upstream failures.
+
+    After ``failure_threshold`` consecutive failures the circuit opens for
+    ``reset_timeout`` seconds, then lets a single trial request through.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        # While half-open, a trial is in flight; if it never reports back (e.g.
+        # it was cancelled) another trial is allowed after reset_timeout.
+        if time.monotonic() - self._opened_at < self.reset_timeout:
+            return False
+        self.state = self.HALF_OPEN
+        self._opened_at = time.monotonic()
+        return True
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"Circuit opened after {self.failures} failures")
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
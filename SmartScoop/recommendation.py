@@ -1,49 +1,225 @@
+from SmartScoop.cache import TTLCache
+from SmartScoop.embedding_store import EmbeddingStore
+from SmartScoop.encoder_service import BatchEncoder, LazyModel
 from SmartScoop.user_profile import UserProfileManager
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+from SmartScoop.vector_index import BruteForceIndex, VectorIndex
 import numpy as np
-from typing import List, Dict
+from typing import Any, List, Dict, Optional, Tuple
+import asyncio
+import copy
+import time
 
 
 class RecommendationEngine:
-    def __init__(self, user_profile_manager: UserProfileManager):
+    def __init__(
+        self,
+        user_profile_manager: UserProfileManager,
+        model: Optional[Any] = None,
+        top_k: int = 10,
+        embedding_store: Optional[EmbeddingStore] = None,
+        index: Optional[VectorIndex] = None,
+        user_vector_cache_size: int = 10000,
+        user_vector_ttl: float = 3600,
+        encoder: Optional[BatchEncoder] = None,
+        store_check_interval: float = 1.0,
+    ):
         self.user_profile_manager = user_profile_manager
-        self.model = SentenceTransformer("paraphrase-MiniLM-L6-v2")
-        self.product_embeddings = {}
+        # Without an explicit model the MiniLM model is loaded on first use (or
+        # by warm_up), so constructing the engine stays cheap.
+        self.model = model if model is not None else LazyModel()
+        self.encoder = encoder or BatchEncoder(self.model)
+        self.top_k = top_k
+        self.index = index if index is not None else BruteForceIndex()
+        self.embedding_store = embedding_store
+        # Other workers may change a shared store; it is checked for that at
+        # most every store_check_interval seconds before serving.
+        self.store_check_interval = store_check_interval
+        self._store_checked = time.monotonic()
+        self._store_signature = None
+        if embedding_store is not None:
+            self.index.build(*embedding_store.load())
+            self._store_signature = embedding_store.signature
+        # Preference strings rarely change, so their vectors are cached instead of
+        # re-running the model; _user_cache_keys lets a profile update drop them.
+        # It is bounded like the vectors. A forgotten entry only delays
+        # invalidation, since changed preferences give a new cache key anyway.
+        self.user_vector_cache = TTLCache(user_vector_cache_size, user_vector_ttl)
+        self._user_cache_keys = TTLCache(user_vector_cache_size, user_vector_ttl)
+        user_profile_manager.add_update_listener(self.invalidate_user)
+
+    @property
+    def model_ready(self) -> bool:
+        return not isinstance(self.model, LazyModel) or self.model.loaded
+
+    async def warm_up(self):
+        """Load the model and run one encode off the event loop."""
+        if self.model_ready:
+            return
+        await asyncio.get_running_loop().run_in_executor(
+            None, self.model.encode, ["warm up"]
+        )
 
     def update_product_embeddings(self, products: List[Dict]):
+        store = self.embedding_store
+        if store is not None:
+            changed_ids, embeddings = store.upsert(products, self._encode)
+            if changed_ids and store.last_write_base == self._store_signature:
+                self.index.add(changed_ids, embeddings)
+                self._store_signature = store.signature
+            else:
+                self.sync_embeddings()
+            return
         product_descriptions = [p.get("description", "") for p in products]
-        product_embeddings = self.model.encode(
-            product_descriptions, convert_to_tensor=True
+        self.index.add([p["id"] for p in products], self._encode(product_descriptions))
+
+    def remove_product_embeddings(self, product_ids: List):
+        store = self.embedding_store
+        if store is None:
+            self.index.remove(product_ids)
+            return
+        store.remove(product_ids)
+        if store.last_write_base == self._store_signature:
+            self.index.remove(product_ids)
+            self._store_signature = store.signature
+        else:
+            self.sync_embeddings()
+
+    def sync_embeddings(self) -> bool:
+        """Rebuild the index if the embedding store was changed elsewhere.
+
+        The new index is built on a copy and swapped in, so searches running
+        on other threads keep using the old one. Returns True if it rebuilt.
+        """
+        self._store_checked = time.monotonic()
+        store = self.embedding_store
+        if store is None:
+            return False
+        store.refresh()
+        if store.signature == self._store_signature:
+            return False
+        index = copy.copy(self.index)
+        index.build(*store.contents())
+        self.index, self._store_signature = index, store.signature
+        return True
+
+    def _store_check_due(self) -> bool:
+        return (
+            self.embedding_store is not None
+            and time.monotonic() - self._store_checked >= self.store_check_interval
         )
-        self.product_embeddings = {
-            p["id"]: embedding for p, embedding in zip(products, product_embeddings)
+
+    def get_recommendations(self, user_id: str, category: str = None) -> List[int]:
+        return self.get_batch_recommendations([user_id], category)[0]
+
+    def get_batch_recommendations(
+        self, user_ids: List[str], category: str = None
+    ) -> List[List[int]]:
+        """Score the catalog for several users with a single index search."""
+        if self._store_check_due():
+            self.sync_embeddings()
+        if not len(self.index):
+            return [[] for _ in user_ids]
+        profiles = {
+            user_id: self.user_profile_manager.get_user_profile(user_id)
+            for user_id in set(user_ids)
         }
+        rows, preference_strings = self._preference_strings(user_ids, profiles, category)
+        if not rows:
+            return [[] for _ in user_ids]
+        user_vectors = self._user_vectors(preference_strings)
+        return self._rank(len(user_ids), rows, user_vectors)
+
+    async def aget_recommendations(
+        self, user_id: str, category: str = None
+    ) -> List[int]:
+        return (await self.aget_batch_recommendations([user_id], category))[0]
 
-    def get_recommendations(self, user_id: str, category: str = None) -> List[Dict]:
-        profile = self.user_profile_manager.get_user_profile(user_id)
-        if not profile or not self.product_embeddings:
-            return []
-        user_preferences = (
-            profile.preferences
-            if not category
-            else profile.preferences.get(category, {})
+    async def aget_batch_recommendations(
+        self, user_ids: List[str], category: str = None
+    ) -> List[List[int]]:
+        """Async variant that encodes through the shared BatchEncoder."""
+        if self._store_check_due():
+            await asyncio.get_running_loop().run_in_executor(None, self.sync_embeddings)
+        if not len(self.index):
+            return [[] for _ in user_ids]
+        manager = self.user_profile_manager
+        profiles = await manager.aget_user_profiles(list(set(user_ids)))
+        rows, preference_strings = self._preference_strings(user_ids, profiles, category)
+        if not rows:
+            return [[] for _ in user_ids]
+        user_vectors = await self._auser_vectors(preference_strings)
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self._rank, len(user_ids), rows, user_vectors
         )
-        user_vector = self._create_user_vector(user_preferences)
-        user_vector_cpu = user_vector.cpu().numpy().flatten()
-        similarities = {
-            product_id: cosine_similarity(
-                [user_vector_cpu], [embedding.cpu().numpy().flatten()]
-            )[0][0]
-            for product_id, embedding in self.product_embeddings.items()
-        }
-        sorted_products = sorted(similarities.items(), key=lambda x: x[1], reverse=True)
-        return [int(product_id) for product_id, similarity in sorted_products[:10]]
+
+    def _preference_strings(
+        self, user_ids: List[str], profiles: Dict, category: Optional[str]
+    ) -> Tuple[List[int], List[str]]:
+        rows, preference_strings = [], []
+        for row, user_id in enumerate(user_ids):
+            profile = profiles.get(user_id)
+            if not profile:
+                continue
+            user_preferences = (
+                profile.preferences
+                if not category
+                else profile.preferences.get(category, {})
+            )
+            preference_string = self._get_preference_string(user_preferences)
+            keys = self._user_cache_keys.get(user_id) or set()
+            keys.add(preference_string)
+            self._user_cache_keys.set(user_id, keys)
+            rows.append(row)
+            preference_strings.append(preference_string)
+        return rows, preference_strings
+
+    def _rank(
+        self, n_users: int, rows: List[int], user_vectors: np.ndarray
+    ) -> List[List[int]]:
+        results = [[] for _ in range(n_users)]
+        for row, product_ids in zip(rows, self.index.search(user_vectors, self.top_k)):
+            results[row] = [int(product_id) for product_id in product_ids]
+        return results
+
+    def invalidate_user(self, user_id: str):
+        for preference_string in self._user_cache_keys.pop(user_id) or ():
+            self.user_vector_cache.pop(preference_string)
 
     def _create_user_vector(self, preferences: Dict) -> np.ndarray:
         preference_string = self._get_preference_string(preferences)
-        user_vector = self.model.encode([preference_string], convert_to_tensor=True)
-        return user_vector
+        return self._user_vectors([preference_string])[0]
+
+    def _user_vectors(self, preference_strings: List[str]) -> np.ndarray:
+        vectors, missing = self._cached_user_vectors(preference_strings)
+        if missing:
+            encoded = dict(zip(missing, self._encode(missing)))
+            vectors = self._fill_user_vectors(preference_strings, vectors, encoded)
+        return np.vstack(vectors)
+
+    async def _auser_vectors(self, preference_strings: List[str]) -> np.ndarray:
+        vectors, missing = self._cached_user_vectors(preference_strings)
+        if missing:
+            encoded = dict(zip(missing, await self.encoder.encode(missing)))
+            vectors = self._fill_user_vectors(preference_strings, vectors, encoded)
+        return np.vstack(vectors)
+
+    def _cached_user_vectors(self, preference_strings: List[str]):
+        vectors = [self.user_vector_cache.get(text) for text in preference_strings]
+        missing = list({text for text, v in zip(preference_strings, vectors) if v is None})
+        return vectors, missing
+
+    def _fill_user_vectors(
+        self, preference_strings: List[str], vectors: List, encoded: Dict
+    ) -> List[np.ndarray]:
+        for text, vector in encoded.items():
+            self.user_vector_cache.set(text, vector)
+        return [
+            encoded[text] if vector is None else vector
+            for text, vector in zip(preference_strings, vectors)
+        ]
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        return self.encoder.encode_sync(texts)
 
     def _get_preference_string(self, preferences: Dict) -> str:
         preference_string = ""
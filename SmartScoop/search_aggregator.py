@@ -0,0 +1,98 @@
+import asyncio
+import logging
+import re
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from SmartScoop.metrics import metrics
+from SmartScoop.product_search import ProductSearchInterface
+
+logger = logging.getLogger(__name__)
+
+
+def backend_name(search_engine: ProductSearchInterface) -> str:
+    return getattr(search_engine, "name", type(search_engine).__name__)
+
+
+def product_keys(product: Dict) -> List[str]:
+    """Identities used to de-duplicate results: ASIN and normalized title."""
+    keys = []
+    if product.get("asin"):
+        keys.append(f"asin:{product['asin']}")
+    if product.get("title"):
+        words = re.findall(r"[a-z0-9]+", product["title"].lower())
+        keys.append("title:" + " ".join(words))
+    return keys
+
+
+class SearchAggregator:
+    """Queries every search backend concurrently with a per-backend deadline.
+
+    A backend that errors or misses its deadline contributes nothing, while
+    results from the others are still returned.
+    """
+
+    def __init__(
+        self,
+        product_searches: List[ProductSearchInterface],
+        timeout: float = 8.0,
+        timeouts: Optional[Dict[str, float]] = None,
+    ):
+        self.product_searches = product_searches
+        self.timeout = timeout
+        self.timeouts = timeouts or {}
+
+    async def search(self, query: str, filters: Dict = None) -> List[Dict]:
+        seen = set()
+        merged = []
+        async for _, results in self.stream(query, filters):
+            merged.extend(self._dedupe(results, seen))
+        return merged
+
+    async def stream(
+        self, query: str, filters: Dict = None
+    ) -> AsyncIterator[Tuple[str, List[Dict]]]:
+        """Yield (backend name, results) as each backend finishes.
+
+        Results already yielded for another backend are filtered out.
+        """
+        filters = filters or {}
+        tasks = [
+            asyncio.ensure_future(self._search_one(search_engine, query, filters))
+            for search_engine in self.product_searches
+        ]
+        seen = set()
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                name, results = await next_done
+                yield name, self._dedupe(results, seen)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _search_one(
+        self, search_engine: ProductSearchInterface, query: str, filters: Dict
+    ) -> Tuple[str, List[Dict]]:
+        name = backend_name(search_engine)
+        timeout = self.timeouts.get(name, self.timeout)
+        try:
+            with metrics.span(f"search.{name}"):
+                results = await asyncio.wait_for(
+                    search_engine.search_products(query, filters), timeout
+                )
+            return name, results or []
+        except asyncio.TimeoutError:
+            logger.warning(f"{name} did not answer within {timeout}s for {query!r}")
+        except Exception as e:
+            logger.error(f"{name} search failed for {query!r}: {e}")
+        return name, []
+
+    @staticmethod
+    def _dedupe(results: List[Dict], seen: set) -> List[Dict]:
+        unique = []
+        for product in results:
+            keys = product_keys(product)
+            if any(key in seen for key in keys):
+                continue
+            seen.update(keys)
+            unique.append(product)
+        return unique
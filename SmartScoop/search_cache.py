@@ -0,0 +1,170 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+from typing import Dict, List, Optional, Tuple
+
+from SmartScoop.cache import TTLCache
+from SmartScoop.database import DatabaseManager
+from SmartScoop.product import Product, to_products
+from SmartScoop.product_search import ProductSearchInterface
+from SmartScoop.rate_limit import PRIORITY_BACKGROUND, request_priority
+from SmartScoop.search_aggregator import backend_name
+
+logger = logging.getLogger(__name__)
+
+
+class CachedProductSearch(ProductSearchInterface):
+    """Two-tier search-result cache in front of any ProductSearchInterface.
+
+    Entries younger than ``fresh_ttl`` are served directly. Entries younger
+    than ``stale_ttl`` are served immediately while one background refresh
+    replaces them. Concurrent misses for the same key share a single upstream
+    call. The optional SQLite tier survives restarts and is shared by every
+    worker pointing at the same database.
+    """
+
+    def __init__(
+        self,
+        backend: ProductSearchInterface,
+        db_manager: Optional[DatabaseManager] = None,
+        maxsize: int = 2048,
+        fresh_ttl: float = 300,
+        stale_ttl: float = 3600,
+    ):
+        self.backend = backend
+        self.name = backend_name(backend)
+        self.db_manager = db_manager
+        self.fresh_ttl = fresh_ttl
+        self.stale_ttl = stale_ttl
+        self.memory = TTLCache(maxsize, stale_ttl)
+        self.upstream_calls = 0
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._writes = 0
+
+    def cache_key(self, query: str, filters: Dict) -> str:
+        return json.dumps(
+            [
+                self.name,
+                " ".join(query.lower().split()),
+                str(filters.get("country", "US")).upper(),
+                str(filters.get("sort_by", "RELEVANCE")).upper(),
+                int(filters.get("page", 1)),
+                str(filters.get("is_prime", "false")).lower(),
+            ]
+        )
+
+    async def search_products(self, query: str, filters: Dict = None) -> List[Product]:
+        filters = filters or {}
+        key = self.cache_key(query, filters)
+        entry = self.memory.get(key)
+        if entry is None and self.db_manager is not None:
+            entry = await self._load_persistent(key)
+            if entry is not None:
+                self.memory.set(key, entry, self.stale_ttl - (time.time() - entry[0]))
+        if entry is not None:
+            created_at, results = entry
+            if time.time() - created_at >= self.fresh_ttl:
+                self._schedule_refresh(key, query, filters)
+            return results
+        return await self._fetch(key, query, filters)
+
+    async def get_product_details(self, product_id: str) -> Dict:
+        # Details feed price checks, so they always go upstream.
+        return await self.backend.get_product_details(product_id)
+
+    async def start(self):
+        await self.backend.start()
+
+    async def close(self):
+        for task in list(self._refreshing.values()):
+            task.cancel()
+        await self.backend.close()
+
+    def stats(self) -> Dict:
+        return {
+            **self.memory.stats(),
+            "upstream_calls": self.upstream_calls,
+            "refreshing": len(self._refreshing),
+        }
+
+    async def _fetch(self, key: str, query: str, filters: Dict) -> List[Product]:
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._fetch_upstream(key, query, filters))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shielded so one caller's cancellation does not cancel the shared call.
+        return await asyncio.shield(future)
+
+    def _schedule_refresh(self, key: str, query: str, filters: Dict):
+        if key in self._refreshing:
+            return
+        task = asyncio.ensure_future(self._refresh(key, query, filters))
+        self._refreshing[key] = task
+        task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+
+    async def _refresh(self, key: str, query: str, filters: Dict):
+        # Runs in its own task, so this only lowers the priority of the refresh.
+        request_priority.set(PRIORITY_BACKGROUND)
+        try:
+            await self._fetch(key, query, filters)
+        except Exception as e:
+            logger.error(f"Background refresh of {query!r} failed: {e}")
+
+    async def _fetch_upstream(
+        self, key: str, query: str, filters: Dict
+    ) -> List[Product]:
+        self.upstream_calls += 1
+        results = await self.backend.search_products(query, filters)
+        # Backends report failures as empty lists, which must not be cached.
+        if results:
+            entry = (time.time(), results)
+            self.memory.set(key, entry)
+            if self.db_manager is not None:
+                await self._store_persistent(key, entry)
+        return results
+
+    async def _load_persistent(self, key: str) -> Optional[Tuple[float, List[Product]]]:
+        try:
+            row = await self.db_manager.read(self._select_entry, key)
+        except sqlite3.DatabaseError as e:
+            logger.error(f"Error reading search cache: {e}")
+            return None
+        if row is None or time.time() - row[0] >= self.stale_ttl:
+            return None
+        return row[0], to_products(json.loads(row[1]))
+
+    async def _store_persistent(self, key: str, entry: Tuple[float, List[Product]]):
+        try:
+            await self.db_manager.write(self._upsert_entry, key, entry)
+        except sqlite3.DatabaseError as e:
+            logger.error(f"Error writing search cache: {e}")
+
+    @staticmethod
+    def _select_entry(conn: sqlite3.Connection, key: str):
+        return conn.execute(
+            "SELECT created_at, results FROM search_cache WHERE cache_key = ?",
+            (key,),
+        ).fetchone()
+
+    def _upsert_entry(
+        self, conn: sqlite3.Connection, key: str, entry: Tuple[float, List[Product]]
+    ):
+        conn.execute(
+            "INSERT OR REPLACE INTO search_cache (cache_key, results, created_at) "
+            "VALUES (?, ?, ?)",
+            (
+                key,
+                json.dumps([product.to_dict() for product in entry[1]]),
+                entry[0],
+            ),
+        )
+        self._writes += 1
+        if self._writes % 100 == 0:
+            conn.execute(
+                "DELETE FROM search_cache WHERE created_at < ?",
+                (time.time() - self.stale_ttl,),
+            )
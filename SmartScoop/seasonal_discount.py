@@ -1,8 +1,17 @@
-import os
-from dotenv import load_dotenv
-from typing import Dict, List, Any
-from datetime import datetime
+import bisect
+import logging
+import sqlite3
+from datetime import datetime, timedelta
 from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from SmartScoop.database import DatabaseManager
+from SmartScoop.price_history import PriceHistoryStore
+from SmartScoop.product import parse_price
+
+logger = logging.getLogger(__name__)
 
 
 class SeasonalEvent(Enum):
@@ -23,52 +32,322 @@ DISCOUNTS = {
 }
 
 
+def _event_name(event: Union[SeasonalEvent, str]) -> str:
+    return event.value if isinstance(event, SeasonalEvent) else str(event)
+
+
+def _shift_years(date: datetime, years: int) -> datetime:
+    try:
+        return date.replace(year=date.year + years)
+    except ValueError:
+        # 29 February in a non-leap year
+        return date.replace(year=date.year + years, day=28)
+
+
 class SeasonalOptimizer:
-    def __init__(self):
-        self.events = {}
+    """Sale-timing advice from a calendar of seasonal discount events.
+
+    Event occurrences are kept sorted by start date, so the upcoming ones are
+    found with a bisect (or ``np.searchsorted`` in batch) instead of scanning
+    every event. With ``recurring`` set, each event repeats yearly and the
+    calendar is expanded around the years being queried.
+    """
+
+    def __init__(
+        self,
+        db_manager: Optional[DatabaseManager] = None,
+        min_discount: float = 15,
+        horizon_days: float = 365,
+        recurring: bool = True,
+        price_history: Optional[PriceHistoryStore] = None,
+        low_tolerance: float = 0.03,
+        falling_trend: float = -0.002,
+        min_history_days: int = 14,
+    ):
+        self.db_manager = db_manager
+        self.min_discount = min_discount
+        self.horizon_days = horizon_days
+        self.recurring = recurring
+        # With price history, a price within low_tolerance of the product's
+        # historical low means buy now, and a daily trend at or below
+        # falling_trend (fraction of the price per day) means wait. Both are
+        # ignored until min_history_days of prices have been seen, since a
+        # product observed once is always at its "historical low".
+        self.price_history = price_history
+        self.low_tolerance = low_tolerance
+        self.falling_trend = falling_trend
+        self.min_history_days = min_history_days
+        # event name -> {"start_date", "end_date", "discount"}
+        self.events: Dict[str, Dict[str, Any]] = {}
+        self._covered_years: Optional[Tuple[int, int]] = None
+        self._build([])
+        if db_manager is not None:
+            self.load_events()
+
+    def load_events(self):
+        """(Re)load the calendar from the seasonal_discounts table."""
+        try:
+            with self.db_manager.connection() as conn:
+                rows = conn.execute(
+                    "SELECT event_name, discount_percentage, start_date, end_date "
+                    "FROM seasonal_discounts"
+                ).fetchall()
+        except sqlite3.DatabaseError as e:
+            logger.error(f"Error loading seasonal discounts: {e}")
+            return
+        for name, discount, start_date, end_date in rows:
+            try:
+                self.events[name] = {
+                    "start_date": datetime.fromisoformat(str(start_date)),
+                    "end_date": datetime.fromisoformat(str(end_date)),
+                    "discount": float(discount),
+                }
+            except (TypeError, ValueError) as e:
+                logger.warning(f"Skipping seasonal event {name}: {e}")
+        self._covered_years = None
 
     def register_event(
-        self, event: SeasonalEvent, start_date: datetime, end_date: datetime
+        self,
+        event: Union[SeasonalEvent, str],
+        start_date: datetime,
+        end_date: datetime,
+        discount: Optional[float] = None,
     ):
-        self.events[event] = {"start_date": start_date, "end_date": end_date}
-
-    def should_wait_for_sale(self, product_id: str) -> bool:
-        upcoming_events = self._get_upcoming_events()
-        if not upcoming_events:
-            return False
-        event_discounts = self._calculate_expected_discounts(upcoming_events)
-        # print("Upcoming events, discounts, and dates:")
-        # for event in event_discounts:
-        #     print(
-        #         f"- {event['event'].value.capitalize()}: "
-        #         f"{event['discount']}% discount "
-        #         f"(From {event['start_date'].strftime('%d-%m-%Y')} "
-        #         f"to {event['end_date'].strftime('%d-%m-%Y')})"
-        #     )
-        # Wait for a sale if any event offers a discount greater than 15%
-        return any(event["discount"] > 15 for event in event_discounts)
-
-    def _get_upcoming_events(self) -> List[Dict]:
-        now = datetime.now()
-        return [
-            {
-                "event": event,
-                "data": {
-                    "start_date": data["start_date"],
-                    "end_date": data["end_date"],
-                },
-            }
-            for event, data in self.events.items()
-            if data["start_date"] > now
-        ]
+        if discount is None:
+            try:
+                # "christmas" and SeasonalEvent.CHRISTMAS share a default.
+                event = SeasonalEvent(event)
+            except ValueError:
+                pass
+            discount = DISCOUNTS.get(event, 0)
+        self.events[_event_name(event)] = {
+            "start_date": start_date,
+            "end_date": end_date,
+            "discount": float(discount),
+        }
+        self._covered_years = None
 
-    def _calculate_expected_discounts(self, events: List[Dict]) -> List[Dict]:
+    def upcoming_events(
+        self, now: Optional[datetime] = None, horizon_days: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """Event occurrences starting after ``now`` within the horizon, by date."""
+        now = now or datetime.now()
+        self._ensure_calendar(now.year, now.year)
+        horizon = timedelta(
+            days=self.horizon_days if horizon_days is None else horizon_days
+        )
+        lo = bisect.bisect_right(self._start_dates, now)
+        hi = bisect.bisect_right(self._start_dates, now + horizon)
         return [
             {
-                "event": eve["event"],
-                "discount": DISCOUNTS[eve["event"]],
-                "start_date": eve["data"]["start_date"],
-                "end_date": eve["data"]["end_date"],
+                "event": self._names[i],
+                "discount": float(self._discounts[i]),
+                "start_date": self._start_dates[i],
+                "end_date": self._end_dates[i],
             }
-            for eve in events
+            for i in range(lo, hi)
         ]
+
+    def should_wait_for_sale(
+        self, product_info: Any = None, now: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """Whether to hold off buying until the best upcoming sale event.
+
+        ``product_info`` may be a product dict (its ``price`` is used for the
+        estimated sale price and its ``asin`` for price history) or anything
+        else, e.g. a product id.
+        """
+        asin = self._asin(product_info)
+        stats = None
+        if self.price_history is not None and asin:
+            stats = self.price_history.stats(asin)
+        return self._advise(product_info, now, stats)
+
+    async def ashould_wait_for_sale(
+        self, product_info: Any = None, now: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        asin = self._asin(product_info)
+        stats = None
+        if self.price_history is not None and asin:
+            stats = await self.price_history.astats(asin)
+        return self._advise(product_info, now, stats)
+
+    @staticmethod
+    def _asin(product_info: Any) -> Optional[str]:
+        if isinstance(product_info, dict):
+            return product_info.get("asin")
+        return product_info if isinstance(product_info, str) else None
+
+    def _advise(
+        self, product_info: Any, now: Optional[datetime], stats: Optional[Dict]
+    ) -> Dict[str, Any]:
+        current_price = None
+        if isinstance(product_info, dict):
+            current_price = parse_price(product_info.get("price"))
+        if current_price is None and stats is not None:
+            current_price = stats["last"]
+        upcoming = self.upcoming_events(now)
+        # Largest discount wins; ties go to the earliest event.
+        best = max(upcoming, key=lambda event: event["discount"], default=None)
+        should_wait = bool(best and best["discount"] > self.min_discount)
+        result = {
+            "should_wait": should_wait,
+            "reason": "sale_event" if should_wait else "no_sale_expected",
+            "sale_event": best["event"] if best else None,
+            "estimated_sale_date": best["start_date"] if best else None,
+            "expected_discount": best["discount"] if best else 0.0,
+            "current_price": current_price,
+            "estimated_sale_price": None,
+            "historical_low": stats["low"] if stats else None,
+            "price_trend": stats["trend"] if stats else None,
+        }
+        if best and current_price is not None:
+            discount = best["discount"] / 100
+            result["estimated_sale_price"] = current_price * (1 - discount)
+        if (
+            stats is not None
+            and current_price is not None
+            and stats["days"] >= self.min_history_days
+        ):
+            if current_price <= stats["low"] * (1 + self.low_tolerance):
+                result["should_wait"] = False
+                result["reason"] = "historical_low"
+            elif stats["trend"] <= self.falling_trend:
+                result["should_wait"] = True
+                result["reason"] = "falling_price"
+        return result
+
+    def predict_sales(
+        self,
+        prices,
+        now: Union[datetime, np.ndarray, None] = None,
+        horizon_days=None,
+        historical_lows=None,
+        history_days=None,
+        price_trends=None,
+    ) -> Dict[str, np.ndarray]:
+        """Vectorized ``should_wait_for_sale`` for many products at once.
+
+        ``prices`` is a float array (NaN for unknown). ``now`` and
+        ``horizon_days`` may be scalars or per-product arrays. Returns arrays
+        aligned with ``prices``: should_wait, expected_discount,
+        estimated_sale_price, sale_event (None if no event) and
+        estimated_sale_date (NaT if no event).
+
+        Price history applies the same rules as ``should_wait_for_sale``, per
+        product, once ``history_days`` (days of prices seen) reaches
+        ``min_history_days``: a price within ``low_tolerance`` of the
+        ``historical_lows`` means buy now, otherwise a ``price_trends`` value
+        at or below ``falling_trend`` means wait. NaN marks unknown values.
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        n = len(prices)
+        if now is None:
+            now = datetime.now()
+        now = np.broadcast_to(np.asarray(now, dtype="datetime64[s]"), (n,))
+        if n:
+            years = now.astype("datetime64[Y]").astype(int) + 1970
+            self._ensure_calendar(int(years.min()), int(years.max()))
+        if horizon_days is None:
+            horizon_days = self.horizon_days
+        seconds = np.asarray(horizon_days, dtype=np.float64) * 86400
+        horizon = np.broadcast_to(seconds.astype("timedelta64[s]"), (n,))
+
+        lo = np.searchsorted(self._starts, now, side="right")
+        hi = np.searchsorted(self._starts, now + horizon, side="right")
+        best = self._range_argmax(lo, hi)
+        found = best >= 0
+        discount = np.zeros(n)
+        sale_date = np.full(n, np.datetime64("NaT"), dtype="datetime64[s]")
+        sale_event = np.full(n, None, dtype=object)
+        discount[found] = self._discounts[best[found]]
+        sale_date[found] = self._starts[best[found]]
+        sale_event[found] = self._names_array[best[found]]
+        should_wait = found & (discount > self.min_discount)
+        if historical_lows is not None and history_days is not None:
+            days = np.broadcast_to(np.asarray(history_days, dtype=np.float64), (n,))
+            with_history = days >= self.min_history_days
+            lows = np.asarray(historical_lows, dtype=np.float64)
+            at_low = with_history & (prices <= lows * (1 + self.low_tolerance))
+            should_wait &= ~at_low
+            if price_trends is not None:
+                trends = np.asarray(price_trends, dtype=np.float64)
+                falling = trends <= self.falling_trend
+                # Only products with a known price, as in should_wait_for_sale.
+                should_wait |= with_history & ~at_low & falling & ~np.isnan(prices)
+        return {
+            "should_wait": should_wait,
+            "expected_discount": discount,
+            "estimated_sale_price": prices * (1 - discount / 100),
+            "sale_event": sale_event,
+            "estimated_sale_date": sale_date,
+        }
+
+    def _ensure_calendar(self, first_year: int, last_year: int):
+        years = (first_year, last_year) if self.recurring else (0, 0)
+        if self._covered_years == years:
+            return
+        occurrences: List[Tuple[datetime, datetime, str, float]] = []
+        for name, data in self.events.items():
+            start, end = data["start_date"], data["end_date"]
+            if not self.recurring:
+                occurrences.append((start, end, name, data["discount"]))
+                continue
+            # Occurrences from the year before through the year after, so any
+            # "now" in range plus a horizon of up to a year is covered.
+            for target in range(first_year - 1, last_year + 2):
+                shift = target - start.year
+                occurrences.append(
+                    (
+                        _shift_years(start, shift),
+                        _shift_years(end, shift),
+                        name,
+                        data["discount"],
+                    )
+                )
+        self._build(occurrences)
+        self._covered_years = years
+
+    def _build(self, occurrences: List[Tuple[datetime, datetime, str, float]]):
+        occurrences.sort(key=lambda occurrence: occurrence[0])
+        self._start_dates = [occurrence[0] for occurrence in occurrences]
+        self._end_dates = [occurrence[1] for occurrence in occurrences]
+        self._names = [occurrence[2] for occurrence in occurrences]
+        self._names_array = np.array(self._names, dtype=object)
+        self._starts = np.array(self._start_dates, dtype="datetime64[s]")
+        self._discounts = np.array(
+            [occurrence[3] for occurrence in occurrences], dtype=np.float64
+        )
+        # Sparse table: _argmax_levels[k][i] is the index of the largest
+        # discount in [i, i + 2**k), preferring the earliest on ties.
+        levels = [np.arange(len(occurrences))]
+        width = 1
+        while 2 * width <= len(occurrences):
+            prev = levels[-1]
+            left, right = prev[: len(prev) - width], prev[width:]
+            levels.append(
+                np.where(self._discounts[left] >= self._discounts[right], left, right)
+            )
+            width *= 2
+        self._argmax_levels = levels
+
+    def _range_argmax(self, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+        """Index of the best event in each [lo, hi) range, or -1 if empty."""
+        length = hi - lo
+        result = np.full(len(lo), -1, dtype=np.int64)
+        nonempty = length > 0
+        if not nonempty.any():
+            return result
+        lo, hi, length = lo[nonempty], hi[nonempty], length[nonempty]
+        level = np.floor(np.log2(length)).astype(np.int64)
+        left = np.empty(len(lo), dtype=np.int64)
+        right = np.empty(len(lo), dtype=np.int64)
+        for k in np.unique(level):
+            mask = level == k
+            table = self._argmax_levels[k]
+            left[mask] = table[lo[mask]]
+            right[mask] = table[hi[mask] - (1 << int(k))]
+        result[nonempty] = np.where(
+            self._discounts[left] >= self._discounts[right], left, right
+        )
+        return result
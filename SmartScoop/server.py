@@ -0,0 +1,129 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
+
+from SmartScoop.app import ShoppingAssistantApp
+from SmartScoop.metrics import metrics, profiler
+
+
+class ChatRequest(BaseModel):
+    user_id: str
+    message: str
+
+
+class ProfilerRequest(BaseModel):
+    enabled: bool
+    interval: Optional[float] = None
+    reset: bool = False
+
+
+def create_app(
+    shopping_assistant: ShoppingAssistantApp,
+    profiler_enabled: bool = False,
+    profiler_interval: float = 0.005,
+    warm_up: bool = True,
+    profiler_endpoint: bool = False,
+) -> FastAPI:
+    """HTTP API around ``shopping_assistant``, which the app starts and stops.
+
+    With ``warm_up`` the embedding model is loaded in the background once the
+    server accepts traffic, and ``/health/ready`` fails until it has loaded.
+    The ``/debug/profiler`` routes are only mounted with ``profiler_endpoint``:
+    they are unauthenticated and expose stacks with source paths.
+    """
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        await shopping_assistant.startup()
+        if profiler_enabled:
+            profiler.start(interval=profiler_interval)
+        warm_up_task = (
+            asyncio.create_task(shopping_assistant.warm_up()) if warm_up else None
+        )
+        try:
+            yield
+        finally:
+            if warm_up_task is not None and not warm_up_task.done():
+                warm_up_task.cancel()
+            profiler.stop()
+            await shopping_assistant.shutdown()
+
+    app = FastAPI(lifespan=lifespan)
+
+    @app.post("/chat")
+    async def chat(request: ChatRequest):
+        try:
+            response = await shopping_assistant.handle_message(
+                request.user_id, request.message
+            )
+            return {"response": response}
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+    @app.post("/chat/stream")
+    async def chat_stream(request: ChatRequest, http_request: Request):
+        # One JSON event per line. The response pulls events as it writes them,
+        # and the agent pauses once it is stream_max_pending events ahead, so
+        # a slow reader holds it back. On a disconnect Starlette cancels this
+        # generator right away under ASGI below 2.4 (uvicorn's HTTP); the check
+        # below covers servers that only report it between events. Closing the
+        # stream cancels the agent's in-flight LLM call or tool.
+        async def events():
+            stream = shopping_assistant.stream_message(
+                request.user_id, request.message
+            )
+            try:
+                async for event in stream:
+                    if await http_request.is_disconnected():
+                        break
+                    yield json.dumps(event, default=str) + "\n"
+            finally:
+                await stream.aclose()
+
+        return StreamingResponse(events(), media_type="application/x-ndjson")
+
+    @app.get("/health/live")
+    async def liveness():
+        # The event loop answered, which is all liveness means.
+        return {"status": "ok"}
+
+    @app.get("/health/ready")
+    async def readiness():
+        health = shopping_assistant.health()
+        ready = health["started"] and (health["model_ready"] or not warm_up)
+        if ready:
+            health["status"] = "ready"
+        else:
+            health["status"] = "failed" if health["warm_up_error"] else "starting"
+        return JSONResponse(health, status_code=200 if ready else 503)
+
+    @app.get("/metrics")
+    async def get_metrics():
+        return PlainTextResponse(
+            metrics.render_prometheus(), media_type="text/plain; version=0.0.4"
+        )
+
+    if profiler_endpoint:
+
+        @app.get("/debug/profiler")
+        async def get_profile():
+            # Collapsed stacks of the event loop thread, for flamegraph tools.
+            return PlainTextResponse(profiler.collapsed())
+
+        @app.post("/debug/profiler")
+        async def set_profiler(request: ProfilerRequest):
+            if request.reset:
+                profiler.reset()
+            if request.enabled:
+                # Called on the event loop thread, which is the one sampled.
+                profiler.start(interval=request.interval)
+            else:
+                profiler.stop()
+            return profiler.status()
+
+    return app
@@ -1,9 +1,15 @@
+import asyncio
 import sqlite3
 import json
-from typing import Dict, Optional
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
 from pydantic import BaseModel, Field
+from SmartScoop.cache import TTLCache
 from SmartScoop.database import DatabaseManager
 
+PROFILE_COLUMNS = "user_id, preferences, style_profile, budget_limits, version"
+
 
 class UserProfile(BaseModel):
     user_id: str
@@ -11,46 +17,319 @@ class UserProfile(BaseModel):
     style_profile: Dict = Field(default_factory=dict)
     budget_limits: Dict = Field(default_factory=dict)
 
+    def update_preferences(self, preferences: Dict):
+        self.preferences.update(preferences)
+
 
 class UserProfileManager:
-    def __init__(self, db_manager: DatabaseManager):
+    def __init__(
+        self,
+        db_manager: DatabaseManager,
+        write_behind: bool = False,
+        max_batch_size: int = 200,
+        flush_interval: float = 0.5,
+        cache_size: int = 10000,
+        cache_ttl: float = 300,
+        revalidate_interval: float = 1.0,
+    ):
         self.db_manager = db_manager
+        self._update_listeners: List[Callable[[str], None]] = []
+        # Write-behind: updates are merged per user in _pending and written in
+        # batched transactions; _flushing holds the batch currently being
+        # written so reads never fall back to an older row mid-flush.
+        self.write_behind = write_behind
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self._pending: Dict[str, UserProfile] = {}
+        self._flushing: Dict[str, UserProfile] = {}
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_latencies_ms: deque = deque(maxlen=1000)
+        self._batch_sizes: deque = deque(maxlen=1000)
+        self.merged_updates = 0
+        # Read-through cache of (profile, version, last_checked). Entries older
+        # than revalidate_interval are checked against the users.version column,
+        # which every writer bumps, so other workers' updates show up within
+        # that interval without re-parsing unchanged rows.
+        self.profile_cache = TTLCache(cache_size, cache_ttl)
+        self.revalidate_interval = revalidate_interval
+
+    def add_update_listener(self, listener: Callable[[str], None]):
+        """Register a callback invoked with the user_id of every updated profile."""
+        self._update_listeners.append(listener)
+
+    def start(self):
+        """Start the periodic write-behind flush on the running event loop."""
+        if self.write_behind and self._flush_task is None:
+            self._flush_task = asyncio.get_running_loop().create_task(
+                self._flush_periodically()
+            )
+
+    async def close(self):
+        """Stop the periodic flush and drain every pending update."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush()
 
     def get_user_profile(self, user_id: str) -> Optional[UserProfile]:
+        profile = self._local_profile(user_id)
+        if profile is not None:
+            return profile
         try:
-            with sqlite3.connect(self.db_manager.db_name) as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT * FROM users WHERE user_id = ?", (user_id,))
-                user_data = cursor.fetchone()
-
-                if user_data:
-                    return UserProfile(
-                        user_id=user_data[0],
-                        preferences=json.loads(user_data[1]),
-                        style_profile=json.loads(user_data[2]),
-                        budget_limits=json.loads(user_data[3]),
-                    )
+            with self.db_manager.connection() as conn:
+                return self._read_through(conn, user_id)
+        except sqlite3.DatabaseError as e:
+            print(f"Error occurred while fetching the user profile: {e}")
             return []
+
+    async def aget_user_profile(self, user_id: str) -> Optional[UserProfile]:
+        profile = self._local_profile(user_id)
+        if profile is not None:
+            return profile
+        try:
+            return await self.db_manager.read(self._read_through, user_id)
         except sqlite3.DatabaseError as e:
             print(f"Error occurred while fetching the user profile: {e}")
             return []
 
+    async def aget_user_profiles(self, user_ids: List[str]) -> Dict[str, UserProfile]:
+        profiles = {}
+        for user_id in user_ids:
+            profile = self._local_profile(user_id)
+            if profile is not None:
+                profiles[user_id] = profile
+        missing = [user_id for user_id in user_ids if user_id not in profiles]
+        if missing:
+            try:
+                fetched = await self.db_manager.read(self._fetch_profiles, missing)
+                profiles.update(fetched)
+            except sqlite3.DatabaseError as e:
+                print(f"Error occurred while fetching user profiles: {e}")
+        return profiles
+
     def update_user_profile(self, profile: UserProfile):
+        if self.write_behind:
+            self._enqueue(profile)
+            if len(self._pending) >= self.max_batch_size:
+                self._schedule_flush()
+            return
         try:
-            with sqlite3.connect(self.db_manager.db_name) as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    """
-                    INSERT OR REPLACE INTO users (user_id, preferences, style_profile, budget_limits)
-                    VALUES (?, ?, ?, ?)
-                    """,
-                    (
-                        profile.user_id,
-                        json.dumps(profile.preferences),
-                        json.dumps(profile.style_profile),
-                        json.dumps(profile.budget_limits),
-                    ),
-                )
+            with self.db_manager.connection() as conn:
+                versions = self._write_profile(conn, profile)
                 conn.commit()
+            self._cache_written([profile], versions)
         except sqlite3.DatabaseError as e:
             print(f"Error occurred while updating the user profile: {e}")
+            self.profile_cache.pop(profile.user_id)
+        self._notify(profile.user_id)
+
+    async def aupdate_user_profile(self, profile: UserProfile):
+        if self.write_behind:
+            self._enqueue(profile)
+            if len(self._pending) >= self.max_batch_size:
+                self._schedule_flush()
+            return
+        try:
+            versions = await self.db_manager.write(self._write_profile, profile)
+            self._cache_written([profile], versions)
+        except sqlite3.DatabaseError as e:
+            print(f"Error occurred while updating the user profile: {e}")
+            self.profile_cache.pop(profile.user_id)
+        self._notify(profile.user_id)
+
+    async def flush(self):
+        """Write every pending update in one batched transaction."""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            self._flushing, self._pending = self._pending, {}
+            start = time.perf_counter()
+            try:
+                versions = await self.db_manager.write(
+                    self._write_profiles, list(self._flushing.values())
+                )
+                self._cache_written(self._flushing.values(), versions)
+            except sqlite3.DatabaseError as e:
+                print(f"Error occurred while flushing user profiles: {e}")
+                # Keep the batch for the next flush unless it was superseded.
+                for user_id, profile in self._flushing.items():
+                    self._pending.setdefault(user_id, profile)
+            else:
+                self._flush_latencies_ms.append((time.perf_counter() - start) * 1000)
+                self._batch_sizes.append(len(self._flushing))
+            finally:
+                self._flushing = {}
+
+    def write_behind_stats(self) -> Dict[str, Any]:
+        latencies = sorted(self._flush_latencies_ms)
+        sizes = list(self._batch_sizes)
+        return {
+            "pending": len(self._pending),
+            "merged_updates": self.merged_updates,
+            "flushes": len(sizes),
+            "mean_batch_size": sum(sizes) / len(sizes) if sizes else 0.0,
+            "max_batch_size": max(sizes, default=0),
+            "flush_p50_ms": latencies[len(latencies) // 2] if latencies else 0.0,
+            "flush_p99_ms": latencies[int(len(latencies) * 0.99)] if latencies else 0.0,
+        }
+
+    def _enqueue(self, profile: UserProfile):
+        if profile.user_id in self._pending:
+            self.merged_updates += 1
+        self._pending[profile.user_id] = profile.model_copy(deep=True)
+        self._notify(profile.user_id)
+
+    def _local_profile(self, user_id: str) -> Optional[UserProfile]:
+        """Queued write or recently validated cache entry, without touching SQLite."""
+        profile = self._pending.get(user_id) or self._flushing.get(user_id)
+        if profile is None:
+            entry = self.profile_cache.get(user_id)
+            if entry is None or time.monotonic() - entry[2] >= self.revalidate_interval:
+                return None
+            profile = entry[0]
+        # Callers mutate profiles before saving them; never hand out shared state.
+        return profile.model_copy(deep=True)
+
+    def invalidate(self, user_id: str):
+        self.profile_cache.pop(user_id)
+
+    def _cache_written(self, profiles, versions: Dict[str, int]):
+        now = time.monotonic()
+        for profile in profiles:
+            version = versions.get(profile.user_id)
+            if version is not None:
+                self.profile_cache.set(
+                    profile.user_id, (profile.model_copy(deep=True), version, now)
+                )
+
+    def _read_through(self, conn: sqlite3.Connection, user_id: str):
+        entry = self.profile_cache.get(user_id)
+        if entry is not None:
+            row = conn.execute(
+                "SELECT version FROM users WHERE user_id = ?", (user_id,)
+            ).fetchone()
+            if row is not None and row[0] == entry[1]:
+                self.profile_cache.set(user_id, (entry[0], entry[1], time.monotonic()))
+                return entry[0].model_copy(deep=True)
+        return self._fetch_profile(conn, user_id)
+
+    def _schedule_flush(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (scripts, CLI): write the batch synchronously.
+            batch, self._pending = self._pending, {}
+            try:
+                with self.db_manager.connection() as conn:
+                    versions = self._write_profiles(conn, list(batch.values()))
+                    conn.commit()
+                self._cache_written(batch.values(), versions)
+            except sqlite3.DatabaseError as e:
+                print(f"Error occurred while flushing user profiles: {e}")
+                for user_id, profile in batch.items():
+                    self._pending.setdefault(user_id, profile)
+            return
+        loop.create_task(self.flush())
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Error occurred in the user profile flush loop: {e}")
+
+    def _notify(self, user_id: str):
+        for listener in self._update_listeners:
+            listener(user_id)
+
+    @staticmethod
+    def _row_to_profile(user_data) -> UserProfile:
+        return UserProfile(
+            user_id=user_data[0],
+            preferences=json.loads(user_data[1]),
+            style_profile=json.loads(user_data[2]),
+            budget_limits=json.loads(user_data[3]),
+        )
+
+    def _fetch_profile(self, conn: sqlite3.Connection, user_id: str):
+        cursor = conn.cursor()
+        cursor.execute(
+            f"SELECT {PROFILE_COLUMNS} FROM users WHERE user_id = ?", (user_id,)
+        )
+        user_data = cursor.fetchone()
+        if user_data:
+            profile = self._row_to_profile(user_data)
+            self.profile_cache.set(user_id, (profile, user_data[4], time.monotonic()))
+            return profile.model_copy(deep=True)
+        return []
+
+    def _fetch_profiles(
+        self, conn: sqlite3.Connection, user_ids: List[str]
+    ) -> Dict[str, UserProfile]:
+        profiles = {}
+        # Chunked to stay under SQLite's bound-parameter limit.
+        for start in range(0, len(user_ids), 500):
+            chunk = user_ids[start : start + 500]
+            placeholders = ", ".join("?" for _ in chunk)
+            cursor = conn.execute(
+                f"SELECT {PROFILE_COLUMNS} FROM users WHERE user_id IN ({placeholders})",
+                chunk,
+            )
+            now = time.monotonic()
+            for user_data in cursor:
+                profile = self._row_to_profile(user_data)
+                self.profile_cache.set(user_data[0], (profile, user_data[4], now))
+                profiles[user_data[0]] = profile.model_copy(deep=True)
+        return profiles
+
+    @classmethod
+    def _write_profile(
+        cls, conn: sqlite3.Connection, profile: UserProfile
+    ) -> Dict[str, int]:
+        return cls._write_profiles(conn, [profile])
+
+    @staticmethod
+    def _write_profiles(
+        conn: sqlite3.Connection, profiles: List[UserProfile]
+    ) -> Dict[str, int]:
+        """Upsert profiles, bumping each row's version; returns the new versions."""
+        conn.executemany(
+            """
+            INSERT INTO users (user_id, preferences, style_profile, budget_limits, version)
+            VALUES (?, ?, ?, ?, 1)
+            ON CONFLICT(user_id) DO UPDATE SET
+                preferences = excluded.preferences,
+                style_profile = excluded.style_profile,
+                budget_limits = excluded.budget_limits,
+                version = COALESCE(users.version, 0) + 1
+            """,
+            [
+                (
+                    profile.user_id,
+                    json.dumps(profile.preferences),
+                    json.dumps(profile.style_profile),
+                    json.dumps(profile.budget_limits),
+                )
+                for profile in profiles
+            ],
+        )
+        versions = {}
+        user_ids = [profile.user_id for profile in profiles]
+        for start in range(0, len(user_ids), 500):
+            chunk = user_ids[start : start + 500]
+            placeholders = ", ".join("?" for _ in chunk)
+            versions.update(
+                conn.execute(
+                    f"SELECT user_id, version FROM users WHERE user_id IN ({placeholders})",
+                    chunk,
+                )
+            )
+        return versions
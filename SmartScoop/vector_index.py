@@ -0,0 +1,260 @@
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Return the column indices of the k best scores per row, best first."""
+    k = min(k, scores.shape[1])
+    if k < scores.shape[1]:
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.tile(np.arange(scores.shape[1]), (scores.shape[0], 1))
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1)
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+# VectorIndex abstracts nearest-neighbour lookup over unit-length embeddings
+class VectorIndex(ABC):
+    @abstractmethod
+    def build(self, ids: Sequence, vectors: np.ndarray):
+        """Replace the index contents."""
+
+    @abstractmethod
+    def add(self, ids: Sequence, vectors: np.ndarray):
+        """Insert new ids and overwrite the vectors of existing ones."""
+
+    @abstractmethod
+    def remove(self, ids: Sequence):
+        pass
+
+    @abstractmethod
+    def search(self, queries: np.ndarray, k: int) -> List[np.ndarray]:
+        """Return the ids of the k most similar vectors for each query row."""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+
+# Exact scan: one matrix product over every stored vector
+class BruteForceIndex(VectorIndex):
+    def __init__(self):
+        self.ids = np.empty(0, dtype=object)
+        self.vectors = np.empty((0, 0), dtype=np.float32)
+        self._positions: Dict = {}
+
+    def build(self, ids: Sequence, vectors: np.ndarray):
+        # Kept as-is so a read-only memmap from EmbeddingStore is not copied
+        self.ids = np.array(ids, dtype=object)
+        self.vectors = vectors
+        self._positions = {product_id: row for row, product_id in enumerate(self.ids)}
+
+    def add(self, ids: Sequence, vectors: np.ndarray):
+        if not len(ids):
+            return
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if not len(self.ids):
+            self.build(ids, np.ascontiguousarray(vectors))
+            return
+        matrix = np.array(self.vectors, dtype=np.float32)
+        new_ids, new_rows = [], []
+        for product_id, vector in zip(ids, vectors):
+            row = self._positions.get(product_id)
+            if row is None:
+                new_ids.append(product_id)
+                new_rows.append(vector)
+            else:
+                matrix[row] = vector
+        if new_ids:
+            matrix = np.vstack([matrix, np.asarray(new_rows, dtype=np.float32)])
+        self.build(list(self.ids) + new_ids, matrix)
+
+    def remove(self, ids: Sequence):
+        drop = set(ids)
+        keep = [row for row, product_id in enumerate(self.ids) if product_id not in drop]
+        if len(keep) != len(self.ids):
+            self.build(self.ids[keep], np.array(self.vectors[keep], dtype=np.float32))
+
+    def search(self, queries: np.ndarray, k: int) -> List[np.ndarray]:
+        if not len(self.ids):
+            return [np.empty(0, dtype=object) for _ in queries]
+        scores = queries @ self.vectors.T
+        return [self.ids[row] for row in top_k_indices(scores, k)]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+# Inverted-file index: vectors are bucketed by their nearest k-means centroid
+# and a query only scans the n_probe buckets closest to it. For search the
+# lists are packed into one matrix ordered by list (with an id array and list
+# offsets), so each probed list is scored for every query probing it with a
+# single matrix product.
+class IVFIndex(VectorIndex):
+    def __init__(
+        self,
+        n_lists: Optional[int] = None,
+        n_probe: int = 8,
+        train_iterations: int = 10,
+        max_train_size: int = 50000,
+        seed: int = 0,
+    ):
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.train_iterations = train_iterations
+        self.max_train_size = max_train_size
+        self.rng = np.random.default_rng(seed)
+        self.centroids: Optional[np.ndarray] = None
+        self._list_ids: List[List] = []
+        self._list_vectors: List[np.ndarray] = []
+        self._assignments: Dict = {}
+        # Packed search layout (vectors, ids, offsets, sizes), rebuilt on the
+        # first search after a change. Searches run on several threads, so it
+        # is built under a lock and published as one tuple.
+        self._packed: Optional[Tuple[np.ndarray, ...]] = None
+        self._pack_lock = threading.Lock()
+
+    def build(self, ids: Sequence, vectors: np.ndarray):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        self.centroids = None
+        self._list_ids, self._list_vectors, self._assignments = [], [], {}
+        self._packed = None
+        if len(ids):
+            self._train(vectors)
+            self._insert(list(ids), vectors)
+
+    def add(self, ids: Sequence, vectors: np.ndarray):
+        if not len(ids):
+            return
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.centroids is None:
+            self.build(ids, vectors)
+            return
+        self.remove([product_id for product_id in ids if product_id in self._assignments])
+        self._insert(list(ids), vectors)
+
+    def remove(self, ids: Sequence):
+        by_list: Dict[int, set] = {}
+        for product_id in ids:
+            list_no = self._assignments.pop(product_id, None)
+            if list_no is not None:
+                by_list.setdefault(list_no, set()).add(product_id)
+        for list_no, drop in by_list.items():
+            list_ids = self._list_ids[list_no]
+            keep = [row for row, product_id in enumerate(list_ids) if product_id not in drop]
+            self._list_ids[list_no] = [list_ids[row] for row in keep]
+            self._list_vectors[list_no] = self._list_vectors[list_no][keep]
+            self._packed = None
+
+    def search(self, queries: np.ndarray, k: int) -> List[np.ndarray]:
+        if self.centroids is None or not self._assignments:
+            return [np.empty(0, dtype=object) for _ in queries]
+        queries = np.asarray(queries, dtype=np.float32)
+        centroids = self.centroids
+        packed_vectors, packed_ids, offsets, list_sizes = self._pack()
+        n_probe = min(self.n_probe, len(centroids))
+        probes = top_k_indices(queries @ centroids.T, n_probe)
+        # Each query's candidates are its probed lists laid end to end; pad
+        # columns keep a score of -inf.
+        sizes = list_sizes[probes]
+        starts = np.cumsum(sizes, axis=1) - sizes
+        width = max(int(sizes.sum(axis=1).max()), 1)
+        scores = np.full((len(queries), width), -np.inf, dtype=np.float32)
+        rows = np.zeros((len(queries), width), dtype=np.int64)
+        # Group (query, probe) pairs by list: one matrix product per list.
+        pairs = np.argsort(probes.ravel(), kind="stable")
+        lists, first = np.unique(probes.ravel()[pairs], return_index=True)
+        for list_no, group in zip(lists, np.split(pairs, first[1:])):
+            lo, hi = offsets[list_no], offsets[list_no + 1]
+            if lo == hi:
+                continue
+            query_rows, probe_cols = np.divmod(group, n_probe)
+            cols = starts[query_rows, probe_cols][:, None] + np.arange(hi - lo)
+            scores[query_rows[:, None], cols] = (
+                queries[query_rows] @ packed_vectors[lo:hi].T
+            )
+            rows[query_rows[:, None], cols] = np.arange(lo, hi)
+        results = []
+        for row, best in enumerate(top_k_indices(scores, k)):
+            best = best[np.isfinite(scores[row, best])]
+            results.append(packed_ids[rows[row, best]])
+        return results
+
+    def __len__(self) -> int:
+        return len(self._assignments)
+
+    def _train(self, vectors: np.ndarray):
+        n_lists = self.n_lists or max(1, int(np.sqrt(len(vectors))))
+        n_lists = min(n_lists, len(vectors))
+        sample = vectors
+        if len(vectors) > self.max_train_size:
+            rows = self.rng.choice(len(vectors), self.max_train_size, replace=False)
+            sample = vectors[rows]
+        centroids = sample[self.rng.choice(len(sample), n_lists, replace=False)].copy()
+        for _ in range(self.train_iterations):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+            for list_no in range(n_lists):
+                members = sample[assignments == list_no]
+                if len(members):
+                    centroids[list_no] = members.mean(axis=0)
+            norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+            centroids /= np.maximum(norms, 1e-12)
+        self.centroids = centroids
+        self._list_ids = [[] for _ in range(n_lists)]
+        self._list_vectors = [
+            np.empty((0, vectors.shape[1]), dtype=np.float32) for _ in range(n_lists)
+        ]
+        self._packed = None
+        logger.info(f"Trained IVF index with {n_lists} lists on {len(sample)} vectors")
+
+    def _insert(self, ids: List, vectors: np.ndarray):
+        assignments = np.argmax(vectors @ self.centroids.T, axis=1)
+        for list_no in np.unique(assignments):
+            rows = np.flatnonzero(assignments == list_no)
+            self._list_ids[list_no].extend(ids[row] for row in rows)
+            self._list_vectors[list_no] = np.vstack(
+                [self._list_vectors[list_no], vectors[rows]]
+            )
+            for row in rows:
+                self._assignments[ids[row]] = int(list_no)
+        self._packed = None
+
+    def _pack(self) -> Tuple[np.ndarray, ...]:
+        packed = self._packed
+        if packed is not None:
+            return packed
+        with self._pack_lock:
+            if self._packed is not None:
+                return self._packed
+            sizes = np.array([len(ids) for ids in self._list_ids], dtype=np.int64)
+            offsets = np.concatenate([[0], np.cumsum(sizes)])
+            vectors = np.ascontiguousarray(
+                np.concatenate(self._list_vectors), dtype=np.float32
+            )
+            # Filled one by one so tuple ids are not broadcast into extra columns.
+            ids = np.empty(len(vectors), dtype=object)
+            for row, product_id in enumerate(
+                pid for list_ids in self._list_ids for pid in list_ids
+            ):
+                ids[row] = product_id
+            # Lists become views into the packed matrix instead of second copies.
+            self._list_vectors = [
+                vectors[lo:hi] for lo, hi in zip(offsets[:-1], offsets[1:])
+            ]
+            self._packed = (vectors, ids, offsets, sizes)
+            return self._packed
+
+
+def create_index(kind: str = "exact", **kwargs) -> VectorIndex:
+    if kind == "exact":
+        return BruteForceIndex()
+    if kind == "ivf":
+        return IVFIndex(**kwargs)
+    raise ValueError(f"Unknown vector index backend: {kind}")
@@ -0,0 +1,150 @@
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+from typing import Any, Callable, Dict, Optional
+
+import uvicorn
+from fastapi import FastAPI
+
+from SmartScoop.encoder_service import DEFAULT_MODEL, LazyModel
+
+logger = logging.getLogger(__name__)
+
+# Set in each forked worker to its slot, 0 to workers - 1. A restarted worker
+# keeps its slot, so work assigned to one slot survives crashes.
+WORKER_SLOT_ENV = "WEB_WORKER_SLOT"
+
+
+def worker_slot() -> int:
+    """This process's worker slot (0 outside multi-worker mode)."""
+    return int(os.getenv(WORKER_SLOT_ENV, "0"))
+
+
+def preload_model(model_name: str = DEFAULT_MODEL) -> LazyModel:
+    """Load the embedding model in the parent so forked workers share it.
+
+    Only the weights are loaded; nothing is encoded, so torch has not started
+    its thread pools when the workers are forked.
+    """
+    model = LazyModel(model_name)
+    model.load()
+    return model
+
+
+def serve_workers(
+    build_app: Callable[[Any], FastAPI],
+    workers: int,
+    host: str = "0.0.0.0",
+    port: int = 8000,
+    preload: Optional[Callable[[], Any]] = preload_model,
+    log_level: str = "info",
+):
+    """Serve ``build_app(shared)`` from ``workers`` forked processes.
+
+    ``build_app`` runs in each worker after its slot is set, so it can read
+    ``worker_slot()`` to split work between workers.
+
+    ``preload()`` runs once in this process and its result, typically the
+    embedding model, is handed to every worker. Forked workers share its
+    memory copy-on-write instead of each loading a copy. The listening
+    socket is bound here too and inherited, so the kernel spreads
+    connections across the workers. Each worker builds its own app, with its
+    own SQLite connections and event loop. Workers that die are restarted
+    until this process receives SIGINT or SIGTERM.
+    """
+    if not hasattr(os, "fork"):
+        raise RuntimeError("Multi-worker mode needs os.fork (Linux or macOS)")
+    shared = preload() if preload is not None else None
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    # Move everything loaded so far out of the collector's reach, so cycle
+    # collections in the workers do not write to (and un-share) those pages.
+    gc.collect()
+    gc.freeze()
+
+    children: Dict[int, int] = {}
+    stopping = False
+
+    def spawn(slot: int):
+        pid = os.fork()
+        if pid == 0:
+            _run_worker(build_app, shared, sock, slot, workers, log_level)
+        children[pid] = slot
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    logger.info(f"Serving on {host}:{port} with {workers} workers")
+    for slot in range(workers):
+        spawn(slot)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        slot = children.pop(pid, None)
+        if slot is None or stopping:
+            continue
+        code = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+        logger.warning(f"Worker {pid} exited with status {code}; restarting")
+        # Back off so a worker that crashes on startup does not spin.
+        time.sleep(1)
+        if not stopping:
+            spawn(slot)
+    sock.close()
+
+
+def _run_worker(
+    build_app: Callable[[Any], FastAPI],
+    shared: Any,
+    sock: socket.socket,
+    slot: int,
+    workers: int,
+    log_level: str,
+):
+    # uvicorn installs its own handlers for a graceful shutdown.
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    os.environ[WORKER_SLOT_ENV] = str(slot)
+    code = 0
+    try:
+        _limit_threads(workers)
+        server = uvicorn.Server(
+            uvicorn.Config(build_app(shared), log_level=log_level)
+        )
+        server.run(sockets=[sock])
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    finally:
+        # Skip interpreter teardown: it would run finalizers on objects
+        # inherited from the parent.
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(code)
+
+
+def _limit_threads(workers: int):
+    """Split the cores between workers instead of each using all of them."""
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(max(1, (os.cpu_count() or 1) // workers))
@@ -0,0 +1,181 @@
+"""Run a benchmark suite and write machine-readable results.
+
+Every benchmark runs offline against the stubs in ``benchmarks.stubs``.
+Results are written as one JSON document with the run's environment, so two
+runs can be compared; ``--compare`` prints the change of every latency and
+throughput figure against an earlier results file and exits non-zero when
+one got worse by more than ``--threshold``.
+
+Run from the repository root:
+
+    python -m benchmarks --suite quick --output results.json
+    python -m benchmarks --suite quick --output new.json --compare results.json
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import traceback
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Tuple
+
+# (module, run() keyword arguments) per suite. "quick" finishes in about a
+# minute; "full" uses the scales the individual modules default to.
+SUITES: Dict[str, List[Tuple[str, Dict[str, Any]]]] = {
+    "quick": [
+        ("chat_http", {"messages": 200, "concurrency": 20}),
+        ("recommendation", {"sizes": [1000, 10000], "repeat": 10}),
+        ("database", {"users": 2000, "seconds": 1.0, "readers": 16}),
+        ("seasonal", {"products": 100000, "loop_sample": 5000}),
+        ("price_history", {"products": 50, "days": 365, "per_day": 24}),
+        ("product_parsing", {"sizes": [1000, 5000], "repeat": 3}),
+        ("workers", {"workers": [1, 2]}),
+    ],
+    "full": [
+        ("chat_http", {"messages": 2000, "concurrency": 100}),
+        ("startup", {}),
+        ("workers", {}),
+        ("chat_load", {}),
+        ("chat_stream", {}),
+        ("agent", {}),
+        ("recommendation", {"sizes": [1000, 10000, 100000]}),
+        ("vector_index", {"size": 100000, "probes": [1, 4, 16]}),
+        ("database", {}),
+        ("seasonal", {"products": 1000000}),
+        ("price_history", {"products": 1000, "days": 365, "per_day": 24}),
+        ("price_alerts", {"alerts": 1000000, "products": 20000}),
+        ("product_parsing", {"sizes": [1000, 5000, 20000]}),
+        ("search_fanout", {"delays": [0.05, 0.2, 1.5]}),
+        ("amazon_search", {}),
+        ("upstream_resilience", {}),
+    ],
+}
+
+# Leaf keys compared between runs and whether larger values are better.
+HIGHER_IS_BETTER = ("per_s",)
+LOWER_IS_BETTER = ("_ms", "_mb", "seed_s", "load_s")
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_suite(suite: str, only: List[str] = None) -> Dict[str, Any]:
+    results = {}
+    for name, kwargs in SUITES[suite]:
+        if only and name not in only:
+            continue
+        print(f"running {name} {kwargs}", file=sys.stderr)
+        start = time.perf_counter()
+        try:
+            module = importlib.import_module(f"benchmarks.{name}")
+            results[name] = module.run(**kwargs)
+        except Exception as e:
+            # A benchmark whose optional dependencies are missing must not
+            # sink the rest of the suite.
+            traceback.print_exc()
+            results[name] = {"error": repr(e)}
+        results[name]["wall_s"] = time.perf_counter() - start
+    return {
+        "suite": suite,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+
+
+def flatten(value: Any, prefix: str = "") -> Dict[str, float]:
+    """Numeric leaves keyed by path; list items are keyed by their index."""
+    if isinstance(value, bool):
+        return {}
+    if isinstance(value, (int, float)):
+        return {prefix: float(value)}
+    items = []
+    if isinstance(value, dict):
+        items = value.items()
+    elif isinstance(value, list):
+        items = enumerate(value)
+    flat = {}
+    for key, item in items:
+        flat.update(flatten(item, f"{prefix}.{key}" if prefix else str(key)))
+    return flat
+
+
+def _direction(path: str) -> int:
+    leaf = path.rsplit(".", 1)[-1]
+    if any(leaf.endswith(suffix) for suffix in HIGHER_IS_BETTER):
+        return 1
+    if any(leaf.endswith(suffix) for suffix in LOWER_IS_BETTER):
+        return -1
+    return 0
+
+
+def compare(
+    baseline: Dict[str, Any], current: Dict[str, Any], threshold: float
+) -> Tuple[List[Dict[str, Any]], int]:
+    """Relative change of every comparable figure, and how many regressed."""
+    old = flatten(baseline["results"])
+    new = flatten(current["results"])
+    rows, regressions = [], 0
+    for path in sorted(old.keys() & new.keys()):
+        direction = _direction(path)
+        if not direction or not old[path]:
+            continue
+        change = (new[path] - old[path]) / abs(old[path])
+        regressed = direction * change < -threshold
+        regressions += regressed
+        rows.append(
+            {
+                "metric": path,
+                "baseline": old[path],
+                "current": new[path],
+                "change": change,
+                "regressed": regressed,
+            }
+        )
+    return rows, regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--suite", choices=sorted(SUITES), default="quick")
+    parser.add_argument("--only", nargs="+", help="run just these benchmarks")
+    parser.add_argument("--output", help="write results JSON here (default: stdout)")
+    parser.add_argument("--compare", help="results JSON of an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args()
+
+    report = run_suite(args.suite, args.only)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.compare:
+        with open(args.compare) as f:
+            rows, regressions = compare(json.load(f), report, args.threshold)
+        for row in rows:
+            marker = "REGRESSED" if row["regressed"] else ""
+            print(
+                f"{row['metric']:<70} {row['baseline']:>12.3f} "
+                f"{row['current']:>12.3f} {row['change']:>+8.1%} {marker}",
+                file=sys.stderr,
+            )
+        print(f"{regressions} regression(s) over {args.threshold:.0%}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
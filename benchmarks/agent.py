@@ -0,0 +1,63 @@
+"""Agent startup cost and per-message latency with a scripted fake LLM.
+
+Compares building the ReAct agent and executor on every message (the old
+behaviour, minus the hub.pull network fetch) with reusing the prebuilt ones.
+
+Run from the repository root:
+
+    python -m benchmarks.agent --messages 200
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Dict
+
+from SmartScoop.agent import ShoppingAssistantAgent
+from benchmarks.common import latency_summary
+from benchmarks.stubs import FakeProductSearch, scripted_llm
+
+
+def build_agent() -> ShoppingAssistantAgent:
+    return ShoppingAssistantAgent(
+        llm=scripted_llm(),
+        product_searches=[FakeProductSearch("amazon")],
+        user_profile_manager=None,
+        recommendation_engine=None,
+        seasonal_optimizer=None,
+    )
+
+
+async def _per_message(agent: ShoppingAssistantAgent, messages: int, rebuild: bool):
+    samples = []
+    for i in range(messages):
+        start = time.perf_counter()
+        if rebuild:
+            agent.tools = agent.create_tools()
+            agent.agent = agent._create_agent()
+            agent.agent_executor = agent._create_executor()
+            agent.agent_executor.verbose = False
+        await agent.process_message(str(i % 10), "find me a kettle")
+        samples.append((time.perf_counter() - start) * 1000)
+    return latency_summary(samples)
+
+
+def run(messages: int = 200) -> Dict:
+    start = time.perf_counter()
+    agent = build_agent()
+    startup_ms = (time.perf_counter() - start) * 1000
+    rebuilt = asyncio.run(_per_message(agent, messages, rebuild=True))
+    reused = asyncio.run(_per_message(agent, messages, rebuild=False))
+    return {
+        "benchmark": "agent",
+        "startup_ms": startup_ms,
+        "rebuild_per_message": rebuilt,
+        "reuse": reused,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=200)
+    args = parser.parse_args()
+    print(json.dumps(run(args.messages), indent=2))
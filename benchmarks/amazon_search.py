@@ -0,0 +1,69 @@
+"""Search latency with a pooled keep-alive session vs a session per request.
+
+The client-side rate limiter is set out of the way, so only connection
+handling is measured.
+
+Run from the repository root:
+
+    python -m benchmarks.amazon_search --requests 500 --concurrency 20
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Dict
+
+from SmartScoop.product_search import AmazonProductSearch
+from benchmarks.common import latency_summary
+from benchmarks.stubs import StubAmazonServer
+
+# The stub has no quota; without this the 5 rps default dominates latency.
+UNLIMITED = {"requests_per_second": 1e6, "burst": 10**6}
+
+
+async def _drive(base_url: str, requests: int, concurrency: int, pooled: bool):
+    samples = []
+    semaphore = asyncio.Semaphore(concurrency)
+    shared = AmazonProductSearch("stub-key", base_url=base_url, **UNLIMITED)
+
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            if pooled:
+                await shared.search_products(f"query {i % 50}")
+            else:
+                # Matches the old behaviour of opening a fresh session per call.
+                search = AmazonProductSearch(
+                    "stub-key", base_url=base_url, **UNLIMITED
+                )
+                await search.search_products(f"query {i % 50}")
+                await search.close()
+            samples.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    await shared.close()
+    return latency_summary(samples)
+
+
+async def _run(requests: int, concurrency: int) -> Dict:
+    server = StubAmazonServer()
+    base_url = await server.start()
+    try:
+        results = {}
+        for mode, pooled in (("session_per_request", False), ("pooled", True)):
+            results[mode] = await _drive(base_url, requests, concurrency, pooled)
+        return {"benchmark": "amazon_search", "results": results}
+    finally:
+        await server.close()
+
+
+def run(requests: int = 500, concurrency: int = 20) -> Dict:
+    return asyncio.run(_run(requests, concurrency))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    print(json.dumps(run(args.requests, args.concurrency), indent=2))
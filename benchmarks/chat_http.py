@@ -0,0 +1,130 @@
+"""End-to-end /chat load through the FastAPI app, fully offline.
+
+Serves the real app with uvicorn, with a scripted LLM in place of ChatGroq,
+a random embedding model in place of SentenceTransformer and the local
+RapidAPI stub as the Amazon endpoint. Every message runs a ReAct turn that
+calls ProductSearch, so the request exercises the agent, the search cache,
+the upstream HTTP client, price history and SQLite. The per-stage breakdown
+comes from the app's /metrics histograms.
+
+Run from the repository root:
+
+    python -m benchmarks.chat_http --messages 500 --concurrency 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import tempfile
+import time
+from typing import Dict
+
+import aiohttp
+import uvicorn
+
+from SmartScoop.app import ShoppingAssistantApp
+from SmartScoop.metrics import metrics
+from SmartScoop.server import create_app
+from benchmarks.common import latency_summary
+from benchmarks.stubs import RandomModel, StubAmazonServer, scripted_llm
+
+QUERIES = ["wireless headphones", "gaming laptop", "coffee grinder", "desk lamp"]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _run(
+    messages: int, concurrency: int, llm_latency: float, api_latency: float
+) -> Dict:
+    amazon = StubAmazonServer(latency=api_latency)
+    await amazon.start()
+    directory = tempfile.mkdtemp()
+    assistant = ShoppingAssistantApp(
+        {
+            "db_name": os.path.join(directory, "bench.db"),
+            "AMAZON_API_KEY": "benchmark",
+            "amazon_base_url": amazon.base_url,
+            "chat_summarize": False,
+            # The stub has no quota; keep the client-side limiter out of the way.
+            "amazon_requests_per_second": 1e6,
+        },
+        llm=scripted_llm(tool="ProductSearch", latency=llm_latency),
+        embedding_model=RandomModel(),
+    )
+    assistant.agent.agent_executor.verbose = False
+    port = _free_port()
+    server = uvicorn.Server(
+        uvicorn.Config(
+            create_app(assistant), host="127.0.0.1", port=port, log_level="warning"
+        )
+    )
+    serving = asyncio.ensure_future(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    metrics.reset()
+    url = f"http://127.0.0.1:{port}"
+    semaphore = asyncio.Semaphore(concurrency)
+    samples, errors = [], 0
+    async with aiohttp.ClientSession() as session:
+
+        async def one(i: int):
+            nonlocal errors
+            body = {"user_id": f"user{i % 200}", "message": QUERIES[i % len(QUERIES)]}
+            async with semaphore:
+                start = time.perf_counter()
+                async with session.post(f"{url}/chat", json=body) as response:
+                    await response.read()
+                    if response.status != 200:
+                        errors += 1
+                samples.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(messages)))
+        elapsed = time.perf_counter() - start
+        async with session.get(f"{url}/metrics") as response:
+            exposition = await response.text()
+
+    server.should_exit = True
+    await serving
+    await amazon.close()
+    return {
+        "benchmark": "chat_http",
+        "messages": messages,
+        "concurrency": concurrency,
+        "throughput_per_s": messages / elapsed,
+        "errors": errors,
+        "latency": latency_summary(samples),
+        "upstream_requests": amazon.requests,
+        "stages": metrics.summary(),
+        "metrics_bytes": len(exposition),
+    }
+
+
+def run(
+    messages: int = 500,
+    concurrency: int = 50,
+    llm_latency: float = 0.05,
+    api_latency: float = 0.05,
+) -> Dict:
+    return asyncio.run(_run(messages, concurrency, llm_latency, api_latency))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--api-latency", type=float, default=0.05)
+    args = parser.parse_args()
+    print(
+        json.dumps(
+            run(args.messages, args.concurrency, args.llm_latency, args.api_latency),
+            indent=2,
+        )
+    )
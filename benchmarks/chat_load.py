@@ -0,0 +1,72 @@
+"""Throughput of many simultaneous chat messages that each call a tool.
+
+Every message runs a ReAct turn that calls ProductSearch against a fake
+backend, so tool calls from different users overlap on one event loop.
+
+Run from the repository root:
+
+    python -m benchmarks.chat_load --messages 500 --concurrency 50
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Dict
+
+from SmartScoop.agent import ShoppingAssistantAgent
+from benchmarks.common import latency_summary
+from benchmarks.stubs import FakeProductSearch, scripted_llm
+
+
+async def _run(messages: int, concurrency: int, llm_latency: float, search_delay: float):
+    agent = ShoppingAssistantAgent(
+        llm=scripted_llm(tool="ProductSearch", latency=llm_latency),
+        product_searches=[FakeProductSearch("amazon", delay=search_delay)],
+        user_profile_manager=None,
+        recommendation_engine=None,
+        seasonal_optimizer=None,
+    )
+    agent.agent_executor.verbose = False
+    semaphore = asyncio.Semaphore(concurrency)
+    samples = []
+
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            await agent.process_message(str(i), "find wireless headphones")
+            samples.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(messages)))
+    elapsed = time.perf_counter() - start
+    return {
+        "benchmark": "chat_load",
+        "messages": messages,
+        "concurrency": concurrency,
+        "throughput_per_s": messages / elapsed,
+        "latency": latency_summary(samples),
+    }
+
+
+def run(
+    messages: int = 500,
+    concurrency: int = 50,
+    llm_latency: float = 0.05,
+    search_delay: float = 0.1,
+) -> Dict:
+    return asyncio.run(_run(messages, concurrency, llm_latency, search_delay))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--search-delay", type=float, default=0.1)
+    args = parser.parse_args()
+    print(
+        json.dumps(
+            run(args.messages, args.concurrency, args.llm_latency, args.search_delay),
+            indent=2,
+        )
+    )
@@ -0,0 +1,93 @@
+"""Time to first byte of /chat-style vs streamed replies, and cancellation.
+
+Uses a scripted LLM that streams its reply word by word and a fake search
+backend, so a message costs two LLM round-trips plus one product search.
+The cancellation run closes each stream at its first tool call, the way the
+``/chat/stream`` endpoint does when the client disconnects, and counts the
+LLM calls that still happen afterwards.
+
+Run from the repository root:
+
+    python -m benchmarks.chat_stream --messages 50
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Dict
+
+from SmartScoop.agent import ShoppingAssistantAgent
+from benchmarks.common import latency_summary
+from benchmarks.stubs import FakeProductSearch, scripted_llm
+
+
+def build_agent(token_latency: float, search_delay: float) -> ShoppingAssistantAgent:
+    agent = ShoppingAssistantAgent(
+        llm=scripted_llm(tool="ProductSearch", token_latency=token_latency),
+        product_searches=[FakeProductSearch("amazon", delay=search_delay)],
+        user_profile_manager=None,
+        recommendation_engine=None,
+        seasonal_optimizer=None,
+    )
+    agent.agent_executor.verbose = False
+    return agent
+
+
+async def _run(messages: int, token_latency: float, search_delay: float) -> Dict:
+    agent = build_agent(token_latency, search_delay)
+    blocking_ms = []
+    for i in range(messages):
+        start = time.perf_counter()
+        await agent.process_message(f"blocking{i}", "find wireless headphones")
+        blocking_ms.append((time.perf_counter() - start) * 1000)
+
+    first_token_ms, first_tool_ms, total_ms = [], [], []
+    for i in range(messages):
+        start = time.perf_counter()
+        first_token = first_tool = None
+        async for event in agent.stream_message(f"stream{i}", "find headphones"):
+            elapsed = (time.perf_counter() - start) * 1000
+            if event["type"] == "token" and first_token is None:
+                first_token = elapsed
+            elif event["type"] == "tool_start" and first_tool is None:
+                first_tool = elapsed
+        total_ms.append((time.perf_counter() - start) * 1000)
+        first_token_ms.append(first_token)
+        first_tool_ms.append(first_tool)
+
+    llm = agent.llm
+    calls_before = llm.calls
+    for i in range(messages):
+        stream = agent.stream_message(f"cancel{i}", "find wireless headphones")
+        async for event in stream:
+            if event["type"] == "tool_start":
+                break
+        await stream.aclose()
+    await asyncio.sleep(search_delay + token_latency * 20)
+    return {
+        "benchmark": "chat_stream",
+        "messages": messages,
+        "blocking_response": latency_summary(blocking_ms),
+        "stream_first_token": latency_summary(first_token_ms),
+        "stream_first_tool": latency_summary(first_tool_ms),
+        "stream_complete": latency_summary(total_ms),
+        # A completed message makes two LLM calls; a cancelled one only the first.
+        "llm_calls_per_cancelled_message": (llm.calls - calls_before) / messages,
+    }
+
+
+def run(messages: int = 50, token_latency: float = 0.01, search_delay: float = 0.2):
+    return asyncio.run(_run(messages, token_latency, search_delay))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=50)
+    parser.add_argument("--token-latency", type=float, default=0.01)
+    parser.add_argument("--search-delay", type=float, default=0.2)
+    args = parser.parse_args()
+    print(
+        json.dumps(
+            run(args.messages, args.token_latency, args.search_delay), indent=2
+        )
+    )
@@ -0,0 +1,134 @@
+"""Profile reads per second while writes run alongside them.
+
+Compares the pooled WAL-mode DatabaseManager (reads on reader threads, writes
+on the writer thread) with opening a fresh sqlite3 connection per call on
+the event loop, as UserProfileManager used to. Both run with the profile
+cache off so every read reaches SQLite; ``pooled_wal_cached`` repeats the
+pooled runs with the default read-through cache.
+
+Run from the repository root:
+
+    python -m benchmarks.database --users 10000 --seconds 5 --readers 32
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from typing import Dict
+
+from SmartScoop.database import DatabaseManager
+from SmartScoop.user_profile import UserProfile, UserProfileManager
+
+
+def _seed(manager: UserProfileManager, users: int):
+    with manager.db_manager.connection() as conn:
+        for user_id in range(users):
+            manager._write_profile(conn, _profile(user_id))
+        conn.commit()
+
+
+def _profile(user_id: int) -> UserProfile:
+    return UserProfile(
+        user_id=str(user_id),
+        preferences={"size": "M", "color": random.choice(["red", "blue", "black"])},
+        style_profile={"style": "casual"},
+        budget_limits={"monthly": 200},
+    )
+
+
+def _connect_per_call_read(db_name: str, user_id: str):
+    with sqlite3.connect(db_name) as conn:
+        row = conn.execute("SELECT * FROM users WHERE user_id = ?", (user_id,)).fetchone()
+        return UserProfileManager._row_to_profile(row)
+
+
+def _connect_per_call_write(db_name: str, profile: UserProfile):
+    with sqlite3.connect(db_name) as conn:
+        UserProfileManager._write_profile(conn, profile)
+        conn.commit()
+
+
+async def _load(manager, users: int, seconds: float, readers: int, writes: bool, pooled: bool):
+    db_name = manager.db_manager.db_name
+    reads = 0
+    written = 0
+    deadline = time.perf_counter() + seconds
+
+    async def reader():
+        nonlocal reads
+        while time.perf_counter() < deadline:
+            user_id = str(random.randrange(users))
+            if pooled:
+                await manager.aget_user_profile(user_id)
+            else:
+                _connect_per_call_read(db_name, user_id)
+                await asyncio.sleep(0)
+            reads += 1
+
+    async def writer():
+        nonlocal written
+        while time.perf_counter() < deadline:
+            profile = _profile(random.randrange(users))
+            if pooled:
+                await manager.aupdate_user_profile(profile)
+            else:
+                _connect_per_call_write(db_name, profile)
+                await asyncio.sleep(0)
+            written += 1
+
+    tasks = [reader() for _ in range(readers)]
+    if writes:
+        tasks.append(writer())
+    await asyncio.gather(*tasks)
+    return {"reads_per_s": reads / seconds, "writes_per_s": written / seconds}
+
+
+async def _write_behind(manager: UserProfileManager, users: int, updates: int) -> Dict:
+    manager.write_behind = True
+    manager.start()
+    start = time.perf_counter()
+    for _ in range(updates):
+        await manager.aupdate_user_profile(_profile(random.randrange(users)))
+        await asyncio.sleep(0)
+    await manager.close()
+    elapsed = time.perf_counter() - start
+    manager.write_behind = False
+    return {
+        "updates_per_s": updates / elapsed,
+        **manager.write_behind_stats(),
+    }
+
+
+def run(users: int = 10000, seconds: float = 5.0, readers: int = 32) -> Dict:
+    with tempfile.TemporaryDirectory() as directory:
+        db_manager = DatabaseManager(os.path.join(directory, "bench.db"))
+        manager = UserProfileManager(db_manager)
+        uncached = UserProfileManager(db_manager, cache_size=0)
+        _seed(manager, users)
+        results = {}
+        for mode, pooled, profiles in (
+            ("connect_per_call", False, uncached),
+            ("pooled_wal", True, uncached),
+            ("pooled_wal_cached", True, manager),
+        ):
+            for writes in (False, True):
+                key = f"{mode}_{'with' if writes else 'without'}_writes"
+                results[key] = asyncio.run(
+                    _load(profiles, users, seconds, readers, writes, pooled)
+                )
+        results["write_behind"] = asyncio.run(_write_behind(manager, users, 50000))
+        db_manager.close()
+    return {"benchmark": "database", "users": users, "readers": readers, "results": results}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--readers", type=int, default=32)
+    args = parser.parse_args()
+    print(json.dumps(run(args.users, args.seconds, args.readers), indent=2))
@@ -0,0 +1,132 @@
+"""Price alert refresh cost with many alerts on a fake search backend.
+
+Seeds ``--alerts`` armed alerts spread over ``--products`` ASINs, then times
+loading the target-price index, how long reloading it stalls the event loop,
+full refresh cycles of ``--budget`` lookups each, and matching a price against one product's alerts.
+
+Run from the repository root:
+
+    python -m benchmarks.price_alerts --alerts 1000000 --products 20000 --budget 500
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+import uuid
+from typing import Dict
+
+import numpy as np
+
+from SmartScoop.database import DatabaseManager
+from SmartScoop.price_alerts import PriceAlertEngine
+from benchmarks.common import latency_summary
+from benchmarks.stubs import FakeProductSearch
+
+
+def _seed(db_manager: DatabaseManager, alerts: int, products: int):
+    rng = np.random.default_rng(0)
+    asins = rng.integers(0, products, alerts)
+    # FakeProductSearch prices everything at $19.99, so about half fire.
+    targets = np.round(rng.uniform(10, 30, alerts), 2)
+    with db_manager.connection() as conn:
+        conn.executemany(
+            """
+            INSERT INTO price_alerts (alert_id, user_id, product_id, target_price)
+            VALUES (?, ?, ?, ?)
+            """,
+            (
+                (uuid.uuid4().hex, f"user{i % 100000}", f"ASIN{asin:07d}", float(target))
+                for i, (asin, target) in enumerate(zip(asins, targets))
+            ),
+        )
+        conn.commit()
+
+
+async def _max_loop_stall(awaitable) -> float:
+    longest = 0.0
+    last = time.perf_counter()
+
+    async def tick():
+        nonlocal longest, last
+        while True:
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            longest = max(longest, now - last)
+            last = now
+
+    ticker = asyncio.ensure_future(tick())
+    await asyncio.sleep(0)
+    try:
+        await awaitable
+    finally:
+        ticker.cancel()
+    # The gap since the last tick, in case the stall came at the very end.
+    return max(longest, time.perf_counter() - last)
+
+
+async def _run(alerts: int, products: int, budget: int, delay: float) -> Dict:
+    directory = tempfile.mkdtemp()
+    db_manager = DatabaseManager(os.path.join(directory, "alerts.db"))
+    start = time.perf_counter()
+    _seed(db_manager, alerts, products)
+    seed_s = time.perf_counter() - start
+
+    backend = FakeProductSearch("fake", delay=delay, count=1)
+    engine = PriceAlertEngine(
+        db_manager, backend, refresh_budget=budget, concurrency=50
+    )
+    start = time.perf_counter()
+    await engine.load()
+    load_s = time.perf_counter() - start
+    armed = len(engine.index)
+    # The longest the event loop goes without running a ticking task while
+    # the alerts are reloaded, as every worker does every refresh cycle.
+    stall_s = await _max_loop_stall(engine.load())
+
+    cycle_ms = []
+    fired = 0
+    while engine.index.asins() and len(cycle_ms) * budget < products:
+        start = time.perf_counter()
+        fired += len(await engine.refresh())
+        cycle_ms.append((time.perf_counter() - start) * 1000)
+
+    # Matching only: re-arm one product's alerts and match a single price.
+    await engine.load()
+    match_ms = []
+    for asin in engine.index.asins()[:200]:
+        start = time.perf_counter()
+        engine.index.pop_matches(asin, 15.0)
+        match_ms.append((time.perf_counter() - start) * 1000)
+    db_manager.close()
+    return {
+        "benchmark": "price_alerts",
+        "alerts": alerts,
+        "products": products,
+        "seed_s": seed_s,
+        "index_load_s": load_s,
+        "reload_loop_stall_ms": stall_s * 1000,
+        "armed": armed,
+        "lookups": engine.lookups,
+        "backend_calls": backend.calls,
+        "fired": fired,
+        "refresh_cycle": latency_summary(cycle_ms),
+        "match": latency_summary(match_ms),
+    }
+
+
+def run(alerts: int, products: int, budget: int = 500, delay: float = 0.0) -> Dict:
+    return asyncio.run(_run(alerts, products, budget, delay))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--alerts", type=int, default=1000000)
+    parser.add_argument("--products", type=int, default=20000)
+    parser.add_argument("--budget", type=int, default=500)
+    parser.add_argument("--delay", type=float, default=0.0)
+    args = parser.parse_args()
+    print(
+        json.dumps(run(args.alerts, args.products, args.budget, args.delay), indent=2)
+    )
@@ -0,0 +1,83 @@
+"""Latency of one product's year-long price range query as history grows.
+
+Seeds ``--products`` products with ``--per-day`` observations a day for
+``--days`` days, then times raw range queries and daily-rollup stats for
+random products.
+
+Run from the repository root:
+
+    python -m benchmarks.price_history --products 1000 --days 365 --per-day 24
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from typing import Dict
+
+import numpy as np
+
+from SmartScoop.database import DatabaseManager
+from SmartScoop.price_history import DAY, PriceHistoryStore
+
+from benchmarks.common import latency_summary
+
+
+def _seed(store: PriceHistoryStore, products: int, days: int, per_day: int, now: int):
+    rng = np.random.default_rng(0)
+    step = DAY // per_day
+    offsets = np.arange(days * per_day) * step
+    with store.db_manager.connection() as conn:
+        for product in range(products):
+            walk = 100 + np.cumsum(rng.normal(0, 0.5, len(offsets)))
+            cents = np.maximum(walk, 1) * 100
+            points = [
+                (f"ASIN{product:07d}", int(now - offset), int(price), None)
+                for offset, price in zip(offsets, cents)
+            ]
+            store._insert_points(conn, points)
+            conn.commit()
+
+
+def run(products: int, days: int, per_day: int, queries: int = 500) -> Dict:
+    directory = tempfile.mkdtemp()
+    db_manager = DatabaseManager(os.path.join(directory, "prices.db"))
+    store = PriceHistoryStore(db_manager, stats_cache_ttl=0.000001)
+    now = int(time.time())
+    start = time.perf_counter()
+    _seed(store, products, days, per_day, now)
+    seed_s = time.perf_counter() - start
+
+    rng = np.random.default_rng(1)
+    asins = [f"ASIN{i:07d}" for i in rng.integers(0, products, queries)]
+    range_ms, stats_ms = [], []
+    points = 0
+    for asin in asins:
+        start = time.perf_counter()
+        timestamps, _ = store.history(asin, since=now - 365 * DAY)
+        range_ms.append((time.perf_counter() - start) * 1000)
+        points += len(timestamps)
+        start = time.perf_counter()
+        store.stats(asin)
+        stats_ms.append((time.perf_counter() - start) * 1000)
+    db_manager.close()
+    return {
+        "benchmark": "price_history",
+        "products": products,
+        "rows": products * days * per_day,
+        "seed_s": seed_s,
+        "db_bytes": os.path.getsize(os.path.join(directory, "prices.db")),
+        "points_per_query": points / queries,
+        "year_range_query": latency_summary(range_ms),
+        "daily_stats": latency_summary(stats_ms),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--per-day", type=int, default=24)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+    print(json.dumps(run(args.products, args.days, args.per_day, args.queries), indent=2))
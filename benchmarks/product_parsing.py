@@ -0,0 +1,110 @@
+"""Time and memory of parsing large search responses: dicts vs Product records.
+
+For each size the same JSON response is parsed into the legacy 11-key dicts
+(prices and ratings left as strings) and into ``Product`` records, then
+formatted into the agent's tool output. Memory is what the parsed results
+retain once the decoded response has been dropped.
+
+Run from the repository root:
+
+    python -m benchmarks.product_parsing --sizes 1000 5000 20000
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from SmartScoop.product import iter_products
+from benchmarks.stubs import fake_products
+
+
+def _legacy_parse(response: Dict) -> List[Dict]:
+    return [
+        {
+            "asin": product.get("asin"),
+            "title": product.get("product_title"),
+            "price": product.get("product_price"),
+            "original_price": product.get("product_original_price"),
+            "rating": product.get("product_star_rating"),
+            "num_ratings": product.get("product_num_ratings"),
+            "url": product.get("product_url"),
+            "image": product.get("product_photo"),
+            "is_prime": product.get("is_prime"),
+            "delivery": product.get("delivery"),
+            "sales_volume": product.get("sales_volume"),
+        }
+        for product in response["data"]["products"]
+    ]
+
+
+def _legacy_format(products: List[Dict]) -> str:
+    formatted_results = [
+        f"- {product['title']}\n ${product['price']} \nLink: ({product['url']})\n Rating: {product['delivery']}/5 ({product['rating']})"
+        for product in products
+    ]
+    return "Found these products:\n" + "\n".join(formatted_results)
+
+
+def _record_parse(response: Dict) -> List:
+    return list(iter_products(response["data"]["products"]))
+
+
+def _record_format(products: List) -> str:
+    return "Found these products:\n" + "\n".join(
+        product.summary() for product in products
+    )
+
+
+def _measure(body: bytes, parse: Callable, format_: Callable, repeat: int) -> Dict:
+    parse_ms, format_ms = [], []
+    for _ in range(repeat):
+        response = json.loads(body)
+        start = time.perf_counter()
+        products = parse(response)
+        parse_ms.append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        format_(products)
+        format_ms.append((time.perf_counter() - start) * 1000)
+
+    gc.collect()
+    tracemalloc.start()
+    response = json.loads(body)
+    products = parse(response)
+    del response
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del products
+    return {
+        "parse_ms": min(parse_ms),
+        "format_ms": min(format_ms),
+        "retained_kib": retained / 1024,
+        "peak_kib": peak / 1024,
+    }
+
+
+def run(sizes: List[int], repeat: int = 5) -> Dict:
+    results = []
+    for size in sizes:
+        body = json.dumps(
+            {"status": "OK", "data": {"products": fake_products("laptop", size)}}
+        ).encode()
+        results.append(
+            {
+                "products": size,
+                "response_kib": len(body) / 1024,
+                "dicts": _measure(body, _legacy_parse, _legacy_format, repeat),
+                "records": _measure(body, _record_parse, _record_format, repeat),
+            }
+        )
+    return {"benchmark": "product_parsing", "results": results}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    print(json.dumps(run(args.sizes, args.repeat), indent=2))
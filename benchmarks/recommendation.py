@@ -0,0 +1,61 @@
+"""Recommendation latency against catalog size.
+
+Run from the repository root:
+
+    python -m benchmarks.recommendation --sizes 1000 10000 100000
+"""
+import argparse
+import json
+import time
+from typing import Dict, List
+
+from SmartScoop.recommendation import RecommendationEngine
+from SmartScoop.user_profile import UserProfile
+from benchmarks.stubs import RandomModel
+
+
+class StaticProfileManager:
+    def get_user_profile(self, user_id: str) -> UserProfile:
+        return UserProfile(user_id=user_id, preferences={"size": "M", "color": user_id})
+
+    def add_update_listener(self, listener):
+        pass
+
+
+def _time(fn, repeat: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def run(sizes: List[int], batch_size: int = 64, repeat: int = 20) -> Dict:
+    results = []
+    for size in sizes:
+        engine = RecommendationEngine(StaticProfileManager(), model=RandomModel())
+        engine.update_product_embeddings(
+            [{"id": i, "description": f"product {i}"} for i in range(size)]
+        )
+        user_ids = [str(i) for i in range(batch_size)]
+        results.append(
+            {
+                "catalog_size": size,
+                "single_ms": _time(lambda: engine.get_recommendations("1"), repeat),
+                "batch_size": batch_size,
+                "batch_ms": _time(
+                    lambda: engine.get_batch_recommendations(user_ids), repeat
+                ),
+                "user_vector_cache": engine.user_vector_cache.stats(),
+            }
+        )
+    return {"benchmark": "recommendation", "results": results}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    print(json.dumps(run(args.sizes, args.batch_size, args.repeat), indent=2))
@@ -0,0 +1,62 @@
+"""Sequential vs concurrent fan-out across search backends with injected delays.
+
+Run from the repository root:
+
+    python -m benchmarks.search_fanout --delays 0.05 0.2 1.5 --timeout 1.0
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Dict, List
+
+from SmartScoop.search_aggregator import SearchAggregator
+from benchmarks.stubs import FakeProductSearch
+
+
+async def _run(delays: List[float], timeout: float) -> Dict:
+    backends = [
+        FakeProductSearch(f"backend-{i}", delay) for i, delay in enumerate(delays)
+    ]
+
+    start = time.perf_counter()
+    sequential = []
+    for backend in backends:
+        sequential.extend(await backend.search_products("headphones"))
+    sequential_ms = (time.perf_counter() - start) * 1000
+
+    aggregator = SearchAggregator(backends, timeout=timeout)
+    start = time.perf_counter()
+    merged = await aggregator.search("headphones")
+    fanout_ms = (time.perf_counter() - start) * 1000
+
+    arrivals = []
+    start = time.perf_counter()
+    async for name, results in aggregator.stream("headphones"):
+        arrivals.append(
+            {
+                "backend": name,
+                "results": len(results),
+                "at_ms": (time.perf_counter() - start) * 1000,
+            }
+        )
+    return {
+        "benchmark": "search_fanout",
+        "delays_s": delays,
+        "timeout_s": timeout,
+        "sequential": {"ms": sequential_ms, "results": len(sequential)},
+        "fanout": {"ms": fanout_ms, "results": len(merged)},
+        "stream": arrivals,
+    }
+
+
+def run(delays: List[float], timeout: float = 1.0) -> Dict:
+    return asyncio.run(_run(delays, timeout))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--delays", type=float, nargs="+", default=[0.05, 0.2, 1.5])
+    parser.add_argument("--timeout", type=float, default=1.0)
+    args = parser.parse_args()
+    print(json.dumps(run(args.delays, args.timeout), indent=2))
@@ -0,0 +1,73 @@
+"""Sale predictions per second: per-product calls against the batch API.
+
+Products get random purchase dates and waiting horizons so every lookup hits
+a different slice of the calendar.
+
+Run from the repository root:
+
+    python -m benchmarks.seasonal --products 100000
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Dict
+
+import numpy as np
+
+from SmartScoop.seasonal_discount import DISCOUNTS, SeasonalOptimizer
+
+
+def _optimizer() -> SeasonalOptimizer:
+    optimizer = SeasonalOptimizer()
+    starts = {
+        "christmas": datetime(2025, 12, 24),
+        "black_friday": datetime(2025, 11, 28),
+        "cyber_monday": datetime(2025, 12, 1),
+        "prime_day": datetime(2025, 7, 15),
+        "back_to_school": datetime(2025, 8, 1),
+    }
+    for event, discount in DISCOUNTS.items():
+        start = starts[event.value]
+        optimizer.register_event(event, start, start + timedelta(days=2), discount)
+    return optimizer
+
+
+def run(products: int, loop_sample: int = 20000) -> Dict:
+    rng = np.random.default_rng(0)
+    optimizer = _optimizer()
+    prices = rng.uniform(5, 500, products)
+    now = np.datetime64("2026-01-01T00:00:00") + rng.integers(
+        0, 365 * 86400, products
+    ).astype("timedelta64[s]")
+    horizons = rng.integers(7, 180, products)
+    optimizer.predict_sales(prices[:1], now[:1], horizons[:1])
+
+    start = time.perf_counter()
+    optimizer.predict_sales(prices, now, horizons)
+    batch_s = time.perf_counter() - start
+
+    sample = min(loop_sample, products)
+    start = time.perf_counter()
+    for i in range(sample):
+        upcoming = optimizer.upcoming_events(now[i].astype(datetime), int(horizons[i]))
+        max(upcoming, key=lambda event: event["discount"], default=None)
+    loop_s = (time.perf_counter() - start) * products / sample
+
+    return {
+        "benchmark": "seasonal",
+        "products": products,
+        "batch_s": batch_s,
+        "batch_products_per_s": products / batch_s,
+        "loop_s_estimated": loop_s,
+        "loop_products_per_s": products / loop_s,
+        "speedup": loop_s / batch_s,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--loop-sample", type=int, default=20000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.products, args.loop_sample), indent=2))
@@ -0,0 +1,118 @@
+"""Cold-start time of the app: lazy model loading vs loading it up front.
+
+Each sample is a fresh interpreter that imports ``SmartScoop.app``, builds
+``ShoppingAssistantApp`` and runs its startup, i.e. everything before the
+server can accept traffic. In ``eager`` mode the embedding model is also
+loaded before serving, as it was when ``RecommendationEngine`` loaded it in
+its constructor; in ``lazy`` mode it is loaded by the background warm-up,
+whose end is reported as ``ready_ms``. ``heavy_modules`` lists which of
+sentence_transformers/torch/sklearn were imported by the time of serving.
+
+This loads the real SentenceTransformer model, so it needs
+sentence_transformers installed and the model available locally.
+
+Run from the repository root:
+
+    python -m benchmarks.startup --repeat 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+HEAVY_MODULES = ("sentence_transformers", "torch", "sklearn")
+
+
+def _child(mode: str, directory: str) -> Dict:
+    start = time.perf_counter()
+    from SmartScoop.app import ShoppingAssistantApp
+
+    imported = time.perf_counter()
+    app = ShoppingAssistantApp(
+        {
+            "db_name": os.path.join(directory, "bench.db"),
+            "embedding_store_dir": os.path.join(directory, "embeddings"),
+            "AMAZON_API_KEY": "benchmark",
+            "GROQ_API_KEY": "benchmark",
+        }
+    )
+    constructed = time.perf_counter()
+
+    async def serve_and_warm_up():
+        await app.startup()
+        if mode == "eager":
+            app.recommendation_engine.model.load()
+        serving = time.perf_counter()
+        heavy = [name for name in HEAVY_MODULES if name in sys.modules]
+        await app.warm_up()
+        ready = time.perf_counter()
+        await app.shutdown()
+        return serving, ready, heavy
+
+    serving, ready, heavy = asyncio.run(serve_and_warm_up())
+    return {
+        "import_ms": (imported - start) * 1000,
+        "construct_ms": (constructed - imported) * 1000,
+        "serve_ms": (serving - start) * 1000,
+        "ready_ms": (ready - start) * 1000,
+        "heavy_modules": heavy,
+        "warm_up_error": app.warm_up_error,
+    }
+
+
+def _sample(mode: str) -> Dict:
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, "-m", "benchmarks.startup", "--child", mode, directory],
+            capture_output=True,
+            text=True,
+        )
+        wall = time.perf_counter() - start
+    if completed.returncode:
+        raise RuntimeError(f"{mode} startup failed:\n{completed.stderr}")
+    sample = json.loads(completed.stdout.strip().splitlines()[-1])
+    sample["process_ms"] = wall * 1000
+    return sample
+
+
+def _best(samples: List[Dict]) -> Dict:
+    best = {
+        key: min(sample[key] for sample in samples)
+        for key in samples[0]
+        if key.endswith("_ms")
+    }
+    best["heavy_modules"] = samples[0]["heavy_modules"]
+    best["warm_up_error"] = samples[0]["warm_up_error"]
+    return best
+
+
+def run(repeat: int = 3) -> Dict:
+    results = {
+        mode: _best([_sample(mode) for _ in range(repeat)])
+        for mode in ("eager", "lazy")
+    }
+    return {
+        "benchmark": "startup",
+        "repeat": repeat,
+        "results": results,
+        "serve_speedup": results["eager"]["serve_ms"] / results["lazy"]["serve_ms"],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--child", nargs=2, metavar=("MODE", "DIR"), help=argparse.SUPPRESS
+    )
+    args = parser.parse_args()
+    if args.child:
+        print(json.dumps(_child(*args.child)))
+    else:
+        print(json.dumps(run(args.repeat), indent=2))
@@ -0,0 +1,218 @@
+"""Local stand-ins for the external services the app talks to."""
+import asyncio
+import time
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Set
+
+import numpy as np
+from aiohttp import web
+from langchain_core.language_models.llms import LLM
+from langchain_core.outputs import GenerationChunk
+
+from SmartScoop.product import Product, iter_products
+from SmartScoop.product_search import ProductSearchInterface
+
+
+EMBEDDING_DIM = 384
+
+
+def fake_products(query: str, count: int = 20) -> List[Dict]:
+    return [
+        {
+            "asin": f"B{abs(hash((query, i))) % 10**9:09d}",
+            "product_title": f"{query.title()} model {i}",
+            "product_price": f"${19.99 + i:.2f}",
+            "product_original_price": f"${29.99 + i:.2f}",
+            "product_star_rating": f"{3.5 + (i % 3) * 0.5:.1f}",
+            "product_num_ratings": 100 + i,
+            "product_url": f"https://www.amazon.com/dp/B{i:09d}",
+            "product_photo": f"https://m.media-amazon.com/images/{i}.jpg",
+            "is_prime": i % 2 == 0,
+            "delivery": "FREE delivery",
+            "sales_volume": f"{i}K+ bought in past month",
+        }
+        for i in range(count)
+    ]
+
+
+def fake_details(asin: str) -> Dict:
+    """What a details lookup for ``asin`` returns: one product with that ASIN."""
+    product = fake_products(asin, 1)[0]
+    product["asin"] = asin
+    return product
+
+
+class ScriptedReActLLM(LLM):
+    """Deterministic ReAct LLM for offline runs.
+
+    The first turn of every request calls ``tool`` (if set); once the prompt
+    contains an observation it gives the final answer. ``latency`` simulates
+    the model's response time without blocking the event loop. When streamed,
+    the reply arrives word by word, ``token_latency`` apart; ``calls`` counts
+    started generations.
+    """
+
+    tool: Optional[str] = None
+    tool_input: str = "wireless headphones"
+    latency: float = 0.0
+    token_latency: float = 0.0
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-react"
+
+    def _reply(self, prompt: str) -> str:
+        if self.tool and "Observation:" not in prompt.rsplit("Question:", 1)[-1]:
+            return (
+                f"Thought: I should use a tool\nAction: {self.tool}\n"
+                f"Action Input: {self.tool_input}"
+            )
+        return "Thought: I now know the final answer\nFinal Answer: Here you go."
+
+    def _call(self, prompt: str, stop=None, run_manager=None, **kwargs) -> str:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self._reply(prompt)
+
+    async def _acall(self, prompt: str, stop=None, run_manager=None, **kwargs) -> str:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._reply(prompt)
+
+    def _stream(
+        self, prompt: str, stop=None, run_manager=None, **kwargs
+    ) -> Iterator[GenerationChunk]:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        for word in self._reply(prompt).split(" "):
+            if self.token_latency:
+                time.sleep(self.token_latency)
+            chunk = GenerationChunk(text=word + " ")
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    async def _astream(
+        self, prompt: str, stop=None, run_manager=None, **kwargs
+    ) -> AsyncIterator[GenerationChunk]:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        for word in self._reply(prompt).split(" "):
+            if self.token_latency:
+                await asyncio.sleep(self.token_latency)
+            chunk = GenerationChunk(text=word + " ")
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+
+def scripted_llm(**kwargs) -> ScriptedReActLLM:
+    return ScriptedReActLLM(**kwargs)
+
+
+class StubAmazonServer:
+    """Serves the RapidAPI ``/search`` and ``/{asin}`` routes on localhost.
+
+    ``latency`` adds a fixed server-side delay and ``fail_statuses`` makes the
+    next responses return those HTTP statuses, e.g. ``[429, 503]``.
+    ``connections`` collects the client address of every request, so reused
+    keep-alive connections show up as one entry.
+    """
+
+    def __init__(self, latency: float = 0.0, products_per_page: int = 20):
+        self.latency = latency
+        self.products_per_page = products_per_page
+        self.fail_statuses: List[int] = []
+        self.retry_after: Optional[str] = None
+        self.requests = 0
+        self.connections: Set = set()
+        self._runner: Optional[web.AppRunner] = None
+        self.base_url = ""
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        app = web.Application()
+        app.router.add_get("/search", self._search)
+        app.router.add_get("/{asin}", self._details)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{host}:{port}"
+        return self.base_url
+
+    async def close(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def _respond(
+        self, request: web.Request, products: List[Dict]
+    ) -> web.Response:
+        self.requests += 1
+        self.connections.add(request.transport.get_extra_info("peername"))
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.fail_statuses:
+            headers = {"Retry-After": self.retry_after} if self.retry_after else {}
+            return web.Response(status=self.fail_statuses.pop(0), headers=headers)
+        return web.json_response({"status": "OK", "data": {"products": products}})
+
+    async def _search(self, request: web.Request) -> web.Response:
+        query = request.query.get("query", "")
+        products = fake_products(query, self.products_per_page)
+        return await self._respond(request, products)
+
+    async def _details(self, request: web.Request) -> web.Response:
+        asin = request.match_info["asin"]
+        return await self._respond(request, [fake_details(asin)])
+
+
+class FakeProductSearch(ProductSearchInterface):
+    """In-process search backend with an injected delay."""
+
+    def __init__(self, name: str, delay: float = 0.0, count: int = 20):
+        self.name = name
+        self.delay = delay
+        self.count = count
+        self.calls = 0
+
+    async def search_products(self, query: str, filters: Dict = None) -> List[Product]:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return list(iter_products(fake_products(query, self.count)))
+
+    async def get_product_details(self, product_id: str) -> Product:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return Product.from_api(fake_details(product_id))
+
+
+class RandomModel:
+    """Stands in for SentenceTransformer so only scoring is measured."""
+
+    def __init__(self, dim: int = EMBEDDING_DIM, seed: int = 0):
+        self.dim = dim
+        self.rng = np.random.default_rng(seed)
+
+    def encode(self, texts, convert_to_numpy=True, normalize_embeddings=True, **kwargs):
+        vectors = self.rng.standard_normal((len(texts), self.dim)).astype(np.float32)
+        if normalize_embeddings:
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors
+
+
+class HeavyModel(RandomModel):
+    """RandomModel that also holds ``megabytes`` of weights, about MiniLM's size.
+
+    The weights are written once on construction and only read afterwards,
+    like a loaded SentenceTransformer, so memory shared across forked
+    workers stays shared.
+    """
+
+    def __init__(self, megabytes: float = 90, **kwargs):
+        super().__init__(**kwargs)
+        self.weights = np.ones(int(megabytes * 2**20) // 4, dtype=np.float32)
@@ -0,0 +1,99 @@
+"""Rate limiting, retry and circuit-breaker behaviour against a failing stub.
+
+Run from the repository root:
+
+    python -m benchmarks.upstream_resilience
+"""
+import asyncio
+import json
+import time
+from typing import Dict
+
+from SmartScoop.product_search import AmazonProductSearch
+from SmartScoop.rate_limit import (
+    PRIORITY_BACKGROUND,
+    CircuitBreaker,
+    RetryPolicy,
+    request_priority,
+)
+from benchmarks.stubs import StubAmazonServer
+
+
+async def _retry_after(server: StubAmazonServer) -> Dict:
+    search = AmazonProductSearch("retry-key", base_url=server.base_url)
+    server.fail_statuses = [429, 503]
+    server.retry_after = "0.2"
+    server.requests = 0
+    start = time.perf_counter()
+    results = await search.search_products("kettle")
+    await search.close()
+    return {
+        "results": len(results),
+        "upstream_requests": server.requests,
+        "elapsed_s": time.perf_counter() - start,
+    }
+
+
+async def _circuit_breaker(server: StubAmazonServer) -> Dict:
+    search = AmazonProductSearch(
+        "breaker-key",
+        base_url=server.base_url,
+        retry_policy=RetryPolicy(max_retries=1, base_delay=0.01),
+        circuit_breaker=CircuitBreaker(failure_threshold=3, reset_timeout=60),
+    )
+    server.fail_statuses = [503] * 1000
+    server.retry_after = None
+    server.requests = 0
+    for _ in range(10):
+        await search.search_products("kettle")
+    server.fail_statuses = []
+    await search.close()
+    return {
+        "calls": 10,
+        "upstream_requests": server.requests,
+        "circuit_state": search.circuit_breaker.state,
+    }
+
+
+async def _priorities(server: StubAmazonServer) -> Dict:
+    search = AmazonProductSearch(
+        "priority-key", base_url=server.base_url, requests_per_second=20, burst=1
+    )
+    finished = []
+
+    async def call(label: str, background: bool):
+        if background:
+            request_priority.set(PRIORITY_BACKGROUND)
+        await search.search_products(label)
+        finished.append(label)
+
+    tasks = [
+        asyncio.create_task(call(f"background-{i}", True)) for i in range(10)
+    ]
+    await asyncio.sleep(0)
+    tasks += [asyncio.create_task(call(f"chat-{i}", False)) for i in range(5)]
+    await asyncio.gather(*tasks)
+    await search.close()
+    return {"completion_order": finished}
+
+
+async def _run() -> Dict:
+    server = StubAmazonServer()
+    await server.start()
+    try:
+        return {
+            "benchmark": "upstream_resilience",
+            "retry_after": await _retry_after(server),
+            "circuit_breaker": await _circuit_breaker(server),
+            "priorities": await _priorities(server),
+        }
+    finally:
+        await server.close()
+
+
+def run() -> Dict:
+    return asyncio.run(_run())
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
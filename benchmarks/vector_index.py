@@ -0,0 +1,97 @@
+"""Recall and latency of the approximate IVF index against the exact scan.
+
+Run from the repository root:
+
+    python -m benchmarks.vector_index --size 100000 --probes 1 4 8 16
+"""
+import argparse
+import json
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from SmartScoop.vector_index import BruteForceIndex, IVFIndex
+
+EMBEDDING_DIM = 384
+
+
+def _clustered_vectors(rng, count: int, dim: int, clusters: int = 256) -> np.ndarray:
+    # Real sentence embeddings are clustered; uniform noise would flatter nobody.
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, count)]
+    vectors += 0.5 * rng.standard_normal((count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _search_ms(index, queries: np.ndarray, k: int):
+    start = time.perf_counter()
+    results = index.search(queries, k)
+    return (time.perf_counter() - start) / len(queries) * 1000, results
+
+
+def _single_query_ms(index, queries: np.ndarray, k: int) -> float:
+    # The app mostly searches for one user at a time.
+    start = time.perf_counter()
+    for query in queries:
+        index.search(query[None, :], k)
+    return (time.perf_counter() - start) / len(queries) * 1000
+
+
+def run(size: int, probes: List[int], queries: int = 200, k: int = 10) -> Dict:
+    rng = np.random.default_rng(0)
+    vectors = _clustered_vectors(rng, size, EMBEDDING_DIM)
+    query_vectors = _clustered_vectors(rng, queries, EMBEDDING_DIM)
+    ids = list(range(size))
+
+    exact = BruteForceIndex()
+    exact.build(ids, vectors)
+    exact_ms, truth = _search_ms(exact, query_vectors, k)
+    exact_single_ms = _single_query_ms(exact, query_vectors, k)
+
+    ivf = IVFIndex()
+    start = time.perf_counter()
+    ivf.build(ids, vectors)
+    # The packed search layout is built by the first search.
+    ivf.search(query_vectors[:1], k)
+    build_s = time.perf_counter() - start
+
+    results = [
+        {
+            "backend": "exact",
+            "query_ms": exact_ms,
+            "single_query_ms": exact_single_ms,
+            "recall": 1.0,
+        }
+    ]
+    for n_probe in probes:
+        ivf.n_probe = n_probe
+        query_ms, found = _search_ms(ivf, query_vectors, k)
+        recall = np.mean(
+            [len(set(a) & set(b)) / len(a) for a, b in zip(truth, found)]
+        )
+        results.append(
+            {
+                "backend": "ivf",
+                "n_probe": n_probe,
+                "query_ms": query_ms,
+                "single_query_ms": _single_query_ms(ivf, query_vectors, k),
+                "recall": float(recall),
+            }
+        )
+    return {
+        "benchmark": "vector_index",
+        "catalog_size": size,
+        "ivf_build_s": build_s,
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--probes", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    args = parser.parse_args()
+    print(json.dumps(run(args.size, args.probes, args.queries, args.k), indent=2))
@@ -0,0 +1,173 @@
+"""Memory of the multi-worker server: model loaded per worker vs before forking.
+
+For each worker count the app is served by ``serve_workers`` with a stand-in
+model holding MiniLM-sized weights. In ``per_worker`` mode every worker
+loads its own copy, as separate uvicorn workers do. In ``preload`` mode the
+parent loads it once and the forked workers share it copy-on-write. Memory is
+the proportional set size (PSS) summed over the parent and its workers, so
+pages shared by N processes count once in total rather than N times. Linux
+only, since it reads /proc.
+
+Run from the repository root:
+
+    python -m benchmarks.workers --workers 1 2 4 --megabytes 90
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, List
+
+MODES = ("per_worker", "preload")
+
+
+def _serve(mode: str, workers: int, port: int, directory: str, megabytes: float):
+    from SmartScoop.app import ShoppingAssistantApp
+    from SmartScoop.server import create_app
+    from SmartScoop.workers import serve_workers
+    from benchmarks.stubs import HeavyModel, scripted_llm
+
+    def build_app(shared):
+        assistant = ShoppingAssistantApp(
+            {
+                "db_name": os.path.join(directory, "bench.db"),
+                "embedding_store_dir": os.path.join(directory, "embeddings"),
+                "AMAZON_API_KEY": "benchmark",
+                "chat_summarize": False,
+            },
+            llm=scripted_llm(),
+            embedding_model=shared or HeavyModel(megabytes),
+        )
+        return create_app(assistant)
+
+    serve_workers(
+        build_app,
+        workers,
+        host="127.0.0.1",
+        port=port,
+        preload=(lambda: HeavyModel(megabytes)) if mode == "preload" else None,
+        log_level="warning",
+    )
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _children(pid: int) -> List[int]:
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The command name may contain spaces; fields resume after its ")".
+        if int(stat.rsplit(")", 1)[1].split()[1]) == pid:
+            children.append(int(entry))
+    return children
+
+
+def _memory_kib(pid: int) -> Dict[str, int]:
+    memory = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key in ("Rss", "Pss"):
+                memory[key.lower()] = int(value.split()[0])
+    return memory
+
+
+def _ready(port: int) -> bool:
+    try:
+        with urllib.request.urlopen(
+            f"http://127.0.0.1:{port}/health/ready", timeout=1
+        ) as response:
+            return response.status == 200
+    except (urllib.error.URLError, OSError):
+        return False
+
+
+def _measure(mode: str, workers: int, megabytes: float, timeout: float) -> Dict:
+    port = _free_port()
+    with tempfile.TemporaryDirectory() as directory:
+        process = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.workers",
+                "--serve",
+                mode,
+                str(workers),
+                str(port),
+                directory,
+                str(megabytes),
+            ]
+        )
+        try:
+            start = time.perf_counter()
+            # Every worker answers readiness only once its app is built, so
+            # wait for all of them to exist and for several ready answers.
+            while True:
+                if time.perf_counter() - start > timeout:
+                    raise RuntimeError(f"{mode} x{workers} did not become ready")
+                if process.poll() is not None:
+                    raise RuntimeError(f"{mode} x{workers} exited early")
+                pids = _children(process.pid)
+                if len(pids) == workers and all(
+                    _ready(port) for _ in range(2 * workers)
+                ):
+                    break
+                time.sleep(0.2)
+            ready_s = time.perf_counter() - start
+            time.sleep(1)
+            usage = [_memory_kib(pid) for pid in [process.pid] + pids]
+        finally:
+            process.send_signal(signal.SIGTERM)
+            process.wait(timeout)
+    total_pss = sum(item["pss"] for item in usage) / 1024
+    return {
+        "workers": workers,
+        "ready_s": ready_s,
+        "total_pss_mb": total_pss,
+        "total_rss_mb": sum(item["rss"] for item in usage) / 1024,
+        "per_worker_pss_mb": total_pss / workers,
+    }
+
+
+def run(
+    workers: List[int] = (1, 2, 4), megabytes: float = 90, timeout: float = 120
+) -> Dict:
+    return {
+        "benchmark": "workers",
+        "model_mb": megabytes,
+        "results": {
+            mode: [_measure(mode, n, megabytes, timeout) for n in workers]
+            for mode in MODES
+        },
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--megabytes", type=float, default=90)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--serve", nargs=5, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        mode, workers, port, directory, megabytes = args.serve
+        _serve(mode, int(workers), int(port), directory, float(megabytes))
+    else:
+        print(json.dumps(run(args.workers, args.megabytes, args.timeout), indent=2))
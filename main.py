@@ -1,42 +1,80 @@
 import os
 import warnings
-import asyncio
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
 from SmartScoop.app import ShoppingAssistantApp
+from SmartScoop.server import create_app
+from SmartScoop.workers import serve_workers, worker_slot
 from dotenv import load_dotenv
+from fastapi import FastAPI
+from typing import Any, Optional
 import uvicorn
 
 warnings.filterwarnings("ignore")
 load_dotenv()
 
+workers = int(os.getenv("WEB_WORKERS", "1"))
+
 config = {
     "db_name": os.getenv("DB_NAME", "shopping_assistant.db"),
     "AMAZON_API_KEY": os.getenv("AMAZON_API_KEY"),
+    "amazon_base_url": os.getenv("AMAZON_API_BASE_URL"),
+    "amazon_requests_per_second": float(
+        os.getenv("AMAZON_REQUESTS_PER_SECOND", "5")
+    ),
     "GROQ_API_KEY": os.getenv("GROQ_API_KEY"),
+    "embedding_store_dir": os.getenv("EMBEDDING_STORE_DIR", "embeddings"),
+    "vector_index": os.getenv("VECTOR_INDEX", "exact"),
+    "search_cache_ttl": float(os.getenv("SEARCH_CACHE_TTL", "300")),
+    "search_cache_persistent": os.getenv("SEARCH_CACHE_PERSISTENT", "true").lower()
+    == "true",
+    "search_cache_memory_size": int(os.getenv("SEARCH_CACHE_MEMORY_SIZE", "2048")),
+    "chat_memory_tokens": int(os.getenv("CHAT_MEMORY_TOKENS", "2000")),
+    "chat_session_ttl": float(os.getenv("CHAT_SESSION_TTL", "3600")),
+    "chat_summarize": os.getenv("CHAT_SUMMARIZE", "true").lower() == "true",
+    "chat_persist": os.getenv("CHAT_PERSIST", "true").lower() == "true",
+    "chat_revalidate_interval": float(os.getenv("CHAT_REVALIDATE_INTERVAL", "1.0")),
+    "profile_write_behind": os.getenv("PROFILE_WRITE_BEHIND", "true").lower()
+    == "true",
+    "profile_flush_interval": float(os.getenv("PROFILE_FLUSH_INTERVAL", "0.5")),
+    "profile_cache_size": int(os.getenv("PROFILE_CACHE_SIZE", "10000")),
+    "profile_cache_ttl": float(os.getenv("PROFILE_CACHE_TTL", "300")),
+    "profile_revalidate_interval": float(
+        os.getenv("PROFILE_REVALIDATE_INTERVAL", "1.0")
+    ),
+    "price_history_retention_days": int(
+        os.getenv("PRICE_HISTORY_RETENTION_DAYS", "90")
+    ),
+    "price_alert_interval": float(os.getenv("PRICE_ALERT_INTERVAL", "900")),
+    "price_alert_budget": int(os.getenv("PRICE_ALERT_BUDGET", "500")),
 }
 
-app = FastAPI()
-shopping_assistant = ShoppingAssistantApp(config)
-
 
-class ChatRequest(BaseModel):
-    user_id: str
-    message: str
 
-
-@app.post("/chat")
-async def chat(request: ChatRequest):
-    try:
-        response = await shopping_assistant.handle_message(
-            request.user_id, request.message
-        )
-        return {"response": response}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+def build_app(embedding_model: Optional[Any] = None) -> FastAPI:
+    # Workers share one Amazon quota and one set of alerts: each gets its
+    # share of the request rate, and only slot 0 refreshes alert prices.
+    worker_config = dict(
+        config,
+        amazon_requests_per_second=config["amazon_requests_per_second"] / workers,
+        price_alert_lookups=worker_slot() == 0,
+    )
+    return create_app(
+        ShoppingAssistantApp(worker_config, embedding_model=embedding_model),
+        profiler_enabled=os.getenv("PROFILER_ENABLED", "false").lower() == "true",
+        profiler_interval=float(os.getenv("PROFILER_INTERVAL", "0.005")),
+        profiler_endpoint=os.getenv("PROFILER_ENDPOINT_ENABLED", "false").lower()
+        == "true",
+        warm_up=os.getenv("MODEL_WARMUP", "true").lower() == "true",
+    )
 
 
 if __name__ == "__main__":
-    uvicorn.run(
-        "main:app", host="0.0.0.0", port=8000, reload=True
-    )
+    if workers > 1:
+        # The parent only loads the model and binds the socket; each forked
+        # worker builds its own app around the shared model.
+        serve_workers(build_app, workers, host="0.0.0.0", port=8000)
+    else:
+        uvicorn.run(
+            "main:app", host="0.0.0.0", port=8000, reload=True
+        )
+else:
+    app = build_app()
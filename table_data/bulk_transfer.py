@@ -0,0 +1,235 @@
+"""Stream the users and seasonal_discounts tables to and from CSV, JSON Lines
+or Parquet in fixed-size chunks, so memory use does not grow with table size.
+
+Usage:
+    python table_data/bulk_transfer.py export users users.parquet
+    python table_data/bulk_transfer.py import seasonal_discounts discounts.csv
+"""
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import time
+
+DB_NAME = "shopping_assistant.db"
+TABLES = ("users", "seasonal_discounts")
+FORMATS = ("csv", "jsonl", "parquet")
+CHUNK_SIZE = 50000
+
+# Declared SQLite column types mapped to Parquet column types
+ARROW_TYPES = {"INTEGER": "int64", "REAL": "float64"}
+
+
+def detect_format(path):
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    if extension in ("jsonl", "ndjson"):
+        return "jsonl"
+    if extension in ("parquet", "pq"):
+        return "parquet"
+    return "csv"
+
+
+def table_columns(conn, table_name):
+    """Return [(name, declared type)] for a whitelisted table."""
+    if table_name not in TABLES:
+        raise ValueError(f"Unsupported table: {table_name}")
+    info = conn.execute(f"PRAGMA table_info({table_name})")
+    columns = [(row[1], row[2].upper()) for row in info]
+    if not columns:
+        raise ValueError(f"Table {table_name} does not exist in {DB_NAME}")
+    return columns
+
+
+class Progress:
+    def __init__(self, action, table_name):
+        self.action = action
+        self.table_name = table_name
+        self.rows = 0
+        self.start = time.perf_counter()
+
+    def update(self, rows):
+        self.rows += rows
+        elapsed = time.perf_counter() - self.start
+        rate = self.rows / elapsed if elapsed else 0
+        print(
+            f"{self.action} {self.table_name}: {self.rows} rows ({rate:,.0f} rows/sec)"
+        )
+
+    def finish(self, path):
+        elapsed = time.perf_counter() - self.start
+        rate = self.rows / elapsed if elapsed else 0
+        print(
+            f"{self.action} {self.rows} rows of {self.table_name} via {path} "
+            f"in {elapsed:.2f}s ({rate:,.0f} rows/sec)"
+        )
+
+
+# Writers: open(path, columns) -> object with write(rows) and close()
+class CsvWriter:
+    def __init__(self, path, columns):
+        self.file = open(path, mode="w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow([name for name, _ in columns])
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+
+class JsonLinesWriter:
+    def __init__(self, path, columns):
+        self.file = open(path, mode="w", encoding="utf-8")
+        self.names = [name for name, _ in columns]
+
+    def write(self, rows):
+        self.file.writelines(
+            json.dumps(dict(zip(self.names, row))) + "\n" for row in rows
+        )
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    def __init__(self, path, columns):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa = pa
+        self.names = [name for name, _ in columns]
+        self.schema = pa.schema(
+            [
+                (name, getattr(pa, ARROW_TYPES.get(declared, "string"))())
+                for name, declared in columns
+            ]
+        )
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, rows):
+        # One row group per chunk; columns are built from the chunk only.
+        arrays = [
+            self.pa.array([row[i] for row in rows], type=field.type)
+            for i, field in enumerate(self.schema)
+        ]
+        self.writer.write_table(self.pa.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+WRITERS = {"csv": CsvWriter, "jsonl": JsonLinesWriter, "parquet": ParquetWriter}
+
+
+# Readers: yield (column names, list of row tuples) one chunk at a time
+def read_csv(path, chunk_size):
+    with open(path, newline="", encoding="utf-8") as file:
+        reader = csv.reader(file)
+        names = next(reader)
+        chunk = []
+        for row in reader:
+            chunk.append(tuple(value if value != "" else None for value in row))
+            if len(chunk) >= chunk_size:
+                yield names, chunk
+                chunk = []
+        if chunk:
+            yield names, chunk
+
+
+def read_jsonl(path, chunk_size):
+    names = None
+    chunk = []
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if names is None:
+                names = list(record)
+            chunk.append(tuple(record.get(name) for name in names))
+            if len(chunk) >= chunk_size:
+                yield names, chunk
+                chunk = []
+    if chunk:
+        yield names, chunk
+
+
+def read_parquet(path, chunk_size):
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(path)
+    names = parquet_file.schema_arrow.names
+    for batch in parquet_file.iter_batches(batch_size=chunk_size):
+        columns = [batch.column(i).to_pylist() for i in range(batch.num_columns)]
+        yield names, list(zip(*columns))
+
+
+READERS = {"csv": read_csv, "jsonl": read_jsonl, "parquet": read_parquet}
+
+
+def export_table(table_name, path, file_format=None, chunk_size=CHUNK_SIZE):
+    """Stream a table into a file, chunk_size rows at a time."""
+    file_format = file_format or detect_format(path)
+    with sqlite3.connect(DB_NAME) as conn:
+        columns = table_columns(conn, table_name)
+        names = ", ".join(name for name, _ in columns)
+        cursor = conn.execute(f"SELECT {names} FROM {table_name}")
+        writer = WRITERS[file_format](path, columns)
+        progress = Progress("Exported", table_name)
+        try:
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                writer.write(rows)
+                progress.update(len(rows))
+        finally:
+            writer.close()
+    progress.finish(path)
+
+
+def import_table(table_name, path, file_format=None, chunk_size=CHUNK_SIZE):
+    """Load a file into a table with one executemany transaction per chunk.
+
+    Existing rows with the same primary key are replaced.
+    """
+    file_format = file_format or detect_format(path)
+    with sqlite3.connect(DB_NAME) as conn:
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        table_names = {name for name, _ in table_columns(conn, table_name)}
+        progress = Progress("Imported", table_name)
+        statement = None
+        for names, rows in READERS[file_format](path, chunk_size):
+            if statement is None:
+                unknown = set(names) - table_names
+                if unknown:
+                    raise ValueError(f"Columns not in {table_name}: {sorted(unknown)}")
+                placeholders = ", ".join("?" for _ in names)
+                statement = (
+                    f"INSERT OR REPLACE INTO {table_name} ({', '.join(names)}) "
+                    f"VALUES ({placeholders})"
+                )
+            with conn:
+                conn.executemany(statement, rows)
+            progress.update(len(rows))
+    progress.finish(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk export/import of tables.")
+    parser.add_argument("action", choices=("export", "import"))
+    parser.add_argument("table", choices=TABLES)
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=FORMATS, help="default: file extension")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--db", default=DB_NAME)
+    args = parser.parse_args()
+
+    DB_NAME = args.db
+    if args.action == "export":
+        export_table(args.table, args.path, args.format, args.chunk_size)
+    else:
+        import_table(args.table, args.path, args.format, args.chunk_size)
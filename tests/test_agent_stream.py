@@ -0,0 +1,76 @@
+import asyncio
+
+from SmartScoop.agent import ShoppingAssistantAgent
+from benchmarks.stubs import FakeProductSearch, scripted_llm
+
+
+def _agent(search_delay: float = 0.0, **kwargs) -> ShoppingAssistantAgent:
+    agent = ShoppingAssistantAgent(
+        llm=scripted_llm(tool="ProductSearch", token_latency=0.001),
+        product_searches=[FakeProductSearch("fake", delay=search_delay)],
+        user_profile_manager=None,
+        recommendation_engine=None,
+        seasonal_optimizer=None,
+        **kwargs,
+    )
+    agent.agent_executor.verbose = False
+    return agent
+
+
+def test_stream_yields_tokens_tools_and_final_answer():
+    agent = _agent()
+
+    async def main():
+        events = [event async for event in agent.stream_message("alice", "lamps")]
+        return events, await agent.memory.get_history("alice")
+
+    events, history = asyncio.run(main())
+    kinds = [event["type"] for event in events]
+    assert kinds.index("token") < kinds.index("tool_start") < kinds.index("tool_end")
+    assert kinds[-1] == "final"
+    assert events[-1]["output"] == "Here you go."
+    assert len(history) == 2
+    assert history[-1].content == "Here you go."
+
+
+def test_closing_the_stream_cancels_the_turn():
+    agent = _agent(search_delay=0.5)
+
+    async def main():
+        stream = agent.stream_message("alice", "lamps")
+        events = []
+        async for event in stream:
+            events.append(event)
+            if event["type"] == "tool_start":
+                break
+        await stream.aclose()
+        # Long enough for the search and the second LLM call to have finished
+        # had they kept running.
+        await asyncio.sleep(0.7)
+        return events, await agent.memory.get_history("alice")
+
+    events, history = asyncio.run(main())
+    assert events[-1]["type"] == "tool_start"
+    assert not any(event["type"] == "final" for event in events)
+    assert agent.llm.calls == 1
+    assert history == []
+
+
+def test_slow_consumer_pauses_the_agent():
+    agent = _agent(stream_max_pending=1)
+    search = agent.product_searches[0]
+
+    async def main():
+        stream = agent.stream_message("alice", "lamps")
+        first = await stream.__anext__()
+        # Long enough for the whole turn to finish if nothing held it back.
+        await asyncio.sleep(0.3)
+        paused = (agent.llm.calls, search.calls)
+        rest = [event async for event in stream]
+        return first, paused, rest
+
+    first, paused, rest = asyncio.run(main())
+    assert first["type"] == "token"
+    assert paused == (1, 0)
+    assert rest[-1]["type"] == "final"
+    assert (agent.llm.calls, search.calls) == (2, 1)
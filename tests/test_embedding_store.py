@@ -0,0 +1,94 @@
+import multiprocessing
+import os
+
+import numpy as np
+import pytest
+
+from SmartScoop.database import DatabaseManager
+from SmartScoop.embedding_store import EmbeddingStore
+from SmartScoop.recommendation import RecommendationEngine
+from SmartScoop.user_profile import UserProfileManager
+from benchmarks.stubs import RandomModel
+
+
+def _encode(texts):
+    return RandomModel(dim=8).encode(texts)
+
+
+def _products(start: int, count: int):
+    return [
+        {"id": f"P{i}", "description": f"product {i}"}
+        for i in range(start, start + count)
+    ]
+
+
+def _upsert_one_by_one(directory: str, start: int, count: int):
+    store = EmbeddingStore(directory)
+    for product in _products(start, count):
+        store.upsert([product], _encode)
+
+
+def test_stores_sharing_a_directory_keep_each_others_rows(tmp_path):
+    first, second = EmbeddingStore(str(tmp_path)), EmbeddingStore(str(tmp_path))
+    first.upsert(_products(0, 3), _encode)
+    # second has not seen first's write; it must not drop those rows.
+    second.upsert(_products(3, 2), _encode)
+    first.remove(["P4"])
+    second.upsert([{"id": "P0", "description": "changed"}], _encode)
+
+    ids = list(EmbeddingStore(str(tmp_path)).ids)
+    assert sorted(ids) == ["P0", "P1", "P2", "P3"]
+    assert second.refresh() is False
+    assert first.refresh() is True
+    assert sorted(first.ids) == sorted(ids)
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_concurrent_writers_lose_nothing(tmp_path):
+    context = multiprocessing.get_context("fork")
+    workers = [
+        context.Process(target=_upsert_one_by_one, args=(str(tmp_path), i * 10, 10))
+        for i in range(4)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(30)
+        assert worker.exitcode == 0
+
+    store = EmbeddingStore(str(tmp_path))
+    assert sorted(store.ids) == sorted(f"P{i}" for i in range(40))
+    assert store.matrix.shape == (40, 8)
+
+
+def test_engine_picks_up_changes_from_another_process(tmp_path):
+    db_manager = DatabaseManager(os.path.join(tmp_path, "bench.db"))
+    directory = os.path.join(tmp_path, "embeddings")
+    engine = RecommendationEngine(
+        UserProfileManager(db_manager),
+        model=RandomModel(dim=8),
+        embedding_store=EmbeddingStore(directory),
+    )
+    try:
+        engine.update_product_embeddings(_products(0, 3))
+        index = engine.index
+        # The engine's own writes update its index in place.
+        engine.update_product_embeddings(_products(3, 1))
+        assert engine.index is index and len(index) == 4
+        assert engine.sync_embeddings() is False
+
+        other = EmbeddingStore(directory)
+        other.upsert(_products(4, 2), _encode)
+        other.remove(["P0"])
+        assert engine.sync_embeddings() is True
+        assert engine.index is not index
+        assert sorted(engine.index.ids) == ["P1", "P2", "P3", "P4", "P5"]
+
+        # A write on top of another process's change also rebuilds.
+        other.upsert(_products(6, 1), _encode)
+        engine.update_product_embeddings(_products(7, 1))
+        assert len(engine.index) == 7
+        query = np.asarray(engine.embedding_store.matrix[:1])
+        assert len(engine.index.search(query, 10)[0]) == 7
+    finally:
+        db_manager.close()
@@ -0,0 +1,100 @@
+import asyncio
+import os
+
+import pytest
+
+from SmartScoop.database import DatabaseManager
+from SmartScoop.price_alerts import PriceAlertEngine
+from SmartScoop.product import Product
+from benchmarks.stubs import FakeProductSearch
+
+
+class WrongProductSearch(FakeProductSearch):
+    """Answers every details lookup with some other product."""
+
+    async def get_product_details(self, product_id):
+        self.calls += 1
+        return Product(asin="OTHER", title="Something else", price=1.0)
+
+
+@pytest.fixture
+def db_manager(tmp_path):
+    db_manager = DatabaseManager(os.path.join(tmp_path, "alerts.db"))
+    yield db_manager
+    db_manager.close()
+
+
+def test_refresh_fires_alerts_at_or_below_target(db_manager):
+    # FakeProductSearch prices every product at $19.99.
+    engine = PriceAlertEngine(db_manager, FakeProductSearch("fake"))
+    fired = []
+    engine.add_listener(fired.append)
+
+    async def main():
+        await engine.load()
+        await engine.add_alert("alice", "ASIN1", 25)
+        await engine.add_alert("bob", "ASIN1", 19.99)
+        await engine.add_alert("carol", "ASIN1", 10)
+        await engine.add_alert("dave", "ASIN2", "$15.00")
+        return await engine.refresh(), await engine.user_alerts("carol")
+
+    triggered, carol_alerts = asyncio.run(main())
+    assert sorted(alert["user_id"] for alert in triggered) == ["alice", "bob"]
+    assert fired == triggered
+    assert all(alert["price"] == 19.99 for alert in triggered)
+    assert engine.lookups == 2
+    assert engine.stats()["armed"] == 2
+    assert len(carol_alerts) == 1
+
+
+def test_alerts_fire_once(db_manager):
+    engine = PriceAlertEngine(db_manager, FakeProductSearch("fake"))
+
+    async def main():
+        await engine.load()
+        await engine.add_alert("alice", "ASIN1", 25)
+        first = await engine.refresh()
+        second = await engine.refresh()
+        # A fresh engine on the same database does not re-arm it either.
+        reloaded = PriceAlertEngine(db_manager, FakeProductSearch("fake"))
+        await reloaded.load()
+        return first, second, len(reloaded.index)
+
+    first, second, armed = asyncio.run(main())
+    assert len(first) == 1
+    assert second == []
+    assert armed == 0
+
+
+def test_lookup_ignores_products_with_another_asin(db_manager):
+    engine = PriceAlertEngine(db_manager, WrongProductSearch("wrong"))
+
+    async def main():
+        await engine.load()
+        await engine.add_alert("alice", "ASIN1", 25)
+        return await engine.refresh()
+
+    assert asyncio.run(main()) == []
+    assert engine.stats()["armed"] == 1
+
+
+def test_search_results_are_matched_without_lookups(db_manager):
+    backend = FakeProductSearch("fake")
+    engine = PriceAlertEngine(db_manager, backend)
+
+    async def main():
+        await engine.load()
+        await engine.add_alert("alice", "ASIN1", 50)
+        return await engine.observe(
+            [{"asin": "ASIN1", "price": "$45.00"}, {"asin": "ASIN2", "price": 1}]
+        )
+
+    fired = asyncio.run(main())
+    assert [(alert["user_id"], alert["price"]) for alert in fired] == [("alice", 45.0)]
+    assert backend.calls == 0
+
+
+def test_invalid_alerts_are_rejected(db_manager):
+    engine = PriceAlertEngine(db_manager, FakeProductSearch("fake"))
+    with pytest.raises(ValueError):
+        asyncio.run(engine.add_alert("alice", "ASIN1", "free"))
@@ -0,0 +1,123 @@
+import asyncio
+
+from SmartScoop.product_search import AmazonProductSearch
+from SmartScoop.rate_limit import CircuitBreaker, RetryPolicy
+from benchmarks.stubs import StubAmazonServer
+
+
+def _client(base_url: str, **kwargs) -> AmazonProductSearch:
+    kwargs.setdefault("retry_policy", RetryPolicy(max_retries=2, base_delay=0.01))
+    return AmazonProductSearch(
+        "test-key",
+        base_url=base_url,
+        requests_per_second=1000,
+        burst=1000,
+        **kwargs,
+    )
+
+
+def _with_stub(test, **kwargs):
+    async def main():
+        stub = StubAmazonServer(**kwargs)
+        base_url = await stub.start()
+        try:
+            await test(stub, base_url)
+        finally:
+            await stub.close()
+
+    asyncio.run(main())
+
+
+def test_session_and_connections_are_reused():
+    async def check(stub, base_url):
+        search = _client(base_url)
+        try:
+            await search.start()
+            session = search._session
+            for query in ("headphones", "keyboard", "monitor"):
+                assert len(await search.search_products(query)) == 5
+            assert search._session is session
+            assert stub.requests == 3
+            assert len(stub.connections) == 1
+        finally:
+            await search.close()
+
+    _with_stub(check, products_per_page=5)
+
+
+def test_retries_after_429_honouring_retry_after():
+    async def check(stub, base_url):
+        stub.fail_statuses = [429]
+        stub.retry_after = "0"
+        # Without Retry-After the backoff would wait up to 60 seconds.
+        search = _client(base_url, retry_policy=RetryPolicy(base_delay=60))
+        try:
+            products = await asyncio.wait_for(search.search_products("lamp"), 5)
+        finally:
+            await search.close()
+        assert len(products) == 20
+        assert stub.requests == 2
+
+    _with_stub(check)
+
+
+def test_retries_server_errors():
+    async def check(stub, base_url):
+        stub.fail_statuses = [503, 502]
+        search = _client(base_url)
+        try:
+            products = await search.search_products("lamp")
+        finally:
+            await search.close()
+        assert len(products) == 20
+        assert stub.requests == 3
+        assert search.circuit_breaker.state == CircuitBreaker.CLOSED
+
+    _with_stub(check)
+
+
+def test_client_errors_are_not_retried():
+    async def check(stub, base_url):
+        stub.fail_statuses = [404]
+        search = _client(base_url)
+        try:
+            assert await search.search_products("lamp") == []
+        finally:
+            await search.close()
+        assert stub.requests == 1
+
+    _with_stub(check)
+
+
+def test_circuit_opens_after_repeated_failures():
+    async def check(stub, base_url):
+        stub.fail_statuses = [503] * 3
+        search = _client(
+            base_url, circuit_breaker=CircuitBreaker(failure_threshold=1)
+        )
+        try:
+            assert await search.search_products("lamp") == []
+            assert search.circuit_breaker.state == CircuitBreaker.OPEN
+            # Fails fast without reaching the upstream.
+            assert await search.search_products("lamp") == []
+            assert stub.requests == 3
+        finally:
+            await search.close()
+
+    _with_stub(check)
+
+
+def test_circuit_closes_after_successful_trial():
+    async def check(stub, base_url):
+        stub.fail_statuses = [503] * 3
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+        search = _client(base_url, circuit_breaker=breaker)
+        try:
+            assert await search.search_products("lamp") == []
+            await asyncio.sleep(0.1)
+            assert len(await search.search_products("lamp")) == 20
+            assert breaker.state == CircuitBreaker.CLOSED
+        finally:
+            await search.close()
+
+    _with_stub(check)
@@ -0,0 +1,58 @@
+import asyncio
+import time
+
+import pytest
+
+from SmartScoop.rate_limit import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    TokenBucket,
+    rate_limiter_for,
+)
+
+
+def test_waiters_are_served_by_priority():
+    bucket = TokenBucket(rate=100, capacity=1)
+    order = []
+
+    async def take(name, priority):
+        await bucket.acquire(priority)
+        order.append(name)
+
+    async def main():
+        await bucket.acquire()
+        await asyncio.gather(
+            take("background", PRIORITY_BACKGROUND),
+            take("interactive", PRIORITY_INTERACTIVE),
+        )
+
+    asyncio.run(main())
+    assert order == ["interactive", "background"]
+
+
+def test_bucket_recovers_when_its_loop_ends_mid_wait():
+    bucket = rate_limiter_for("test-loop-handover", 10, 1)
+
+    async def time_out_waiting():
+        await bucket.acquire()
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(bucket.acquire(), 0.01)
+        # A waiter that is still queued when the loop ends.
+        asyncio.get_running_loop().create_task(bucket.acquire())
+        await asyncio.sleep(0)
+
+    asyncio.run(time_out_waiting())
+    time.sleep(0.2)
+
+    async def acquire_twice():
+        await asyncio.wait_for(bucket.acquire(), 1)
+        await asyncio.wait_for(bucket.acquire(), 1)
+
+    asyncio.run(acquire_twice())
+
+
+def test_shared_bucket_takes_the_latest_rate():
+    first = rate_limiter_for("test-reconfigure", 1, 1)
+    second = rate_limiter_for("test-reconfigure", 50, 5)
+    assert first is second
+    assert (second.rate, second.capacity) == (50, 5)
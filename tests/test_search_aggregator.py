@@ -0,0 +1,59 @@
+import asyncio
+import time
+
+from SmartScoop.search_aggregator import SearchAggregator
+from benchmarks.stubs import FakeProductSearch
+
+
+class FailingProductSearch(FakeProductSearch):
+    async def search_products(self, query, filters=None):
+        raise RuntimeError("backend down")
+
+
+def test_slow_backend_is_dropped_at_its_deadline():
+    aggregator = SearchAggregator(
+        [FakeProductSearch("fast", count=3), FakeProductSearch("slow", delay=5)],
+        timeout=0.1,
+    )
+    start = time.perf_counter()
+    results = asyncio.run(aggregator.search("desk lamp"))
+    assert time.perf_counter() - start < 1
+    assert len(results) == 3
+
+
+def test_per_backend_timeout_overrides_default():
+    aggregator = SearchAggregator(
+        [FakeProductSearch("fast", count=3), FakeProductSearch("slow", delay=0.2)],
+        timeout=0.05,
+        timeouts={"slow": 1.0},
+    )
+
+    async def collect():
+        return [name async for name, _ in aggregator.stream("desk lamp")]
+
+    assert asyncio.run(collect()) == ["fast", "slow"]
+
+
+def test_failing_backend_does_not_hide_others():
+    aggregator = SearchAggregator(
+        [FailingProductSearch("broken"), FakeProductSearch("fake", count=4)]
+    )
+    assert len(asyncio.run(aggregator.search("desk lamp"))) == 4
+
+
+def test_duplicates_across_backends_are_merged():
+    # Both fakes return the same products for the same query.
+    aggregator = SearchAggregator(
+        [FakeProductSearch("first", count=5), FakeProductSearch("second", count=8)]
+    )
+    results = asyncio.run(aggregator.search("desk lamp"))
+    asins = [product["asin"] for product in results]
+    assert len(asins) == len(set(asins)) == 8
+
+
+def test_same_title_under_another_asin_is_a_duplicate():
+    aggregator = SearchAggregator([])
+    seen = set()
+    first = {"asin": "B1", "title": "Desk Lamp, LED"}
+    other = {"asin": "B2", "title": "desk lamp led"}
+    assert aggregator._dedupe([first, other], seen) == [first]
@@ -0,0 +1,124 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from SmartScoop.seasonal_discount import SeasonalEvent, SeasonalOptimizer
+
+
+def _optimizer(**kwargs) -> SeasonalOptimizer:
+    optimizer = SeasonalOptimizer(**kwargs)
+    optimizer.register_event(
+        SeasonalEvent.BLACK_FRIDAY, datetime(2024, 11, 29), datetime(2024, 11, 30)
+    )
+    optimizer.register_event(
+        SeasonalEvent.PRIME_DAY, datetime(2024, 7, 16), datetime(2024, 7, 17)
+    )
+    optimizer.register_event(
+        "spring_sale", datetime(2024, 3, 20), datetime(2024, 3, 21), discount=12
+    )
+    return optimizer
+
+
+def test_batch_price_history_rules_match_single_product_advice():
+    optimizer = _optimizer()
+    rng = np.random.default_rng(0)
+    n = 2000
+    prices = np.round(rng.uniform(10, 100, n), 2)
+    lows = np.round(prices * rng.uniform(0.9, 1.1, n), 2)
+    trends = rng.choice([-0.01, -0.002, 0.0, 0.005], n)
+    days = rng.integers(0, 30, n)
+    offsets = rng.integers(0, 366 * 24, n).astype("timedelta64[h]")
+    now = (np.datetime64("2024-01-01T00") + offsets).astype("datetime64[s]")
+    horizons = rng.choice([7, 30, 90, 365], n)
+
+    batch = optimizer.predict_sales(
+        prices,
+        now,
+        horizons,
+        historical_lows=lows,
+        history_days=days,
+        price_trends=trends,
+    )
+    for i in range(n):
+        optimizer.horizon_days = float(horizons[i])
+        stats = {"low": lows[i], "last": prices[i], "trend": trends[i], "days": days[i]}
+        single = optimizer._advise(
+            {"price": prices[i]}, now[i].astype(datetime), stats
+        )
+        assert batch["should_wait"][i] == single["should_wait"], i
+
+
+def test_batch_ignores_lows_without_enough_history():
+    optimizer = _optimizer()
+    now = datetime(2024, 11, 1)
+    result = optimizer.predict_sales(
+        [50.0, 50.0],
+        now,
+        historical_lows=[50.0, 50.0],
+        history_days=[1, 30],
+    )
+    # Black Friday is coming, but the second product is at its historical low.
+    assert result["should_wait"].tolist() == [True, False]
+
+
+def _expected(optimizer: SeasonalOptimizer, now: datetime, horizon: float):
+    upcoming = optimizer.upcoming_events(now, horizon)
+    # Largest discount wins; ties go to the earliest event.
+    return max(upcoming, key=lambda event: event["discount"], default=None)
+
+
+def _check_against_upcoming_events(optimizer: SeasonalOptimizer, seed: int):
+    rng = np.random.default_rng(seed)
+    n = 3000
+    offsets = rng.integers(0, 4 * 365 * 24, n).astype("timedelta64[h]")
+    now = (np.datetime64("2023-01-01T00") + offsets).astype("datetime64[s]")
+    # Includes empty ranges (zero or short horizons) and ranges over a year.
+    horizons = rng.choice([0, 0.5, 3, 30, 120, 365, 400], n)
+    result = optimizer.predict_sales(np.full(n, 100.0), now, horizons)
+    for i in range(n):
+        best = _expected(optimizer, now[i].astype(datetime), float(horizons[i]))
+        if best is None:
+            assert result["sale_event"][i] is None
+            assert np.isnat(result["estimated_sale_date"][i])
+            assert result["expected_discount"][i] == 0
+        else:
+            assert result["sale_event"][i] == best["event"]
+            assert result["estimated_sale_date"][i] == np.datetime64(
+                best["start_date"], "s"
+            )
+            assert result["expected_discount"][i] == best["discount"]
+
+
+def test_predict_sales_matches_upcoming_events():
+    optimizer = _optimizer()
+    # Ties: two more events share Prime Day's and Black Friday's discounts.
+    optimizer.register_event(
+        "summer_sale", datetime(2024, 6, 1), datetime(2024, 6, 2), discount=25
+    )
+    optimizer.register_event(
+        "winter_sale", datetime(2024, 1, 10), datetime(2024, 1, 12), discount=40
+    )
+    optimizer.register_event(
+        "leap_day_sale", datetime(2024, 2, 29), datetime(2024, 3, 1), discount=20
+    )
+    _check_against_upcoming_events(optimizer, seed=1)
+
+
+def test_predict_sales_matches_upcoming_events_without_recurrence():
+    optimizer = _optimizer(recurring=False)
+    optimizer.register_event(
+        "summer_sale", datetime(2024, 6, 1), datetime(2024, 6, 2), discount=25
+    )
+    _check_against_upcoming_events(optimizer, seed=2)
+
+
+def test_predict_sales_with_many_events_and_ties():
+    # Enough events for several sparse-table levels, with many equal discounts.
+    optimizer = SeasonalOptimizer()
+    rng = np.random.default_rng(3)
+    for i in range(37):
+        start = datetime(2024, 1, 1) + timedelta(days=int(rng.integers(0, 366)))
+        optimizer.register_event(
+            f"event_{i}", start, start, discount=float(rng.choice([10, 20, 30]))
+        )
+    _check_against_upcoming_events(optimizer, seed=4)
@@ -0,0 +1,35 @@
+import os
+
+import pytest
+
+from SmartScoop.app import ShoppingAssistantApp
+from SmartScoop.server import create_app
+from benchmarks.stubs import RandomModel, scripted_llm
+
+
+@pytest.fixture
+def assistant(tmp_path):
+    return ShoppingAssistantApp(
+        {
+            "db_name": os.path.join(tmp_path, "test.db"),
+            "embedding_store_dir": os.path.join(tmp_path, "embeddings"),
+            "AMAZON_API_KEY": "test",
+            "chat_summarize": False,
+        },
+        llm=scripted_llm(),
+        embedding_model=RandomModel(),
+    )
+
+
+def _paths(app):
+    return {route.path for route in app.routes}
+
+
+def test_profiler_routes_are_off_by_default(assistant):
+    paths = _paths(create_app(assistant))
+    assert "/debug/profiler" not in paths
+    assert {"/chat", "/chat/stream", "/metrics"} <= paths
+
+
+def test_profiler_routes_can_be_enabled(assistant):
+    assert "/debug/profiler" in _paths(create_app(assistant, profiler_endpoint=True))
@@ -0,0 +1,79 @@
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from SmartScoop.vector_index import BruteForceIndex, IVFIndex
+
+
+def _vectors(count: int, dim: int = 32, seed: int = 0) -> np.ndarray:
+    vectors = np.random.default_rng(seed).standard_normal((count, dim))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float32)
+
+
+def _assert_same_results(ivf: IVFIndex, exact: BruteForceIndex, queries, k=10):
+    for found, expected in zip(ivf.search(queries, k), exact.search(queries, k)):
+        assert list(found) == list(expected)
+
+
+def _pair(count: int = 2000, n_lists: int = 16):
+    ids = [f"P{i}" for i in range(count)]
+    vectors = _vectors(count)
+    # Probing every list makes the IVF search exact.
+    ivf = IVFIndex(n_lists=n_lists, n_probe=n_lists)
+    exact = BruteForceIndex()
+    ivf.build(ids, vectors)
+    exact.build(ids, vectors)
+    return ivf, exact
+
+
+def test_full_probe_matches_exact_search():
+    ivf, exact = _pair()
+    _assert_same_results(ivf, exact, _vectors(50, seed=1))
+
+
+def test_full_probe_matches_exact_search_after_add_and_remove():
+    ivf, exact = _pair()
+    queries = _vectors(50, seed=1)
+    ivf.search(queries, 10)
+
+    # New ids plus new vectors for existing ones.
+    ids = [f"P{i}" for i in range(1900, 2300)]
+    vectors = _vectors(len(ids), seed=2)
+    ivf.add(ids, vectors)
+    exact.add(ids, vectors)
+    assert len(ivf) == len(exact) == 2300
+    _assert_same_results(ivf, exact, queries)
+
+    removed = [f"P{i}" for i in range(0, 2300, 3)] + ["missing"]
+    ivf.remove(removed)
+    exact.remove(removed)
+    assert len(ivf) == len(exact)
+    _assert_same_results(ivf, exact, queries)
+
+
+def test_concurrent_first_searches_agree():
+    ivf, exact = _pair(count=20000, n_lists=64)
+    queries = _vectors(8, seed=1)
+    expected = [list(ids) for ids in exact.search(queries, 5)]
+    barrier = threading.Barrier(len(queries))
+
+    def search(row):
+        barrier.wait()
+        return list(ivf.search(queries[row : row + 1], 5)[0])
+
+    # Switch threads often so searches interleave with the packing.
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)
+    try:
+        with ThreadPoolExecutor(max_workers=len(queries)) as pool:
+            for _ in range(10):
+                # Re-adding a vector invalidates the packed layout, so every
+                # round races on a fresh pack.
+                ivf.add(["P0"], exact.vectors[:1])
+                results = list(pool.map(search, range(len(queries))))
+                assert results == expected
+    finally:
+        sys.setswitchinterval(interval)